@@ -7,14 +7,23 @@ import math
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import tempfile
-import shutil
 
 # Importar funções do módulo de processamento
 from memorial_processor import (
     _build_memorial_resumo_doc_web, _build_solicitacao_analise_doc_web,
     build_unif_desm_doc_web, build_condominio_loteamento_doc_web,
-    build_excel_fracao_ideal_web, build_excel_vertices_web
+    build_excel_fracao_ideal_web, build_excel_vertices_web,
+    build_pacote_web, artefatos_pacote,
+    aquecer_transformadores, estatisticas_transformadores, estatisticas_cache_leituras,
+    invalidar_modelo_base, estatisticas_modelo_base, estatisticas_fragmentos,
+    estatisticas_paragrafos,
+    versao_artefatos, ARMAZEM_MARCA
 )
+from ativos_marca import ImagemInvalida, LARGURAS_POL
+
+from armazem_uploads import ArmazemUploads, UploadExpirado
+from fila_tarefas import FilaTarefas, CONCLUIDA, ERRO
+from cache_artefatos import CacheArtefatos
 
 # Importar módulo de autenticação
 from auth import (
@@ -24,17 +33,29 @@ from auth import (
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-this-in-production')
-app.config['UPLOAD_FOLDER'] = tempfile.mkdtemp()
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
 
 # Configurar autenticação
 login_manager = configurar_login_manager(app)
 
 # Criar diretórios necessários
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs('static/uploads', exist_ok=True)
 os.makedirs('static/images', exist_ok=True)
 
+# Uploads ficam em disco (compartilhados entre workers); a sessão guarda só os ids
+armazem_uploads = ArmazemUploads(
+    os.environ.get('MEMORIAL_UPLOAD_DIR') or os.path.join(tempfile.gettempdir(), 'memorial-uploads')
+)
+
+# Documentos gerados, reaproveitados enquanto arquivos/formulário/marca/data não mudam
+cache_artefatos = CacheArtefatos(
+    os.environ.get('MEMORIAL_ARTEFATOS_DIR') or os.path.join(tempfile.gettempdir(), 'memorial-artefatos'),
+    int(os.environ.get('MEMORIAL_ARTEFATOS_MB', '512')) * 1024 * 1024
+)
+
+# Pré-construir os transformadores UTM -> SIRGAS na subida do worker
+aquecer_transformadores()
+
 @app.route('/')
 @login_required
 def index():
@@ -128,13 +149,9 @@ def enviar_arquivos():
         
         if arquivo and arquivo_permitido(arquivo.filename):
             nome_arquivo = secure_filename(arquivo.filename)
-            caminho_arquivo = os.path.join(app.config['UPLOAD_FOLDER'], nome_arquivo)
-            arquivo.save(caminho_arquivo)
-            
-            with open(caminho_arquivo, 'rb') as f:
-                arquivos_enviados[nome_arquivo] = f.read()
+            arquivos_enviados[nome_arquivo] = armazem_uploads.guardar(current_user.get_id(), arquivo.stream)
     
-    # Armazenar na sessão
+    # Armazenar na sessão apenas os ids ({nome: sha256})
     session['uploaded_files'] = arquivos_enviados
     
     return jsonify({
@@ -151,6 +168,22 @@ def arquivo_imagem_permitido(nome_arquivo):
     return '.' in nome_arquivo and \
            nome_arquivo.rsplit('.', 1)[1].lower() in ['png', 'jpg', 'jpeg', 'gif', 'bmp']
 
+def ids_uploads_sessao():
+    """{nome: sha256} dos uploads da sessão (sessões antigas guardavam bytes)"""
+    return {nome: id_arquivo for nome, id_arquivo in (session.get('uploaded_files') or {}).items()
+            if isinstance(id_arquivo, str)}
+
+def chave_artefato(artefato, modo, dados, arquivos):
+    """Chave do cache de artefatos para um pedido de geração"""
+    return cache_artefatos.chave(artefato, modo, dados, arquivos, versao_artefatos())
+
+def guardar_artefato(chave, caminho):
+    """Guarda um arquivo gerado no cache; falhas do cache não afetam a geração"""
+    try:
+        cache_artefatos.guardar(chave, caminho)
+    except OSError as e:
+        print(f"⚠️ AVISO: Não foi possível guardar no cache de artefatos: {e}")
+
 @app.route('/api/upload-image', methods=['POST'])
 @login_required
 def enviar_imagem():
@@ -165,16 +198,24 @@ def enviar_imagem():
         return jsonify({'error': 'Nome de arquivo vazio'}), 400
     
     if arquivo and arquivo_imagem_permitido(arquivo.filename):
-        # Definir nome do arquivo baseado no tipo
-        if tipo_imagem == 'marca_dagua':
-            nome_arquivo = 'marca_dagua.png'
-        elif tipo_imagem == 'logo_cabecalho':
-            nome_arquivo = 'logo_cabecalho.png'
-        elif tipo_imagem == 'logo_rodape':
-            nome_arquivo = 'logo_rodape.png'
-        else:
-            nome_arquivo = secure_filename(arquivo.filename)
+        if tipo_imagem in LARGURAS_POL:
+            # Imagens da marca: nova versão otimizada no armazém (o arquivo em uso não é tocado)
+            try:
+                entrada = ARMAZEM_MARCA.publicar(tipo_imagem, arquivo.stream)
+            except ImagemInvalida as e:
+                return jsonify({'error': str(e)}), 400
+            # Modelo base com a imagem antiga (os outros workers percebem pelo manifesto)
+            invalidar_modelo_base()
+            return jsonify({
+                'success': True,
+                'filename': f"{tipo_imagem}.png",
+                'id': entrada['id'],
+                'width_px': entrada['largura_px'],
+                'height_px': entrada['altura_px'],
+                'message': f'Imagem {tipo_imagem} salva com sucesso!'
+            })
         
+        nome_arquivo = secure_filename(arquivo.filename)
         caminho_arquivo = os.path.join('static/images', nome_arquivo)
         
         # Garantir que o diretório existe
@@ -192,109 +233,72 @@ def enviar_imagem():
     
     return jsonify({'error': 'Tipo de arquivo não permitido. Use PNG, JPG, JPEG, GIF ou BMP'}), 400
 
+def gerar_artefato(artefato, modo, dados_formulario, arquivos_enviados, diretorio_saida=None):
+    """
+    Chama o builder do artefato pedido ('docx' | 'excel' | 'pacote'). Sem diretorio_saida o
+    resultado fica em memória (ArtefatoGerado); com ele, volta o caminho gravado.
+    """
+    if artefato == 'pacote':
+        # ZIP com todos os artefatos do tipo de empreendimento
+        return gerar_pacote(dados_formulario, arquivos_enviados, modo, diretorio_saida)
+    if artefato == 'excel':
+        if modo == 'condominio':
+            # Excel de fração ideal
+            return gerar_excel_fracao_ideal(dados_formulario, arquivos_enviados, diretorio_saida)
+        # Excel de vértices
+        return gerar_excel_vertices(dados_formulario, arquivos_enviados, modo, diretorio_saida)
+    if modo == 'memorial_resumo':
+        return gerar_memorial_resumo(dados_formulario, diretorio_saida)
+    if modo == 'solicitacao_analise':
+        return gerar_solicitacao_analise(dados_formulario, diretorio_saida)
+    if modo in ('unificacao', 'desmembramento', 'unif_desm'):
+        return gerar_unif_desm(dados_formulario, arquivos_enviados, modo, diretorio_saida)
+    # condominio ou loteamento
+    return gerar_condominio_loteamento(dados_formulario, arquivos_enviados, modo, diretorio_saida)
+
+def resposta_upload_expirado(erro):
+    """410: uploads da sessão expiraram; nunca se gera com parte dos arquivos"""
+    return jsonify({'success': False, 'error': str(erro), 'expired_files': erro.nomes}), 410
+
+def gerar_e_guardar(artefato, dados):
+    """
+    Gera (ou reaproveita do cache) o artefato do pedido. O builder grava em
+    memória e o arquivo vai direto para o armazém de artefatos, de onde é baixado.
+    """
+    modo = dados.get('tipo_emp')
+    arquivos = ids_uploads_sessao()
+    
+    # Mesmo pedido já gerado hoje: devolver o arquivo guardado
+    chave = chave_artefato(artefato, modo, dados, arquivos)
+    caminho = cache_artefatos.obter(chave)
+    em_cache = caminho is not None
+    if not em_cache:
+        dados_formulario = ContextoDadosFormulario(dados)
+        # Arquivos da sessão, abertos do armazém de uploads (mmap)
+        with armazem_uploads.abrir_varios(current_user.get_id(), arquivos) as arquivos_enviados:
+            gerado = gerar_artefato(artefato, modo, dados_formulario, arquivos_enviados)
+        try:
+            caminho = cache_artefatos.guardar_fluxo(chave, gerado.nome, gerado.abrir())
+        finally:
+            gerado.fechar()
+    
+    nome_arquivo = os.path.basename(caminho)
+    return jsonify({
+        'success': True,
+        'filename': nome_arquivo,
+        'download_url': f'/api/download/{chave}/{nome_arquivo}',
+        'file_size': os.path.getsize(caminho),
+        'cache': em_cache
+    })
+
 @app.route('/api/generate', methods=['POST'])
 @login_required
 def gerar_documento():
     """Endpoint principal para gerar documentos"""
     try:
-        dados = request.get_json()
-        modo = dados.get('tipo_emp')
-        
-        # Recuperar arquivos da sessão
-        arquivos_enviados = session.get('uploaded_files', {})
-        
-        # Criar objeto de contexto com os valores do formulário
-        dados_formulario = ContextoDadosFormulario(dados)
-        
-        # Criar diretório temporário para output
-        diretorio_saida = tempfile.mkdtemp()
-        
-        try:
-            if modo == 'memorial_resumo':
-                caminho_saida = gerar_memorial_resumo(dados_formulario, diretorio_saida)
-            elif modo == 'solicitacao_analise':
-                caminho_saida = gerar_solicitacao_analise(dados_formulario, diretorio_saida)
-            elif modo in ('unificacao', 'desmembramento', 'unif_desm'):
-                caminho_saida = gerar_unif_desm(dados_formulario, arquivos_enviados, modo, diretorio_saida)
-            else:  # condominio ou loteamento
-                caminho_saida = gerar_condominio_loteamento(
-                    dados_formulario, arquivos_enviados, modo, diretorio_saida
-                )
-            
-            # Verificar se o arquivo foi gerado corretamente
-            if not caminho_saida or not os.path.exists(caminho_saida):
-                raise Exception(f"Arquivo não foi gerado: {caminho_saida}")
-            
-            tamanho_arquivo = os.path.getsize(caminho_saida)
-            if tamanho_arquivo == 0:
-                raise Exception(f"Arquivo gerado está vazio: {caminho_saida}")
-            
-            # Verificar conteúdo do arquivo antes de mover
-            try:
-                from docx import Document
-                doc = Document(caminho_saida)
-                contagem_paragrafos = len(doc.paragraphs)
-                print(f"📄 Arquivo gerado: {caminho_saida}, Tamanho: {tamanho_arquivo} bytes, Parágrafos: {contagem_paragrafos}")
-                if contagem_paragrafos == 0:
-                    print(f"⚠️ AVISO: Arquivo tem 0 parágrafos antes de mover!")
-            except Exception as e:
-                print(f"⚠️ AVISO: Erro ao verificar arquivo antes de mover: {e}")
-            
-            # Mover arquivo para o diretório de uploads para download
-            nome_arquivo = os.path.basename(caminho_saida)
-            caminho_destino = os.path.join(app.config['UPLOAD_FOLDER'], nome_arquivo)
-            
-            # Garantir que o diretório existe
-            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-            
-            shutil.move(caminho_saida, caminho_destino)
-            
-            # Verificar novamente após mover
-            if not os.path.exists(caminho_destino):
-                raise Exception(f"Arquivo não foi movido corretamente para: {caminho_destino}")
-            
-            tamanho_final = os.path.getsize(caminho_destino)
-            if tamanho_final == 0:
-                raise Exception(f"Arquivo ficou vazio após mover: {caminho_destino}")
-            
-            # Verificar conteúdo do arquivo após mover
-            try:
-                from docx import Document
-                doc = Document(caminho_destino)
-                contagem_paragrafos = len(doc.paragraphs)
-                print(f"📄 Arquivo movido: {caminho_destino}, Tamanho: {tamanho_final} bytes, Parágrafos: {contagem_paragrafos}")
-                if contagem_paragrafos == 0:
-                    print(f"⚠️ AVISO: Arquivo tem 0 parágrafos após mover!")
-            except Exception as e:
-                print(f"⚠️ AVISO: Erro ao verificar arquivo após mover: {e}")
-            
-            # Copiar também para Downloads para garantir que o arquivo está acessível
-            caminho_downloads = os.path.expanduser(f'~/Downloads/{nome_arquivo}')
-            try:
-                shutil.copy2(caminho_destino, caminho_downloads)
-                print(f"📥 Arquivo também copiado para: {caminho_downloads}")
-                # Verificar se a cópia está OK
-                from docx import Document
-                doc_verificacao = Document(caminho_downloads)
-                print(f"📄 Cópia em Downloads - Parágrafos: {len(doc_verificacao.paragraphs)}")
-            except Exception as e:
-                print(f"⚠️ Aviso: Não foi possível copiar para Downloads: {e}")
-            
-            return jsonify({
-                'success': True,
-                'filename': nome_arquivo,
-                'download_url': f'/api/download/{nome_arquivo}',
-                'file_size': tamanho_final,
-                'downloads_path': caminho_downloads if 'caminho_downloads' in locals() else None
-            })
-        finally:
-            # Limpar diretório temporário se necessário
-            try:
-                if os.path.exists(diretorio_saida):
-                    shutil.rmtree(diretorio_saida)
-            except:
-                pass
-    
+        return gerar_e_guardar('docx', request.get_json())
+    except UploadExpirado as e:
+        return resposta_upload_expirado(e)
     except Exception as e:
         import traceback
         return jsonify({
@@ -303,35 +307,19 @@ def gerar_documento():
             'traceback': traceback.format_exc()
         }), 500
 
-@app.route('/api/download/<filename>')
+@app.route('/api/download/<chave>/<nome_arquivo>')
 @login_required
-def baixar_arquivo(nome_arquivo):
+def baixar_arquivo(chave, nome_arquivo):
     """Endpoint para download de arquivos gerados"""
-    # Buscar o arquivo no diretório de uploads
-    caminho_arquivo = os.path.join(app.config['UPLOAD_FOLDER'], nome_arquivo)
-    
-    if not os.path.exists(caminho_arquivo):
+    caminho_arquivo = cache_artefatos.caminho(chave, nome_arquivo)
+    if caminho_arquivo is None:
         return jsonify({'error': 'Arquivo não encontrado'}), 404
     
-    # Verificar se o arquivo não está vazio
-    tamanho_arquivo = os.path.getsize(caminho_arquivo)
-    if tamanho_arquivo == 0:
-        return jsonify({'error': 'Arquivo está vazio'}), 500
-    
-    # Verificar se é um arquivo .docx válido
-    try:
-        from docx import Document
-        doc = Document(caminho_arquivo)
-        if len(doc.paragraphs) == 0:
-            print(f"⚠️ AVISO: Arquivo {nome_arquivo} tem 0 parágrafos!")
-    except Exception as e:
-        print(f"⚠️ AVISO: Erro ao verificar arquivo {nome_arquivo}: {e}")
-    
     return send_file(
-        caminho_arquivo, 
+        caminho_arquivo,
         as_attachment=True,
         download_name=nome_arquivo,
-        mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        mimetype=_MIMETYPES.get(os.path.splitext(nome_arquivo)[1].lower(), 'application/octet-stream')
     )
 
 @app.route('/api/generate-excel', methods=['POST'])
@@ -340,40 +328,30 @@ def gerar_excel():
     """Endpoint para gerar planilhas Excel"""
     try:
         dados = request.get_json()
-        modo = dados.get('tipo_emp')
-        arquivos_enviados = session.get('uploaded_files', {})
-        dados_formulario = ContextoDadosFormulario(dados)
-        
-        diretorio_saida = tempfile.mkdtemp()
-        
-        try:
-            if modo == 'condominio':
-                # Excel de fração ideal
-                caminho_saida = gerar_excel_fracao_ideal(dados_formulario, arquivos_enviados, diretorio_saida)
-            elif modo in ('unificacao', 'desmembramento', 'unif_desm'):
-                # Excel de vértices
-                caminho_saida = gerar_excel_vertices(dados_formulario, arquivos_enviados, modo, diretorio_saida)
-            else:
-                return jsonify({'error': 'Tipo não suporta Excel'}), 400
-            
-            # Mover arquivo para o diretório de uploads para download
-            nome_arquivo = os.path.basename(caminho_saida)
-            caminho_destino = os.path.join(app.config['UPLOAD_FOLDER'], nome_arquivo)
-            shutil.move(caminho_saida, caminho_destino)
-            
-            return jsonify({
-                'success': True,
-                'filename': nome_arquivo,
-                'download_url': f'/api/download/{nome_arquivo}'
-            })
-        finally:
-            # Limpar diretório temporário se necessário
-            try:
-                if os.path.exists(diretorio_saida):
-                    shutil.rmtree(diretorio_saida)
-            except:
-                pass
-    
+        if dados.get('tipo_emp') not in _MODOS_EXCEL:
+            return jsonify({'error': 'Tipo não suporta Excel'}), 400
+        return gerar_e_guardar('excel', dados)
+    except UploadExpirado as e:
+        return resposta_upload_expirado(e)
+    except Exception as e:
+        import traceback
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+@app.route('/api/generate-package', methods=['POST'])
+@login_required
+def gerar_pacote_artefatos():
+    """Endpoint para gerar todos os artefatos do empreendimento num único ZIP"""
+    try:
+        dados = request.get_json()
+        if not artefatos_pacote(dados.get('tipo_emp')):
+            return jsonify({'error': 'Tipo não suporta pacote'}), 400
+        return gerar_e_guardar('pacote', dados)
+    except UploadExpirado as e:
+        return resposta_upload_expirado(e)
     except Exception as e:
         import traceback
         return jsonify({
@@ -382,6 +360,103 @@ def gerar_excel():
             'traceback': traceback.format_exc()
         }), 500
 
+# Fila de geração (tarefas em segundo plano)
+_MIMETYPES = {
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.zip': 'application/zip',
+}
+_MODOS_EXCEL = ('condominio', 'unificacao', 'desmembramento', 'unif_desm')
+
+@app.route('/api/jobs', methods=['POST'])
+@login_required
+def criar_tarefa():
+    """Agenda a geração (DOCX, Excel ou pacote) e devolve o id da tarefa imediatamente"""
+    dados = request.get_json() or {}
+    artefato = dados.pop('artefato', 'docx')
+    modo = dados.get('tipo_emp')
+    if artefato not in ('docx', 'excel', 'pacote'):
+        return jsonify({'success': False, 'error': 'Artefato inválido'}), 400
+    if artefato == 'excel' and modo not in _MODOS_EXCEL:
+        return jsonify({'success': False, 'error': 'Tipo não suporta Excel'}), 400
+    if artefato == 'pacote' and not artefatos_pacote(modo):
+        return jsonify({'success': False, 'error': 'Tipo não suporta pacote'}), 400
+    
+    arquivos = ids_uploads_sessao()
+    em_cache = cache_artefatos.obter(chave_artefato(artefato, modo, dados, arquivos))
+    id_tarefa = None
+    if em_cache:
+        # None se o arquivo foi despejado do cache entre a consulta e o registro
+        id_tarefa = fila_geracao.registrar_concluida(current_user.get_id(), artefato, modo, dados, arquivos, em_cache)
+    if id_tarefa is None:
+        faltando = armazem_uploads.faltantes(current_user.get_id(), arquivos)
+        if faltando:
+            return resposta_upload_expirado(UploadExpirado(faltando))
+        id_tarefa = fila_geracao.enviar(current_user.get_id(), artefato, modo, dados, arquivos)
+    return jsonify({
+        'success': True,
+        'job_id': id_tarefa,
+        'status_url': f'/api/jobs/{id_tarefa}',
+    }), 202
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def estado_tarefa(job_id):
+    """Estado e progresso de uma tarefa do usuário"""
+    tarefa = fila_geracao.consultar(job_id, current_user.get_id())
+    if tarefa is None:
+        return jsonify({'success': False, 'error': 'Tarefa não encontrada'}), 404
+    
+    resposta = {
+        'success': True,
+        'job_id': job_id,
+        'status': tarefa['estado'],
+        'progress': tarefa['progresso'],
+        'message': tarefa['mensagem'],
+    }
+    if tarefa['estado'] == CONCLUIDA:
+        resposta['filename'] = os.path.basename(tarefa['resultado'])
+        resposta['download_url'] = f'/api/jobs/{job_id}/result'
+    elif tarefa['estado'] == ERRO:
+        resposta['error'] = tarefa['erro']
+        resposta['traceback'] = tarefa['traceback']
+    return jsonify(resposta)
+
+@app.route('/api/metrics')
+@login_required
+def metricas():
+    """Contadores dos caches deste worker (cada worker do gunicorn tem os seus)"""
+    return jsonify({
+        'cache_artefatos': cache_artefatos.estatisticas(),
+        'cache_leituras': estatisticas_cache_leituras(),
+        'fragmentos': estatisticas_fragmentos(),
+        'paragrafos': estatisticas_paragrafos(),
+        'modelo_base': estatisticas_modelo_base(),
+        'transformadores': estatisticas_transformadores(),
+    })
+
+@app.route('/api/jobs/<job_id>/result')
+@login_required
+def resultado_tarefa(job_id):
+    """Download do arquivo gerado por uma tarefa concluída"""
+    tarefa = fila_geracao.consultar(job_id, current_user.get_id())
+    if tarefa is None:
+        return jsonify({'error': 'Tarefa não encontrada'}), 404
+    if tarefa['estado'] != CONCLUIDA:
+        return jsonify({'error': 'Tarefa ainda não concluída', 'status': tarefa['estado']}), 409
+    
+    caminho_arquivo = tarefa['resultado']
+    if not os.path.exists(caminho_arquivo):
+        return jsonify({'error': 'Arquivo não encontrado'}), 404
+    
+    nome_arquivo = os.path.basename(caminho_arquivo)
+    return send_file(
+        caminho_arquivo,
+        as_attachment=True,
+        download_name=nome_arquivo,
+        mimetype=_MIMETYPES.get(os.path.splitext(nome_arquivo)[1].lower(), 'application/octet-stream')
+    )
+
 # Classes auxiliares para simular os widgets
 class ContextoDadosFormulario:
     """Simula os widgets do ipywidgets usando dados do formulário"""
@@ -391,6 +466,10 @@ class ContextoDadosFormulario:
     def obter(self, chave, padrao=''):
         return self.dados.get(chave, padrao)
     
+    def get(self, chave, padrao=None):
+        """Mesma interface de dict.get (usada pelos builders)"""
+        return self.dados.get(chave, padrao)
+    
     @property
     def tipo_emp(self):
         return self.obter('tipo_emp', 'condominio')
@@ -480,30 +559,56 @@ class ContextoDadosFormulario:
         return TemRestricao()
 
 # Funções de geração de documentos
-def gerar_memorial_resumo(dados_formulario, diretorio_saida):
+def gerar_memorial_resumo(dados_formulario, diretorio_saida=None):
     """Gera memorial resumo"""
     return _build_memorial_resumo_doc_web(dados_formulario, diretorio_saida)
 
-def gerar_solicitacao_analise(dados_formulario, diretorio_saida):
+def gerar_solicitacao_analise(dados_formulario, diretorio_saida=None):
     """Gera solicitação de análise"""
     return _build_solicitacao_analise_doc_web(dados_formulario, diretorio_saida)
 
-def gerar_unif_desm(dados_formulario, arquivos_enviados, modo, diretorio_saida):
+def gerar_unif_desm(dados_formulario, arquivos_enviados, modo, diretorio_saida=None):
     """Gera documentos de unificação/desmembramento"""
     return build_unif_desm_doc_web(dados_formulario, arquivos_enviados, modo, diretorio_saida)
 
-def gerar_condominio_loteamento(dados_formulario, arquivos_enviados, modo, diretorio_saida):
+def gerar_condominio_loteamento(dados_formulario, arquivos_enviados, modo, diretorio_saida=None):
     """Gera documentos de condomínio ou loteamento"""
     return build_condominio_loteamento_doc_web(dados_formulario, arquivos_enviados, modo, diretorio_saida)
 
-def gerar_excel_fracao_ideal(dados_formulario, arquivos_enviados, diretorio_saida):
+def gerar_excel_fracao_ideal(dados_formulario, arquivos_enviados, diretorio_saida=None):
     """Gera Excel de fração ideal"""
     return build_excel_fracao_ideal_web(dados_formulario, arquivos_enviados, diretorio_saida)
 
-def gerar_excel_vertices(dados_formulario, arquivos_enviados, modo, diretorio_saida):
+def gerar_excel_vertices(dados_formulario, arquivos_enviados, modo, diretorio_saida=None):
     """Gera Excel de vértices"""
     return build_excel_vertices_web(dados_formulario, arquivos_enviados, modo, diretorio_saida)
 
+def gerar_pacote(dados_formulario, arquivos_enviados, modo, diretorio_saida=None):
+    """Gera o pacote (ZIP) com todos os artefatos do tipo de empreendimento"""
+    # o formulário vai para processos filhos: dict, não o contexto
+    return build_pacote_web(dados_formulario.dados, arquivos_enviados, modo, diretorio_saida)
+
+def executar_tarefa_geracao(tarefa, diretorio_saida, progresso):
+    """Executada numa thread da fila: gera o arquivo de uma tarefa"""
+    caminho = _gerar_arquivo_tarefa(tarefa, diretorio_saida, progresso)
+    if caminho and os.path.exists(caminho):
+        progresso(0.95, 'Guardando no cache')
+        guardar_artefato(chave_artefato(tarefa['tipo'], tarefa['modo'], tarefa['dados'], tarefa['arquivos']), caminho)
+    return caminho
+
+def _gerar_arquivo_tarefa(tarefa, diretorio_saida, progresso):
+    dados_formulario = ContextoDadosFormulario(tarefa['dados'])
+    progresso(0.1, 'Abrindo arquivos')
+    with armazem_uploads.abrir_varios(tarefa['usuario'], tarefa['arquivos']) as arquivos_enviados:
+        progresso(0.2, 'Gerando documento')
+        return gerar_artefato(tarefa['tipo'], tarefa['modo'], dados_formulario, arquivos_enviados, diretorio_saida)
+
+# Fila de geração: SQLite local (compartilhada entre workers) + threads do worker
+fila_geracao = FilaTarefas(
+    os.environ.get('MEMORIAL_TAREFAS_DIR') or os.path.join(tempfile.gettempdir(), 'memorial-tarefas'),
+    executar_tarefa_geracao
+)
+
 if __name__ == '__main__':
     # Para desenvolvimento local
     port = int(os.environ.get('PORT', 5001))
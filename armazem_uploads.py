@@ -0,0 +1,145 @@
+"""
+Armazenamento dos uploads no servidor
+Os arquivos ficam em disco, endereçados pelo SHA-256 do conteúdo, numa pasta
+por usuário; a sessão guarda apenas {nome do arquivo: id}. Na geração, os
+arquivos são abertos como mmap (somente leitura), sem copiar para a memória.
+"""
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Tempo de vida de um upload sem uso (renovado a cada leitura)
+TTL_PADRAO = int(os.environ.get('MEMORIAL_UPLOAD_TTL', 6 * 3600))
+
+_ID_VALIDO = re.compile(r'[0-9a-f]{64}\Z')
+_BLOCO = 1 << 20
+
+class UploadExpirado(LookupError):
+    """Uploads da sessão que não estão mais no armazém (expirados ou inexistentes)"""
+
+    def __init__(self, nomes):
+        self.nomes = sorted(nomes)
+        super().__init__("Arquivos enviados expiraram; envie novamente: " + ", ".join(self.nomes))
+
+class ArmazemUploads:
+    """Uploads em disco: <raiz>/<namespace do usuário>/<sha256>"""
+
+    def __init__(self, raiz, ttl=TTL_PADRAO, intervalo_limpeza=600):
+        self.raiz = os.path.abspath(raiz)
+        self.ttl = ttl
+        self.intervalo_limpeza = intervalo_limpeza
+        self._ultima_limpeza = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(self.raiz, exist_ok=True)
+
+    @staticmethod
+    def namespace(usuario):
+        """Pasta do usuário (hash do identificador, nunca o e-mail em claro)"""
+        return hashlib.sha256(str(usuario).encode('utf-8')).hexdigest()[:32]
+
+    def _pasta(self, usuario):
+        return os.path.join(self.raiz, self.namespace(usuario))
+
+    def _caminho(self, usuario, id_arquivo):
+        if not _ID_VALIDO.match(str(id_arquivo)):
+            raise KeyError(id_arquivo)
+        return os.path.join(self._pasta(usuario), id_arquivo)
+
+    def guardar(self, usuario, fluxo):
+        """Grava o conteúdo de fluxo (arquivo binário) e devolve o id (sha256)"""
+        self.expirar()
+        pasta = self._pasta(usuario)
+        os.makedirs(pasta, exist_ok=True)
+        h = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    bloco = fluxo.read(_BLOCO)
+                    if not bloco:
+                        break
+                    h.update(bloco)
+                    f.write(bloco)
+            id_arquivo = h.hexdigest()
+            destino = os.path.join(pasta, id_arquivo)
+            if os.path.exists(destino):
+                os.remove(tmp)
+                os.utime(destino)
+            else:
+                os.replace(tmp, destino)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return id_arquivo
+
+    def existe(self, usuario, id_arquivo):
+        try:
+            return os.path.isfile(self._caminho(usuario, id_arquivo))
+        except KeyError:
+            return False
+
+    def faltantes(self, usuario, ids):
+        """Nomes de {nome: id} cujo upload não está mais no armazém"""
+        return [nome for nome, id_arquivo in (ids or {}).items() if not self.existe(usuario, id_arquivo)]
+
+    def abrir(self, usuario, id_arquivo):
+        """Conteúdo do upload como mmap somente leitura (b'' se vazio)"""
+        caminho = self._caminho(usuario, id_arquivo)
+        with open(caminho, 'rb') as f:
+            os.utime(caminho)
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @contextmanager
+    def abrir_varios(self, usuario, ids):
+        """
+        {nome: id} -> {nome: mmap} enquanto o bloco with estiver ativo.
+        Faltou algum (expirado ou inexistente): UploadExpirado, nunca um
+        conjunto parcial.
+        """
+        arquivos = {}
+        faltando = []
+        try:
+            for nome, id_arquivo in (ids or {}).items():
+                try:
+                    arquivos[nome] = self.abrir(usuario, id_arquivo)
+                except (KeyError, OSError):
+                    faltando.append(nome)
+            if faltando:
+                raise UploadExpirado(faltando)
+            yield arquivos
+        finally:
+            for buf in arquivos.values():
+                if isinstance(buf, mmap.mmap):
+                    buf.close()
+
+    def expirar(self, forcar=False):
+        """Remove uploads não usados há mais de ttl segundos"""
+        agora = time.time()
+        with self._lock:
+            if not forcar and agora - self._ultima_limpeza < self.intervalo_limpeza:
+                return 0
+            self._ultima_limpeza = agora
+        removidos = 0
+        for ns in os.scandir(self.raiz):
+            if not ns.is_dir():
+                continue
+            for arq in os.scandir(ns.path):
+                try:
+                    if agora - arq.stat().st_mtime > self.ttl:
+                        os.remove(arq.path)
+                        removidos += 1
+                except OSError:
+                    pass
+            try:
+                os.rmdir(ns.path)  # só remove se ficou vazia
+            except OSError:
+                pass
+        return removidos
@@ -0,0 +1,204 @@
+"""
+Imagens da marca (logos e marca d'água) versionadas
+No upload a imagem é decodificada uma vez e gravada já na largura em que entra
+no documento (300 dpi), recomprimida, com nome = hash do conteúdo. Um manifesto
+(gravação atômica) aponta a versão atual de cada tipo; arquivos publicados
+nunca são sobrescritos, então quem está lendo nunca vê uma imagem pela metade.
+A geração só consulta o manifesto; os bytes ficam em memória no processo.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from PIL import Image, UnidentifiedImageError
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+# Largura (polegadas) com que cada imagem entra no documento
+LARGURAS_POL = {
+    'logo_cabecalho': 1.4,
+    'logo_rodape': 1.6,
+    'marca_dagua': 6.46 / 2.54,
+}
+DPI = 300
+
+# Variantes fora do manifesto há mais que isso são apagadas
+_RETENCAO = 3600
+
+class ImagemInvalida(ValueError):
+    pass
+
+def _otimizar(fluxo, largura_pol):
+    """Decodifica, reduz para largura_pol a DPI (nunca amplia) e recomprime em PNG"""
+    try:
+        img = Image.open(fluxo)
+        img.load()
+    except Image.DecompressionBombError as e:  # subclasse de Exception, não de OSError
+        raise ImagemInvalida("Imagem grande demais") from e
+    except (UnidentifiedImageError, OSError) as e:
+        raise ImagemInvalida("Arquivo não é uma imagem válida") from e
+    if img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('P', 'PA') else 'RGB')
+    largura_px = max(1, round(largura_pol * DPI))
+    if img.width > largura_px:
+        altura_px = max(1, round(img.height * largura_px / img.width))
+        img = img.resize((largura_px, altura_px), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, 'PNG', optimize=True, dpi=(DPI, DPI))
+    return buf.getvalue(), img.size
+
+class ArmazemMarca:
+    """<pasta>/manifesto.json + <pasta>/<id>.png (id = sha256 do PNG otimizado)"""
+
+    def __init__(self, pasta, padroes=None):
+        # padroes: {tipo: caminho} usados enquanto o tipo não tiver upload
+        self.pasta = os.path.abspath(pasta)
+        self.padroes = dict(padroes or {})
+        self.caminho_manifesto = os.path.join(self.pasta, 'manifesto.json')
+        self._lock = threading.Lock()
+        self._marca_manifesto = None
+        self._manifesto = {}
+        self._bytes = {}  # id -> conteúdo
+        os.makedirs(self.pasta, exist_ok=True)
+
+    @contextmanager
+    def _trava(self):
+        """Exclusão mútua entre processos para ler-modificar-gravar o manifesto"""
+        with open(os.path.join(self.pasta, '.trava'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _ler_manifesto(self):
+        try:
+            with open(self.caminho_manifesto, encoding='utf-8') as f:
+                return json.load(f).get('ativos', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _gravar_atomico(self, destino, dados):
+        fd, tmp = tempfile.mkstemp(dir=self.pasta, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(dados)
+            os.replace(tmp, destino)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def _publicar(self, tipo, fluxo, origem):
+        if tipo not in LARGURAS_POL:
+            raise KeyError(tipo)
+        dados, (largura, altura) = _otimizar(fluxo, LARGURAS_POL[tipo])
+        id_ativo = hashlib.sha256(dados).hexdigest()
+        caminho = os.path.join(self.pasta, f"{id_ativo}.png")
+        if not os.path.exists(caminho):
+            self._gravar_atomico(caminho, dados)
+        with self._trava():
+            ativos = self._ler_manifesto()
+            ativos[tipo] = {
+                'id': id_ativo,
+                'largura_px': largura,
+                'altura_px': altura,
+                'bytes': len(dados),
+                'origem': origem,
+                'publicado': time.time(),
+            }
+            texto = json.dumps({'ativos': ativos}, ensure_ascii=False, indent=1, sort_keys=True)
+            self._gravar_atomico(self.caminho_manifesto, texto.encode('utf-8'))
+            self._remover_antigos({a['id'] for a in ativos.values()})
+        return ativos[tipo]
+
+    def publicar(self, tipo, fluxo):
+        """Nova versão da imagem tipo a partir de um upload; devolve a entrada do manifesto"""
+        return self._publicar(tipo, fluxo, 'upload')
+
+    def _remover_antigos(self, em_uso):
+        agora = time.time()
+        for ent in os.scandir(self.pasta):
+            nome, ext = os.path.splitext(ent.name)
+            if ext != '.png' or nome in em_uso:
+                continue
+            try:
+                if agora - ent.stat().st_mtime > _RETENCAO:
+                    os.remove(ent.path)
+            except OSError:
+                pass
+
+    def _semear_padroes(self, ativos):
+        """Tipos sem upload recebem a imagem padrão (uma vez, no primeiro uso)"""
+        for tipo, caminho in self.padroes.items():
+            if tipo in ativos or not os.path.isfile(caminho):
+                continue
+            try:
+                with open(caminho, 'rb') as f:
+                    self._publicar(tipo, f, 'padrao')
+            except (OSError, ImagemInvalida):
+                continue
+
+    def _atualizar(self):
+        """Relê o manifesto se ele mudou desde a última consulta (uma chamada a stat)"""
+        try:
+            st = os.stat(self.caminho_manifesto)
+            marca = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            marca = None
+        with self._lock:
+            if marca is not None and marca == self._marca_manifesto:
+                return
+        ativos = self._ler_manifesto()
+        if any(t not in ativos for t in self.padroes):
+            self._semear_padroes(ativos)
+            ativos = self._ler_manifesto()
+            try:
+                st = os.stat(self.caminho_manifesto)
+                marca = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                marca = None
+        conteudos = {}
+        for entrada in ativos.values():
+            id_ativo = entrada['id']
+            dados = self._bytes.get(id_ativo)
+            if dados is None:
+                try:
+                    with open(os.path.join(self.pasta, f"{id_ativo}.png"), 'rb') as f:
+                        dados = f.read()
+                except OSError:
+                    continue
+            conteudos[id_ativo] = dados
+        with self._lock:
+            self._manifesto = ativos
+            self._bytes = conteudos
+            self._marca_manifesto = marca
+
+    def versao(self):
+        """{tipo: id} das imagens atuais"""
+        self._atualizar()
+        with self._lock:
+            return {tipo: a['id'] for tipo, a in sorted(self._manifesto.items()) if a['id'] in self._bytes}
+
+    def ativos(self):
+        """(versao, {tipo: bytes do PNG}) das imagens atuais"""
+        self._atualizar()
+        with self._lock:
+            imagens = {tipo: self._bytes[a['id']] for tipo, a in self._manifesto.items() if a['id'] in self._bytes}
+            versao = {tipo: self._manifesto[tipo]['id'] for tipo in sorted(imagens)}
+        return versao, imagens
+
+    def manifesto(self):
+        self._atualizar()
+        with self._lock:
+            return {tipo: dict(a) for tipo, a in self._manifesto.items()}
@@ -0,0 +1,154 @@
+"""
+Cache dos arquivos gerados (DOCX/XLSX)
+A chave é o hash canônico de tudo que define o documento: arquivos enviados
+(sha256), formulário normalizado, tipo do artefato/empreendimento, versões
+(builders, leitores, ids das imagens da marca) e a data (os documentos trazem
+a data do dia).
+Os arquivos ficam em disco, com despejo LRU por tamanho total.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import date
+
+_CHAVE_VALIDA = re.compile(r'[0-9a-f]{64}\Z')
+
+def _normaliza_formulario(dados):
+    """Campos vazios (None/'') equivalem a ausentes; textos sem espaços nas pontas"""
+    out = {}
+    for chave, valor in (dados or {}).items():
+        if isinstance(valor, str):
+            valor = valor.strip()
+        if valor is None or valor == '':
+            continue
+        out[chave] = valor
+    return out
+
+class CacheArtefatos:
+    """Artefatos em <pasta>/<chave>/<nome do arquivo>"""
+
+    def __init__(self, pasta, limite_bytes):
+        self.pasta = os.path.abspath(pasta)
+        self.limite_bytes = int(limite_bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.gravacoes = 0
+        self.despejos = 0
+        os.makedirs(self.pasta, exist_ok=True)
+
+    def chave(self, artefato, modo, dados, arquivos, versao):
+        """
+        arquivos: {nome: sha256}; versao: versões do gerador (inclui as imagens da marca).
+        Mesmos insumos no mesmo dia -> mesma chave.
+        """
+        canonico = {
+            'artefato': artefato,
+            'modo': modo,
+            'formulario': _normaliza_formulario(dados),
+            'arquivos': sorted((arquivos or {}).items()),
+            'versao': versao,
+            'data': date.today().isoformat(),
+        }
+        texto = json.dumps(canonico, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+    def obter(self, chave):
+        """Caminho do artefato guardado para chave, ou None"""
+        pasta = os.path.join(self.pasta, chave)
+        try:
+            nomes = [n for n in os.listdir(pasta) if not n.endswith('.tmp')]
+        except OSError:
+            nomes = []
+        if not nomes:
+            with self._lock:
+                self.misses += 1
+            return None
+        caminho = os.path.join(pasta, nomes[0])
+        try:
+            os.utime(pasta)  # usado agora: fim da fila de despejo
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return caminho
+
+    def caminho(self, chave, nome):
+        """Caminho de um artefato guardado (sem contar como consulta), ou None"""
+        if not _CHAVE_VALIDA.match(str(chave)) or os.path.basename(nome) != nome:
+            return None
+        caminho = os.path.join(self.pasta, chave, nome)
+        return caminho if os.path.isfile(caminho) else None
+
+    def guardar(self, chave, caminho_origem):
+        """Copia um arquivo gerado para o cache"""
+        with open(caminho_origem, 'rb') as origem:
+            return self.guardar_fluxo(chave, os.path.basename(caminho_origem), origem)
+
+    def guardar_fluxo(self, chave, nome, fluxo):
+        """Grava o conteúdo de fluxo como <chave>/<nome> (atômico) e aplica o limite de tamanho"""
+        pasta = os.path.join(self.pasta, chave)
+        os.makedirs(pasta, exist_ok=True)
+        destino = os.path.join(pasta, os.path.basename(nome))
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(fluxo, f, 1 << 20)
+            os.replace(tmp, destino)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with self._lock:
+            self.gravacoes += 1
+        self._despejar(manter=pasta)
+        return destino
+
+    def _entradas(self):
+        """[(mtime, bytes, pasta)] de todas as entradas em disco"""
+        entradas = []
+        for ent in os.scandir(self.pasta):
+            if not ent.is_dir():
+                continue
+            try:
+                tamanho = sum(a.stat().st_size for a in os.scandir(ent.path))
+                entradas.append((ent.stat().st_mtime, tamanho, ent.path))
+            except OSError:
+                continue
+        return entradas
+
+    def _despejar(self, manter=None):
+        """Remove as entradas usadas há mais tempo até caber no limite (exceto manter)"""
+        entradas = self._entradas()
+        total = sum(t for _, t, _ in entradas)
+        if total <= self.limite_bytes:
+            return
+        for _, tamanho, pasta in sorted(entradas):
+            if total <= self.limite_bytes:
+                break
+            if pasta == manter:
+                continue
+            shutil.rmtree(pasta, ignore_errors=True)
+            total -= tamanho
+            with self._lock:
+                self.despejos += 1
+
+    def estatisticas(self):
+        entradas = self._entradas()
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'taxa_acerto': round(self.hits / consultas, 4) if consultas else None,
+                'gravacoes': self.gravacoes,
+                'despejos': self.despejos,
+                'itens': len(entradas),
+                'bytes': sum(t for _, t, _ in entradas),
+                'limite_bytes': self.limite_bytes,
+                'pid': os.getpid(),
+            }
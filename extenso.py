@@ -0,0 +1,128 @@
+"""
+Números por extenso (pt_BR) sem passar pelo num2words a cada chamada
+Tabela pronta de 0 a 999 e composição por grupos de milhar (mil, milhões,
+bilhões) com as mesmas regras de "e"/vírgula do num2words; o resultado é
+idêntico ao de num2words(n, lang='pt_BR'), conferido por verificar()
+(executado em tests/test_extenso.py).
+Fora da faixa (negativos, >= 10^12) cai no próprio num2words.
+"""
+from functools import lru_cache
+
+from num2words import num2words
+
+_UNIDADES = (
+    "zero", "um", "dois", "três", "quatro", "cinco", "seis", "sete", "oito", "nove",
+    "dez", "onze", "doze", "treze", "catorze", "quinze", "dezesseis", "dezessete", "dezoito", "dezenove",
+)
+_DEZENAS = ("", "", "vinte", "trinta", "quarenta", "cinquenta", "sessenta", "setenta", "oitenta", "noventa")
+_CENTENAS = ("", "cento", "duzentos", "trezentos", "quatrocentos", "quinhentos",
+             "seiscentos", "setecentos", "oitocentos", "novecentos")
+
+def _abaixo_de_mil(n):
+    c, r = divmod(n, 100)
+    if r < 20:
+        resto = _UNIDADES[r]
+    else:
+        d, u = divmod(r, 10)
+        resto = _DEZENAS[d] + (f" e {_UNIDADES[u]}" if u else "")
+    if not c:
+        return resto
+    if n == 100:
+        return "cem"
+    return _CENTENAS[c] + (f" e {resto}" if r else "")
+
+_ATE_MIL = tuple(_abaixo_de_mil(n) for n in range(1000))
+
+# (potência, singular, plural), da maior para a menor
+_ESCALAS = (
+    (10 ** 9, "bilhão", "bilhões"),
+    (10 ** 6, "milhão", "milhões"),
+    (10 ** 3, "mil", "mil"),
+)
+_LIMITE = 10 ** 12
+
+def _virgula(grupo, escala, ultimo):
+    """
+    Conector antes de um grupo: o num2words troca "<escala> e" por "<escala>,"
+    quando o grupo começa por centena em "-ento(s)" seguida de mais texto com "e"
+    (dezenas/unidades do grupo, escala com "e" ou grupos seguintes).
+    """
+    if grupo <= 100:
+        return False
+    return grupo % 100 != 0 or not ultimo or 'e' in escala
+
+@lru_cache(maxsize=8192)
+def por_extenso(n):
+    """num2words(n, lang='pt_BR') para inteiros"""
+    n = int(n)
+    if n < 1000:
+        return _ATE_MIL[n] if n >= 0 else num2words(n, lang='pt_BR')
+    if n >= _LIMITE:
+        return num2words(n, lang='pt_BR')
+
+    grupos = []  # (valor do grupo, texto, palavra da escala)
+    for potencia, singular, plural in _ESCALAS:
+        g = n // potencia % 1000
+        if not g:
+            continue
+        if potencia == 1000:
+            grupos.append((g, "mil" if g == 1 else f"{_ATE_MIL[g]} mil", "mil"))
+        else:
+            escala = singular if g == 1 else plural
+            grupos.append((g, f"{_ATE_MIL[g]} {escala}", escala))
+    if n % 1000:
+        grupos.append((n % 1000, _ATE_MIL[n % 1000], ""))
+
+    partes = [grupos[0][1]]
+    for i in range(1, len(grupos)):
+        g, texto, escala = grupos[i]
+        partes.append(", " if _virgula(g, escala, i == len(grupos) - 1) else " e ")
+        partes.append(texto)
+    return "".join(partes)
+
+def _inteiro_e_centesimos(v):
+    v = round(float(v or 0), 2)
+    inteiro = int(v)
+    return inteiro, int(round((v - inteiro) * 100))
+
+def extenso_metros(v):
+    m, cm = _inteiro_e_centesimos(v)
+    partes = []
+    if m > 0:
+        partes.append(por_extenso(m) + (" metro" if m == 1 else " metros"))
+    if cm > 0:
+        partes.append(por_extenso(cm) + (" centímetro" if cm == 1 else " centímetros"))
+    return " e ".join(partes) if partes else "zero metro"
+
+def area_por_extenso(v):
+    m2, cent = _inteiro_e_centesimos(v)
+    if cent == 0:
+        return f"{por_extenso(m2)} metros quadrados"
+    return f"{por_extenso(m2)} metros quadrados e {por_extenso(cent)} centésimos"
+
+def verificar(limite=1_000_000):
+    """
+    Confere por_extenso contra o num2words: todos os inteiros de 0 a limite-1 e
+    as combinações de grupos de milhar típicos até 10^12. Devolve as divergências.
+    """
+    amostra_grupo = (0, 1, 2, 10, 21, 100, 101, 110, 115, 200, 201, 210, 500, 999)
+    valores = list(range(limite))
+    for b in amostra_grupo:
+        for m in amostra_grupo:
+            for k in amostra_grupo:
+                for u in amostra_grupo:
+                    valores.append(((b * 1000 + m) * 1000 + k) * 1000 + u)
+    divergencias = []
+    for n in valores:
+        esperado = num2words(n, lang='pt_BR')
+        obtido = por_extenso.__wrapped__(n)
+        if obtido != esperado:
+            divergencias.append((n, esperado, obtido))
+    return divergencias
+
+if __name__ == "__main__":
+    erros = verificar()
+    for n, esperado, obtido in erros[:20]:
+        print(f"{n}: {esperado!r} != {obtido!r}")
+    print("OK" if not erros else f"{len(erros)} divergências")
+    raise SystemExit(1 if erros else 0)
@@ -0,0 +1,247 @@
+"""
+Fila de tarefas de geração em segundo plano
+O pedido vira uma linha numa base SQLite local e é executado num pool de
+threads do próprio processo web; a requisição HTTP volta na hora com o id da
+tarefa e o navegador consulta estado/progresso até o resultado ficar pronto.
+Sem broker externo. As threads só orquestram: a parte pesada (leitura dos
+uploads, parágrafos de lotes, volumes, artefatos do pacote) vai para os pools
+de processos do memorial_processor, que assim continuam ativos nas tarefas.
+"""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDA = 'concluida'
+ERRO = 'erro'
+
+# Tarefas (e resultados) mais antigas que isso são apagadas
+TTL_PADRAO = int(os.environ.get('MEMORIAL_TAREFAS_TTL', 24 * 3600))
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tarefas (
+    id TEXT PRIMARY KEY,
+    usuario TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    modo TEXT,
+    dados TEXT NOT NULL,
+    arquivos TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    progresso REAL NOT NULL DEFAULT 0,
+    mensagem TEXT,
+    resultado TEXT,
+    erro TEXT,
+    traceback TEXT,
+    dono_pid INTEGER,
+    criada REAL NOT NULL,
+    iniciada REAL,
+    finalizada REAL
+);
+CREATE INDEX IF NOT EXISTS tarefas_criada ON tarefas (criada);
+"""
+
+def _conectar(caminho_db):
+    con = sqlite3.connect(caminho_db, timeout=30, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    con.execute('PRAGMA journal_mode=WAL')
+    con.execute('PRAGMA synchronous=NORMAL')
+    return con
+
+def _atualizar(caminho_db, id_tarefa, **campos):
+    colunas = ', '.join(f"{k} = ?" for k in campos)
+    con = _conectar(caminho_db)
+    try:
+        con.execute(f"UPDATE tarefas SET {colunas} WHERE id = ?", (*campos.values(), id_tarefa))
+    finally:
+        con.close()
+
+def _processo_vivo(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _executar(caminho_db, pasta_resultado, tarefa, funcao):
+    """Executado numa thread do pool: roda funcao e registra o desfecho"""
+    id_tarefa = tarefa['id']
+    _atualizar(caminho_db, id_tarefa, estado=EXECUTANDO, progresso=0.05,
+               mensagem='Iniciando', iniciada=time.time())
+
+    def progresso(fracao, mensagem=None):
+        _atualizar(caminho_db, id_tarefa, progresso=max(0.0, min(float(fracao), 0.99)), mensagem=mensagem)
+
+    try:
+        os.makedirs(pasta_resultado, exist_ok=True)
+        caminho = funcao(tarefa, pasta_resultado, progresso)
+        if not caminho or not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+            raise RuntimeError(f"Arquivo não foi gerado: {caminho}")
+        _atualizar(caminho_db, id_tarefa, estado=CONCLUIDA, progresso=1.0, mensagem='Concluída',
+                   resultado=caminho, finalizada=time.time())
+    except Exception as e:
+        _atualizar(caminho_db, id_tarefa, estado=ERRO, mensagem='Erro', erro=str(e),
+                   traceback=traceback.format_exc(), finalizada=time.time())
+
+class FilaTarefas:
+    """Tarefas em <pasta>/tarefas.sqlite3; resultados em <pasta>/resultados/<id>/"""
+
+    def __init__(self, pasta, funcao, threads=None, ttl=TTL_PADRAO, intervalo_limpeza=600):
+        # funcao(tarefa, pasta_resultado, progresso) -> caminho do arquivo gerado
+        self.pasta = os.path.abspath(pasta)
+        self.caminho_db = os.path.join(self.pasta, 'tarefas.sqlite3')
+        self.funcao = funcao
+        self.threads = threads or int(os.environ.get('MEMORIAL_THREADS_TAREFAS', 0)) or 4
+        self.ttl = ttl
+        self.intervalo_limpeza = intervalo_limpeza
+        self._ultima_limpeza = 0.0
+        self._pool = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.pasta, 'resultados'), exist_ok=True)
+        con = _conectar(self.caminho_db)
+        try:
+            con.executescript(_ESQUEMA)
+        finally:
+            con.close()
+        self._marcar_interrompidas()
+
+    def _pasta_resultado(self, id_tarefa):
+        return os.path.join(self.pasta, 'resultados', id_tarefa)
+
+    def _obter_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='tarefa')
+            return self._pool
+
+    def _descartar_pool(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _marcar_interrompidas(self):
+        """Tarefas de um processo web que não existe mais nunca vão terminar"""
+        con = _conectar(self.caminho_db)
+        try:
+            linhas = con.execute("SELECT id, dono_pid FROM tarefas WHERE estado IN (?, ?)",
+                                 (PENDENTE, EXECUTANDO)).fetchall()
+            for linha in linhas:
+                if not _processo_vivo(linha['dono_pid']):
+                    con.execute("UPDATE tarefas SET estado = ?, erro = ?, finalizada = ? WHERE id = ?",
+                                (ERRO, 'Tarefa interrompida (servidor reiniciado)', time.time(), linha['id']))
+        finally:
+            con.close()
+
+    def enviar(self, usuario, tipo, modo, dados, arquivos):
+        """Registra a tarefa, agenda no pool e devolve o id"""
+        self.limpar()
+        tarefa = {
+            'id': uuid.uuid4().hex,
+            'usuario': usuario,
+            'tipo': tipo,
+            'modo': modo,
+            'dados': dados,
+            'arquivos': arquivos or {},
+        }
+        con = _conectar(self.caminho_db)
+        try:
+            con.execute(
+                "INSERT INTO tarefas (id, usuario, tipo, modo, dados, arquivos, estado, mensagem, dono_pid, criada) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (tarefa['id'], usuario, tipo, modo, json.dumps(dados), json.dumps(tarefa['arquivos']),
+                 PENDENTE, 'Na fila', os.getpid(), time.time()))
+        finally:
+            con.close()
+        args = (self.caminho_db, self._pasta_resultado(tarefa['id']), tarefa, self.funcao)
+        try:
+            futuro = self._obter_pool().submit(_executar, *args)
+        except RuntimeError:
+            self._descartar_pool()
+            futuro = self._obter_pool().submit(_executar, *args)
+        futuro.add_done_callback(lambda f, i=tarefa['id']: self._ao_terminar(i, f))
+        return tarefa['id']
+
+    def registrar_concluida(self, usuario, tipo, modo, dados, arquivos, caminho):
+        """
+        Tarefa já resolvida (ex.: resultado vindo do cache de artefatos). O arquivo
+        ganha um hard link (ou cópia) em resultados/<id>/: o cache pode despejar o
+        original antes de o usuário baixar. None se caminho já não existe.
+        """
+        id_tarefa = uuid.uuid4().hex
+        pasta = self._pasta_resultado(id_tarefa)
+        destino = os.path.join(pasta, os.path.basename(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        try:
+            os.link(caminho, destino)
+        except OSError as e:
+            try:
+                if isinstance(e, FileNotFoundError):
+                    raise
+                shutil.copyfile(caminho, destino)  # outro sistema de arquivos, sem links
+            except OSError:
+                shutil.rmtree(pasta, ignore_errors=True)
+                return None
+        caminho = destino
+        agora = time.time()
+        con = _conectar(self.caminho_db)
+        try:
+            con.execute(
+                "INSERT INTO tarefas (id, usuario, tipo, modo, dados, arquivos, estado, progresso, mensagem, "
+                "resultado, dono_pid, criada, iniciada, finalizada) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (id_tarefa, usuario, tipo, modo, json.dumps(dados), json.dumps(arquivos or {}),
+                 CONCLUIDA, 1.0, 'Concluída (cache)', caminho, os.getpid(), agora, agora, agora))
+        finally:
+            con.close()
+        return id_tarefa
+
+    def _ao_terminar(self, id_tarefa, futuro):
+        """Falhas do próprio pool (cancelamento); erros da geração já foram gravados"""
+        erro = 'Tarefa cancelada' if futuro.cancelled() else futuro.exception()
+        if erro is None:
+            return
+        _atualizar(self.caminho_db, id_tarefa, estado=ERRO, mensagem='Erro',
+                   erro=str(erro) or 'Falha na geração', finalizada=time.time())
+
+    def consultar(self, id_tarefa, usuario=None):
+        """Estado da tarefa (dict) ou None; com usuario, só as tarefas dele"""
+        con = _conectar(self.caminho_db)
+        try:
+            linha = con.execute("SELECT * FROM tarefas WHERE id = ?", (str(id_tarefa),)).fetchone()
+        finally:
+            con.close()
+        if linha is None or (usuario is not None and linha['usuario'] != usuario):
+            return None
+        tarefa = dict(linha)
+        tarefa['dados'] = json.loads(tarefa['dados'])
+        tarefa['arquivos'] = json.loads(tarefa['arquivos'])
+        return tarefa
+
+    def limpar(self, forcar=False):
+        """Apaga tarefas finalizadas há mais de ttl segundos e seus resultados"""
+        agora = time.time()
+        with self._lock:
+            if not forcar and agora - self._ultima_limpeza < self.intervalo_limpeza:
+                return 0
+            self._ultima_limpeza = agora
+        con = _conectar(self.caminho_db)
+        try:
+            ids = [l['id'] for l in con.execute(
+                "SELECT id FROM tarefas WHERE estado IN (?, ?) AND criada < ?",
+                (CONCLUIDA, ERRO, agora - self.ttl))]
+            con.executemany("DELETE FROM tarefas WHERE id = ?", [(i,) for i in ids])
+        finally:
+            con.close()
+        for i in ids:
+            shutil.rmtree(self._pasta_resultado(i), ignore_errors=True)
+        return len(ids)
@@ -17,7 +17,7 @@ fi
 
 echo "Usando: $PIP_CMD"
 
-$PIP_CMD install Flask==3.0.0 python-docx==1.1.0 beautifulsoup4==4.12.2 lxml==4.9.3 num2words==0.5.13 pandas==2.1.3 openpyxl==3.1.2 pyproj==3.6.1 Werkzeug==3.0.1
+$PIP_CMD install Flask==3.0.0 python-docx==1.1.0 Pillow==10.1.0 beautifulsoup4==4.12.2 lxml==4.9.3 num2words==0.5.13 pandas==2.1.3 openpyxl==3.1.2 pyproj==3.6.1 numpy==1.26.4 Werkzeug==3.0.1
 
 if [ $? -eq 0 ]; then
     echo "✅ Dependências instaladas com sucesso!"
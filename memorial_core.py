@@ -274,24 +274,9 @@ def _utm_mc_from_zone(zone_num):
     mc = 6*zone_num - 183
     return abs(int(mc))
 
-def _sirgas_utm_crs(zone_num: int, hemi: str) -> CRS:
-    hemi = (hemi or 'S').upper()
-    if hemi == 'S' and 18 <= int(zone_num) <= 25:
-        return CRS.from_epsg(31960 + int(zone_num))
-    south_flag = '+south ' if hemi == 'S' else ''
-    proj4 = f"+proj=utm +zone={int(zone_num)} {south_flag}+datum=SIRGAS2000 +type=crs"
-    return CRS.from_proj4(proj4)
-
-def utm_to_latlon(E, N, zone_num, hemi='S'):
-    try:
-        E = to_float_any(E); N = to_float_any(N)
-    except Exception:
-        E = float(E); N = float(N)
-    crs_utm = _sirgas_utm_crs(int(zone_num), hemi)
-    crs_geo = CRS.from_epsg(4674)
-    tr = Transformer.from_crs(crs_utm, crs_geo, always_xy=True)
-    lon, lat = tr.transform(E, N)
-    return lat, lon
+# Conversões usam o registro de transformadores do processo (memorial_processor),
+# em vez de montar CRS/Transformer a cada vértice.
+from memorial_processor import _sirgas_utm_crs, utm_to_latlon
 
 def fmt_latlon_decimal(lat, lon):
     return f"Lat. {lat:.6f}°, Long. {lon:.6f}°"
@@ -1625,75 +1610,8 @@ def _fmt_coord_dms(val):
 def _dms_str(az):
     return azimuth_to_dms_int(az) if az is not None else ""
 
-def _propaga_vertices(first_point: dict, segments: list,
-                      coord_fmt_str: str = 'utm',
-                      zone_num: int = 22,
-                      hemi: str = 'S'):
-    """
-    Propaga os vértices a partir do primeiro ponto e da lista de segmentos,
-    retornando linhas com:
-      DE, PARA, COORD_1, COORD_2, AZIMUTE, DISTANCIA (m), RAIO (m), CONFRONTANTE
-    - coord_fmt_str: 'utm', 'dec' ou 'dms'
-    """
-    if not first_point or not segments:
-        return []
-
-    x = float(first_point["X"])
-    y = float(first_point["Y"])
-    p_idx = 1
-    rows = []
-
-    for seg in segments:
-        az = float(seg.get("azimuth") or 0.0)
-        rad = math.radians(az)
-
-        if seg.get("type") == "line":
-            L = float(seg.get("length_m") or 0.0)
-            dx = math.sin(rad) * L
-            dy = math.cos(rad) * L
-            x2, y2 = x + dx, y + dy
-            dist = round(L, 2)
-            raio = None
-        else:
-            arc = float(seg.get("curve_len_m") or 0.0)
-            R_ = float(seg.get("radius_m") or 0.0)
-            theta = (arc / R_) if R_ > 0 else 0.0
-            chord = 2.0 * R_ * math.sin(theta / 2.0)
-            dx = math.sin(rad) * chord
-            dy = math.cos(rad) * chord
-            x2, y2 = x + dx, y + dy
-            dist = round(arc, 2)
-            raio = round(R_, 2) if R_ else None
-
-        # Define COORD_1 / COORD_2 conforme o formato
-        if coord_fmt_str == 'utm':
-            # Mantém UTM (X = Leste, Y = Norte)
-            c1 = _fmt_br(x2, 2)
-            c2 = _fmt_br(y2, 2)
-        else:
-            lat, lon = utm_to_latlon(x2, y2, zone_num, hemi)
-            if coord_fmt_str == 'dec':
-                c1 = _fmt_coord_dec(lon)  # LONG
-                c2 = _fmt_coord_dec(lat)  # LAT
-            else:  # 'dms'
-                c1 = _fmt_coord_dms(lon)
-                c2 = _fmt_coord_dms(lat)
-
-        rows.append({
-            "DE": f"P{p_idx}",
-            "PARA": f"P{p_idx + 1}",
-            "COORD_1": c1,
-            "COORD_2": c2,
-            "AZIMUTE": _dms_str(az),
-            "DISTANCIA (m)": dist,
-            "RAIO (m)": raio,
-            "CONFRONTANTE": ""
-        })
-
-        x, y = x2, y2
-        p_idx += 1
-
-    return rows
+# Propagação de vértices: motor em lote do memorial_processor (mesmos resultados)
+from memorial_processor import _propaga_vertices, propagar_vertices_lote
 
 def _limpa_prefixo_area(nome):
     return re.sub(r'^ÁREA\s*\d+\s*:\s*', '', str(nome or ''), flags=re.IGNORECASE)
@@ -1711,16 +1629,20 @@ def _monta_planilha_areas(unif_item, desm_items):
     idx_area = 1
     zone_num, hemi = _auto_zone_from_city(cidade_emp.value or '')
 
-    def _add_area(bloco_nome, bloco_item):
+    blocos = ([(unif_item.get("name") or "UNIFICAÇÃO", unif_item)] if unif_item else []) + list(desm_items or [])
+    # todas as áreas propagadas numa chamada só
+    tabela = propagar_vertices_lote(
+        [(it.get("first_point"), it.get("segments", [])) for _, it in blocos],
+        coord_fmt_str=coord_fmt.value, zone_num=zone_num, hemi=hemi
+    )
+
+    def _add_area(pos, bloco_nome, bloco_item):
         nonlocal idx_area
         area_m2 = float(bloco_item.get("area_m2") or 0.0)
         base = _limpa_prefixo_area(bloco_nome)
         titulo = f"ÁREA {idx_area}: { _normalize(base) } (ÁREA: { _fmt_br(area_m2,2) }m²)"
         linhas.append({c: "" for c in colunas}); linhas[-1]["DE"] = titulo
-        for r in _propaga_vertices(
-            bloco_item.get("first_point"), bloco_item.get("segments", []),
-            coord_fmt_str=coord_fmt.value, zone_num=zone_num, hemi=hemi
-        ):
+        for r in tabela.linhas(pos):
             linhas.append({
                 "DE": r["DE"], "PARA": r["PARA"],
                 c1: r["COORD_1"], c2: r["COORD_2"],
@@ -1730,8 +1652,7 @@ def _monta_planilha_areas(unif_item, desm_items):
         idx_area += 1
         linhas.append({c: "" for c in colunas})
 
-    if unif_item: _add_area(unif_item.get("name") or "UNIFICAÇÃO", unif_item)
-    for nm, it in desm_items or []: _add_area(nm, it)
+    for pos, (nm, it) in enumerate(blocos): _add_area(pos, nm, it)
     return pd.DataFrame(linhas, columns=colunas)
 
 def _collect_items_unif_desm():
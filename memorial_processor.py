@@ -5,59 +5,84 @@ Adaptado do script Xuxu.py para uso em aplicação web
 import re
 import os
 import io
-import math
+import codecs
+import mmap
+import hashlib
+import multiprocessing
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as PrazoEsgotado
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from bs4 import BeautifulSoup
+from lxml import etree
 from docx import Document
-from docx.shared import Pt, RGBColor, Inches, Cm
+from docx.shared import Pt, RGBColor, Inches, Cm, Emu
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT, WD_COLOR_INDEX, WD_LINE_SPACING
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
-from num2words import num2words
+import numpy as np
 import pandas as pd
 from pyproj import CRS, Transformer
 
+from ativos_marca import ArmazemMarca
+from extenso import extenso_metros, area_por_extenso
+
 # ===================== Configuração de imagens =====================
 # Por padrão, usar imagens locais ou placeholder
 CAMINHO_MARCA_DAGUA = "static/images/marca_dagua.png"
 CAMINHO_LOGO_CABECALHO = "static/images/logo_cabecalho.png"
 CAMINHO_LOGO_RODAPE = "static/images/logo_rodape.png"
 
+# Versões otimizadas das imagens (os caminhos acima são só o padrão inicial)
+ARMAZEM_MARCA = ArmazemMarca(
+    os.environ.get('MEMORIAL_MARCA_DIR', 'static/images/marca'),
+    padroes={
+        'logo_cabecalho': CAMINHO_LOGO_CABECALHO,
+        'logo_rodape': CAMINHO_LOGO_RODAPE,
+        'marca_dagua': CAMINHO_MARCA_DAGUA,
+    },
+)
+
 # ===================== Utilidades numéricas / texto =====================
+_TROCA_BR = str.maketrans(",.", ".,")
+
 def _fmt_br(v, casas=2):
     try:
-        return f"{float(v):,.{casas}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        return f"{float(v):,.{casas}f}".translate(_TROCA_BR)
     except:
         return str(v)
 
 def _to_float_br(txt):
     return float(str(txt).replace('.', '').replace(',', '.'))
 
-def converter_para_float_qualquer(s):
+def _float_br_us(s):
+    """Número em formato BR (1.234,56) ou US (1,234.56): o separador mais à direita é o decimal"""
+    try:
+        return float(s)
+    except (TypeError, ValueError):
+        pass
     s = str(s).strip()
-    if ',' in s and '.' in s:
+    virg, pto = s.rfind(','), s.rfind('.')
+    if virg > pto:
+        if s.count(',') > 1:          # 1,234,567
+            return float(s.replace(',', ''))
         return float(s.replace('.', '').replace(',', '.'))
-    if ',' in s:
-        return float(s.replace(',', '.'))
-    return float(s)
+    if virg < 0 and s.count('.') > 1:  # 1.234.567
+        return float(s.replace('.', ''))
+    return float(s.replace(',', ''))
 
-def extenso_metros(v):
-    v = round(float(v or 0), 2)
-    m = int(v); cm = int(round((v - m) * 100))
-    partes = []
-    if m > 0:
-        partes.append(num2words(m, lang='pt_BR') + (" metro" if m==1 else " metros"))
-    if cm > 0:
-        partes.append(num2words(cm, lang='pt_BR') + (" centímetro" if cm==1 else " centímetros"))
-    return " e ".join(partes) if partes else "zero metro"
-
-def area_por_extenso(v):
-    v = round(float(v or 0), 2)
-    m2 = int(v); cent = int(round((v - m2) * 100))
-    if cent == 0:
-        return f"{num2words(m2, lang='pt_BR')} metros quadrados"
-    return f"{num2words(m2, lang='pt_BR')} metros quadrados e {num2words(cent, lang='pt_BR')} centésimos"
+def converter_para_float_qualquer(s):
+    return _float_br_us(s)
 
 def hectares_from_m2(v):
     return float(v) / 10000.0
@@ -119,6 +144,7 @@ def _zone_str_to_num_hemi(zstr):
         return (22, 'S')
     return (int(m.group(1)), m.group(2))
 
+@lru_cache(maxsize=256)
 def _auto_zone_from_city(cidade_field: str):
     uf = _parse_uf(cidade_field) or ''
     zstr = _UF_FUSO_DEFAULT.get(uf, '22S')
@@ -130,22 +156,84 @@ def _utm_mc_from_zone(zone_num):
     mc = 6*zone_num - 183
     return abs(int(mc))
 
-def _sirgas_utm_crs(zone_num: int, hemi: str) -> CRS:
-    hemi = (hemi or 'S').upper()
-    if hemi == 'S' and 18 <= int(zone_num) <= 25:
-        return CRS.from_epsg(31960 + int(zone_num))
+# ===================== Registro de transformadores (pyproj) =====================
+# Montar CRS + Transformer custa milissegundos; antes isso acontecia a cada
+# vértice convertido. O registro guarda um Transformer por (fuso, hemisfério,
+# datum de destino) para o processo inteiro. Objetos do pyproj >= 3.1 podem ser
+# compartilhados entre threads; o lock protege apenas a criação e os contadores.
+_DATUM_GEO_EPSG = {'SIRGAS2000': 4674, 'WGS84': 4326}
+
+class _RegistroTransformadores:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._crs_utm = {}
+        self._transformadores = {}
+        self.hits = 0
+        self.misses = 0
+
+    def crs_utm(self, zone_num, hemi):
+        chave = (int(zone_num), (hemi or 'S').upper())
+        with self._lock:
+            crs = self._crs_utm.get(chave)
+            if crs is None:
+                crs = self._crs_utm[chave] = _novo_crs_sirgas_utm(*chave)
+            return crs
+
+    def obter(self, zone_num, hemi='S', datum='SIRGAS2000'):
+        chave = (int(zone_num), (hemi or 'S').upper(), datum)
+        with self._lock:
+            tr = self._transformadores.get(chave)
+            if tr is not None:
+                self.hits += 1
+                return tr
+            self.misses += 1
+            crs_geo = CRS.from_epsg(_DATUM_GEO_EPSG[datum])
+            tr = Transformer.from_crs(self.crs_utm(chave[0], chave[1]), crs_geo, always_xy=True)
+            self._transformadores[chave] = tr
+            return tr
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'transformadores': len(self._transformadores),
+            }
+
+def _novo_crs_sirgas_utm(zone_num, hemi):
+    if hemi == 'S' and 18 <= zone_num <= 25:
+        return CRS.from_epsg(31960 + zone_num)
+    if hemi == 'N' and 11 <= zone_num <= 22:
+        return CRS.from_epsg(31954 + zone_num)
+    # PROJ não reconhece "+datum=SIRGAS2000"; SIRGAS 2000 usa o elipsoide GRS80
     south_flag = '+south ' if hemi == 'S' else ''
-    proj4 = f"+proj=utm +zone={int(zone_num)} {south_flag}+datum=SIRGAS2000 +type=crs"
+    proj4 = f"+proj=utm +zone={zone_num} {south_flag}+ellps=GRS80 +towgs84=0,0,0,0,0,0,0 +units=m +type=crs"
     return CRS.from_proj4(proj4)
 
+_REGISTRO_TRANSFORMADORES = _RegistroTransformadores()
+
+def obter_transformador(zone_num, hemi='S', datum='SIRGAS2000'):
+    return _REGISTRO_TRANSFORMADORES.obter(zone_num, hemi, datum)
+
+def aquecer_transformadores(zonas=None):
+    """Pré-constrói os transformadores (padrão: todos os fusos de _UF_FUSO_DEFAULT)"""
+    if zonas is None:
+        zonas = sorted({_zone_str_to_num_hemi(z) for z in _UF_FUSO_DEFAULT.values()})
+    for zone_num, hemi in zonas:
+        obter_transformador(zone_num, hemi)
+
+def estatisticas_transformadores():
+    return _REGISTRO_TRANSFORMADORES.estatisticas()
+
+def _sirgas_utm_crs(zone_num: int, hemi: str) -> CRS:
+    return _REGISTRO_TRANSFORMADORES.crs_utm(zone_num, hemi)
+
 def utm_to_latlon(E, N, zone_num, hemi='S'):
     try:
         E = converter_para_float_qualquer(E); N = converter_para_float_qualquer(N)
     except Exception:
         E = float(E); N = float(N)
-    crs_utm = _sirgas_utm_crs(int(zone_num), hemi)
-    crs_geo = CRS.from_epsg(4674)
-    tr = Transformer.from_crs(crs_utm, crs_geo, always_xy=True)
+    tr = obter_transformador(int(zone_num), hemi)
     lon, lat = tr.transform(E, N)
     return lat, lon
 
@@ -170,21 +258,130 @@ def fmt_latlon_dms(lat, lon):
         return f"{prefix}{d}°{m:02d}'{s_txt}\""
     return f"Lat. {_mk(sgn_lat, dlat, mlat, slat)}, Long. {_mk(sgn_lon, dlon, mlon, slon)}"
 
+# ===================== Conversão / formatação em lote (NumPy) =====================
+# Uma chamada ao pyproj para todos os pontos de uma parcela (ou do projeto
+# inteiro). A formatação também é vetorizada: os dígitos saem de aritmética
+# inteira numa matriz de bytes (uma linha por ponto, NUL nas posições não
+# usadas) que é decodificada de uma vez. O resultado é idêntico, caractere a
+# caractere, ao das versões escalares (_fmt_coord_dec, fmt_latlon_dms, ...).
+def utm_para_geo_lote(E, N, zone_num, hemi='S'):
+    """Converte arrays de E/N (UTM SIRGAS 2000) em arrays (lat, lon)"""
+    E = np.asarray(E, dtype=np.float64)
+    N = np.asarray(N, dtype=np.float64)
+    if E.size == 0:
+        return np.empty(0), np.empty(0)
+    lon, lat = obter_transformador(int(zone_num), hemi).transform(E, N)
+    return np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+
+def _inteiros_arredondados(a, casas):
+    """round(a * 10**casas) exatamente como '%.{casas}f' (a >= 0, finito)"""
+    p = a * (10 ** casas)
+    # perto de ...,5 (ou com p grande demais para a margem) o erro do produto
+    # pode decidir o arredondamento: usa o formatador do Python nesses casos
+    duvida = (np.abs(p - np.floor(p) - 0.5) < 1e-6) | (p >= 2.0 ** 31)
+    n = np.where(duvida, 0.0, np.floor(p + 0.5)).astype(np.int64)
+    if duvida.any():
+        idx = np.flatnonzero(duvida)
+        n[idx] = [int(('%.*f' % (casas, v)).replace('.', '')) for v in a[idx].tolist()]
+    return n
+
+def _col_digitos(n, minimo=1):
+    """Dígitos de n (int64 >= 0) alinhados à direita; zeros à esquerda além de `minimo` viram NUL"""
+    maior = int(n.max()) if n.size else 0
+    largura = max(minimo, len(str(maior)))
+    pot = 10 ** np.arange(largura - 1, -1, -1, dtype=np.int64)
+    out = ((n[:, None] // pot) % 10 + 48).astype(np.uint8)
+    out[(n[:, None] < pot) & (np.arange(largura) < largura - minimo)] = 0
+    return out
+
+def _col_sinal(neg):
+    return np.where(neg, ord('-'), 0).astype(np.uint8)[:, None]
+
+def _col_fixo(v, casas, min_int=1, sep='.'):
+    """Colunas equivalentes a '%0{w}.{casas}f' % v (sinal pelo bit de sinal, como o Python)"""
+    n = _inteiros_arredondados(np.abs(v), casas)
+    esc = 10 ** casas
+    return [_col_sinal(np.signbit(v)), _col_digitos(n // esc, min_int), sep,
+            _col_digitos(n % esc, casas)]
+
+def _txt_lote(n, *colunas):
+    """Junta colunas (matrizes uint8 ou textos constantes) em uma lista de n strings"""
+    mats = []
+    for c in colunas:
+        if isinstance(c, str):
+            c = np.tile(np.frombuffer(c.encode('utf-8'), dtype=np.uint8), (n, 1))
+        mats.append(c)
+    mats.append(np.full((n, 1), ord('\n'), dtype=np.uint8))
+    txt = np.concatenate(mats, axis=1).tobytes().decode('utf-8')
+    return txt.replace('\x00', '').split('\n')[:-1]
+
+def _col_milhar(dig, sep):
+    """Insere o separador de milhar nas colunas de dígitos (NUL à esquerda do número)"""
+    largura = dig.shape[1]
+    partes = []
+    for j in range(largura):
+        partes.append(dig[:, j:j + 1])
+        if j < largura - 1 and (largura - j - 1) % 3 == 0:
+            partes.append(np.where(dig[:, j:j + 1] != 0, ord(sep), 0).astype(np.uint8))
+    return np.concatenate(partes, axis=1)
+
+def _fmt_br_lote(vals, casas=2):
+    """Versão em lote de _fmt_br (valores numéricos)"""
+    v = np.asarray(vals, dtype=np.float64)
+    if not _representaveis(v):
+        return [_fmt_br(x, casas) for x in v.tolist()]
+    n = _inteiros_arredondados(np.abs(v), casas)
+    esc = 10 ** casas
+    cols = [_col_sinal(np.signbit(v)), _col_milhar(_col_digitos(n // esc), '.')]
+    if casas:
+        cols += [',', _col_digitos(n % esc, casas)]
+    return _txt_lote(v.size, *cols)
+
+def _cols_dms(v, sec_fmt):
+    """Colunas de graus/minutos/segundos; sec_fmt 'latlon' (_dms_parts) ou 'vertice' (_fmt_coord_dms)"""
+    a = np.abs(v)
+    d = np.trunc(a)
+    if sec_fmt == 'latlon':
+        m_float = (a - d) * 60
+        m = np.trunc(m_float)
+        s = (m_float - m) * 60
+        seg = _col_fixo(s, 3, min_int=2, sep=',')
+    else:
+        m = np.trunc((a - d) * 60)
+        s = (a - d - m / 60) * 3600
+        seg = _col_fixo(s, 3, sep=',')
+    return [_col_sinal(v < 0), _col_digitos(d.astype(np.int64)), '°',
+            _col_digitos(m.astype(np.int64), 2), "'"] + seg + ['"']
+
+def _representaveis(*arrs):
+    """Valores que cabem no formatador em lote (finitos, |v| < 1e12)"""
+    return all((np.abs(a) < 1e12).all() for a in arrs)
+
+def fmt_latlon_decimal_lote(lat, lon):
+    """Versão em lote de fmt_latlon_decimal"""
+    lat = np.asarray(lat, dtype=np.float64); lon = np.asarray(lon, dtype=np.float64)
+    if not _representaveis(lat, lon):
+        return [fmt_latlon_decimal(a, b) for a, b in zip(lat.tolist(), lon.tolist())]
+    return _txt_lote(lat.size, "Lat. ", *_col_fixo(lat, 6), "°, Long. ", *_col_fixo(lon, 6), "°")
+
+def fmt_latlon_dms_lote(lat, lon):
+    """Versão em lote de fmt_latlon_dms"""
+    lat = np.asarray(lat, dtype=np.float64); lon = np.asarray(lon, dtype=np.float64)
+    if not _representaveis(lat, lon):
+        return [fmt_latlon_dms(a, b) for a, b in zip(lat.tolist(), lon.tolist())]
+    return _txt_lote(lat.size, "Lat. ", *_cols_dms(lat, 'latlon'),
+                     ", Long. ", *_cols_dms(lon, 'latlon'))
+
 # ===================== Azimutes / direção cardinal =====================
-def bearing_to_azimuth(b):
-    if not b or not isinstance(b, str):
-        return None
-    s = b.strip().upper().replace('–','-').replace('°','-').replace("'",'-').replace('"','')
-    s = re.sub(r'\s+', ' ', s)
-    m = re.match(r'([NS])\s*([0-9]+)-([0-9]+)-([0-9]+(?:\.[0-9]+)?)\s*([EW])', s)
-    if not m:
-        m2 = re.search(r'(\d+)[^\d]+(\d+)[^\d]+(\d+(?:\.\d+)?)', s)
-        if m2:
-            d, mi, se = map(float, m2.groups()); return d + mi/60 + se/3600
-        return None
-    ns, d, mi, se, ew = m.groups()
-    d, mi, se = float(d), float(mi), float(se)
-    theta = d + mi/60 + se/3600
+_ESPACOS = re.compile(r'\s+')
+_RUMO_RE = re.compile(r'([NS])\s*([0-9]+)-([0-9]+)-([0-9]+(?:\.[0-9]+)?)\s*([EW])')
+_RUMO_GMS_RE = re.compile(r'(\d+)[^\d]+(\d+)[^\d]+(\d+(?:\.\d+)?)')
+
+# Forma já normalizada dos relatórios (ex.: "S 80-24-03.58 W"): dispensa a limpeza
+_RUMO_LIMPO = re.compile(r'([NS]) ?([0-9]+)-([0-9]+)-([0-9]+(?:\.[0-9]+)?) ?([EW])\Z')
+
+def _azimute_quadrante(ns, d, mi, se, ew):
+    theta = float(d) + float(mi)/60 + float(se)/3600
     if ns=='N' and ew=='E':
         az = theta
     elif ns=='S' and ew=='E':
@@ -199,6 +396,22 @@ def bearing_to_azimuth(b):
     if az >= 360: az -= 360
     return az
 
+def bearing_to_azimuth(b):
+    if not b or not isinstance(b, str):
+        return None
+    m = _RUMO_LIMPO.match(b)
+    if m:
+        return _azimute_quadrante(*m.groups())
+    s = b.strip().upper().replace('–','-').replace('°','-').replace("'",'-').replace('"','')
+    s = _ESPACOS.sub(' ', s)
+    m = _RUMO_RE.match(s)
+    if not m:
+        m2 = _RUMO_GMS_RE.search(s)
+        if m2:
+            d, mi, se = map(float, m2.groups()); return d + mi/60 + se/3600
+        return None
+    return _azimute_quadrante(*m.groups())
+
 def azimuth_to_dms_int(az):
     if az is None:
         return ""
@@ -208,6 +421,23 @@ def azimuth_to_dms_int(az):
     if m >= 60: m -= 60; d += 1
     return f"{d}°{m:02d}'{s:02d}\""
 
+def azimute_dms_lote(az):
+    """Versão em lote de azimuth_to_dms_int"""
+    az = np.asarray(az, dtype=np.float64)
+    if not _representaveis(az):
+        return [azimuth_to_dms_int(a) for a in az.tolist()]
+    az = np.mod(az, 360.0)
+    d = np.trunc(az)
+    m = np.trunc((az - d) * 60)
+    sec = np.round((az - d - m / 60) * 3600)
+    vai = sec >= 60
+    sec[vai] -= 60; m[vai] += 1
+    vai = m >= 60
+    m[vai] -= 60; d[vai] += 1
+    return _txt_lote(az.size, _col_digitos(d.astype(np.int64)), '°',
+                     _col_digitos(m.astype(np.int64), 2), "'",
+                     _col_digitos(sec.astype(np.int64), 2), '"')
+
 def azimuth_to_card8(az):
     if az is None:
         return "XXXX"
@@ -272,52 +502,374 @@ def is_unificacao_item_name(nm: str) -> bool:
     return bool(_UNIF_NAME_PAT.search(str(nm or "")))
 
 # ===================== Parsers =====================
+# Relatório TXT (Carlson/Civil): um único regex ancorado em início de linha
+# percorre o texto uma vez e uma máquina de estados monta as parcelas, com
+# retas e curvas na ordem do arquivo. Os campos de um segmento podem estar na
+# mesma linha ou em linhas seguidas (Course:/Length: da reta, Length:/Radius:
+# da curva, Point of Beginning:/North:/East:); o que não sai inteiro num token
+# fica pendente até o último campo chegar. "Area:" vale em qualquer ponto da
+# linha e é buscada à parte. O texto é lido em blocos cortados no início de
+# uma linha "Name:", então arquivos grandes (ou mmap) não precisam ser
+# decodificados inteiros e uma parcela não se divide entre blocos.
+_NUM_TXT = r'[\d\.,]+'
+_RUMO_TXT = r'[NS][^\n]*?[EW]'
+_TXT_TOKENS = re.compile(
+    r'\n[ \t]*(?:'
+    r'(?-i:Name:)[ \t]*(?P<nome>\d+)[ \t]*(?=\n|\Z)'
+    r'|Segment[ \t]*#[ \t]*\d+[ \t]*:?[ \t]*(?:'
+    r'(?P<linha>Line\s*Course:[ \t]*(?P<rumo_linha>' + _RUMO_TXT + r')\s*Length:\s*(?P<comp_linha>' + _NUM_TXT + r')m)'
+    r'|(?P<curva>Curve\s*Length:\s*(?P<comp_curva>' + _NUM_TXT + r')m\s*Radius:\s*(?P<raio_curva>' + _NUM_TXT + r')m)'
+    r'|(?P<segmento>Line|Curve)\b)'
+    r'|(?P<reta>Course:[ \t]*(?P<rumo_reta>' + _RUMO_TXT + r')\s*Length:\s*(?P<comp_reta>' + _NUM_TXT + r')m)'
+    r'|(?P<arco>Length:\s*(?P<comp_arco>' + _NUM_TXT + r')m\s*Radius:\s*(?P<raio_arco>' + _NUM_TXT + r')m)'
+    r'|(?:Chord:[^\n]*?)?Course:[ \t]*(?P<rumo>' + _RUMO_TXT + r')'
+    r'|Length:[ \t]*(?P<comp>' + _NUM_TXT + r')m'
+    r'|Radius:[ \t]*(?P<raio>' + _NUM_TXT + r')m'
+    r'|(?P<inicio>Point of Beginning[ \t]*:'
+    r'(?:\s*North:\s*(?P<norte>' + _NUM_TXT + r')m\s*East:\s*(?P<leste>' + _NUM_TXT + r')m)?)'
+    r')',
+    re.I)
+# buscada no texto em minúsculas: sem re.I o regex pula direto para cada "area:"
+_TXT_AREA = re.compile(r'area:[ \t]*(?:(?P<area>' + _NUM_TXT + r')[ \t]*sq\.m)?')
+# token -> campos do segmento pendente que ele preenche
+_CAMPOS_TXT = {
+    'reta': (('rumo', 'rumo_reta'), ('comp', 'comp_reta')),
+    'arco': (('comp', 'comp_arco'), ('raio', 'raio_arco')),
+    'rumo': (('rumo', 'rumo'),),
+    'comp': (('comp', 'comp'),),
+    'raio': (('raio', 'raio'),),
+}
+_BLOCO_TXT = 1 << 22
+
+def _corte_de_bloco(buf, ini, fim):
+    """Fim do bloco buf[ini:fim]: início da última linha "Name:", senão o último '\n'"""
+    pos = buf.rfind(b'Name:', ini, fim)
+    if pos > ini:
+        nl = buf.rfind(b'\n', ini, pos)
+        if nl >= ini:
+            return nl + 1
+    nl = buf.rfind(b'\n', ini, fim)
+    return nl + 1 if nl >= ini else -1
+
+def _blocos_de_linhas(fonte, tamanho=_BLOCO_TXT):
+    """Blocos de texto (parcelas inteiras) de bytes/mmap/arquivo binário"""
+    if isinstance(fonte, (bytes, bytearray, memoryview)) or hasattr(fonte, 'rfind'):
+        buf = fonte if not isinstance(fonte, memoryview) else fonte.tobytes()
+        ini, n = 0, len(buf)
+        while ini < n:
+            fim = min(ini + tamanho, n)
+            if fim < n:
+                corte = _corte_de_bloco(buf, ini, fim)
+                fim = corte if corte > ini else fim
+            yield bytes(buf[ini:fim]).decode('utf-8', errors='ignore').replace('\r', '')
+            ini = fim
+        return
+    resto = b''
+    while True:
+        bloco = fonte.read(tamanho)
+        if not bloco:
+            break
+        bloco = resto + bloco
+        corte = _corte_de_bloco(bloco, 0, len(bloco))
+        if corte <= 0:
+            resto = bloco
+            continue
+        resto = bloco[corte:]
+        yield bloco[:corte].decode('utf-8', errors='ignore').replace('\r', '')
+    if resto:
+        yield resto.decode('utf-8', errors='ignore').replace('\r', '')
+
+def _conferir_parcela_txt(atual, seg, viu_area):
+    """Segmento ou área que ficou pela metade vira erro, não perda silenciosa"""
+    lote = atual["num"]
+    if seg is not None:
+        faltam = [rot for rot, campo in (('Course', 'rumo'), ('Length', 'comp'), ('Radius', 'raio'))
+                  if seg[campo] is None and (campo != 'raio' or seg['curva'])]
+        raise ValueError(f"Relatório TXT: lote {lote}, segmento #{len(atual['segments']) + 1} "
+                         f"incompleto (sem {', '.join(faltam)})")
+    if viu_area and atual["area_m2"] is None:
+        raise ValueError(f"Relatório TXT: lote {lote}, Area sem valor em sq.m")
+
+def _aplicar_areas_txt(atual, areas):
+    """A primeira "Area:" com valor em sq.m vira area_m2; True se alguma veio sem valor"""
+    sem_valor = False
+    for _, valor in areas:
+        if valor is None:
+            sem_valor = True
+        elif atual["area_m2"] is None:
+            atual["area_m2"] = _float_br_us(valor)
+    return sem_valor
+
+def iter_parcels_from_txt(fonte):
+    """
+    Gera as parcelas ({num, segments, area_m2, first_point}) de um relatório
+    TXT. fonte: bytes, mmap, caminho ou arquivo binário. Segmento, área ou
+    ponto inicial que não se completa levanta ValueError.
+    """
+    if isinstance(fonte, (str, Path)):
+        with open(fonte, 'rb') as arq:
+            yield from iter_parcels_from_txt(arq)
+        return
+    num = _float_br_us
+    azimutes = {}  # lotes vizinhos repetem rumos: converte cada texto uma vez
+
+    def azimute(rumo):
+        az = azimutes.get(rumo)
+        if az is None:
+            az = azimutes[rumo] = bearing_to_azimuth(rumo.strip())
+        return az
+
+    atual = None
+    seg = None  # segmento pendente: {curva, rumo, comp, raio}
+    viu_area = com_cabecalho = False
+    for texto in _blocos_de_linhas(fonte):
+        texto = '\n' + texto
+        baixo = texto.lower()
+        if len(baixo) != len(texto):  # minúscula mudou o tamanho: posições não batem
+            baixo = re.sub(r'(?i)area:', 'area:', texto)
+        # (posição, valor) de cada "Area:"; a primeira com valor é a da parcela
+        areas = [(a.start(), a.group('area')) for a in _TXT_AREA.finditer(baixo)]
+        proxima = 0
+        for m in _TXT_TOKENS.finditer(texto):
+            tipo = m.lastgroup
+            if tipo == 'nome':
+                fim = proxima
+                while fim < len(areas) and areas[fim][0] < m.start():
+                    fim += 1
+                if atual is not None:
+                    viu_area = _aplicar_areas_txt(atual, areas[proxima:fim]) or viu_area
+                    _conferir_parcela_txt(atual, seg, viu_area)
+                    yield atual
+                atual = {"num": int(m.group('nome')), "segments": [], "area_m2": None, "first_point": None}
+                seg = None
+                viu_area = com_cabecalho = False
+                proxima = fim
+            elif atual is None:
+                continue
+            elif tipo == 'linha':
+                # "Segment #n : Line" com Course e Length logo abaixo: a reta sai inteira
+                if seg is not None:
+                    _conferir_parcela_txt(atual, seg, False)
+                atual["segments"].append({"type": "line", "length_m": num(m.group('comp_linha')),
+                                          "azimuth": azimute(m.group('rumo_linha'))})
+                com_cabecalho = True
+            elif tipo == 'curva' or tipo == 'segmento':
+                if seg is not None:
+                    _conferir_parcela_txt(atual, seg, False)
+                if tipo == 'curva':
+                    seg = {"curva": True, "rumo": None,
+                           "comp": num(m.group('comp_curva')), "raio": num(m.group('raio_curva'))}
+                else:
+                    seg = {"curva": m.group('segmento').lower() == 'curve', "rumo": None, "comp": None, "raio": None}
+                com_cabecalho = True
+            elif tipo in _CAMPOS_TXT:
+                if seg is None:
+                    if com_cabecalho:
+                        continue  # campo solto depois de um segmento já completo
+                    seg = {"curva": None, "rumo": None, "comp": None, "raio": None}
+                for campo, grupo in _CAMPOS_TXT[tipo]:
+                    if seg[campo] is None:
+                        seg[campo] = m.group(grupo) if campo == 'rumo' else num(m.group(grupo))
+                curva = seg["curva"] if seg["curva"] is not None else seg["raio"] is not None
+                if seg["rumo"] is None or seg["comp"] is None or (curva and seg["raio"] is None):
+                    continue
+                if curva:
+                    atual["segments"].append({"type": "curve", "curve_len_m": seg["comp"],
+                                              "radius_m": seg["raio"], "azimuth": azimute(seg["rumo"])})
+                else:
+                    atual["segments"].append({"type": "line", "length_m": seg["comp"],
+                                              "azimuth": azimute(seg["rumo"])})
+                seg = None
+            elif tipo == 'inicio':
+                if atual["first_point"] is None:
+                    if m.group('leste') is None:
+                        raise ValueError(f"Relatório TXT: lote {atual['num']}, Point of Beginning sem North/East")
+                    atual["first_point"] = {'Y': num(m.group('norte')), 'X': num(m.group('leste'))}
+        if atual is not None:  # as que sobraram são da última parcela do bloco
+            viu_area = _aplicar_areas_txt(atual, areas[proxima:]) or viu_area
+    if atual is not None:
+        _conferir_parcela_txt(atual, seg, viu_area)
+        yield atual
+
 def parse_parcels_from_txt(txt_bytes):
-    txt = io.BytesIO(txt_bytes).read().decode('utf-8', errors='ignore')
-    txt = txt.replace('\r', '')
-    parts = re.split(r'(?:^|\n)\s*Name:\s*(\d+)\s*(?:\n|$)', txt)
-    it = iter(parts); _ = next(it, "")
-    parcels = []
-    for num, bloco in zip(it, it):
-        num = int(num)
-        m0 = re.search(r'Point of Beginning\s*:\s*North:\s*([\d\.,]+)m\s*East:\s*([\d\.,]+)m', bloco, re.I)
-        first_pt = {'Y': converter_para_float_qualquer(m0.group(1)), 'X': converter_para_float_qualquer(m0.group(2))} if m0 else None
-        mA = re.search(r'Area:\s*([\d\.,]+)\s*sq\.m', bloco, re.I)
-        area_m2 = converter_para_float_qualquer(mA.group(1)) if mA else None
-        segs = []
-        for m in re.finditer(r'Segment\s*#\d+.*?Line[\s\S]*?Course:\s*([NS].*?[EW])\s*Length:\s*([\d\.,]+)m', bloco, re.I):
-            bearing = m.group(1).strip(); length = converter_para_float_qualquer(m.group(2))
-            az = bearing_to_azimuth(bearing); segs.append({"type":"line","length_m":length,"azimuth":az})
-        for m in re.finditer(r'Segment\s*#\d+.*?Curve[\s\S]*?Length:\s*([\d\.,]+)m[\s\S]*?Radius:\s*([\d\.,]+)m[\s\S]*?Course:\s*([NS].*?[EW])', bloco, re.I):
-            curve_len = converter_para_float_qualquer(m.group(1)); radius = converter_para_float_qualquer(m.group(2)); chord_dir = m.group(3).strip()
-            az = bearing_to_azimuth(chord_dir); segs.append({"type":"curve","curve_len_m":curve_len,"radius_m":radius,"azimuth":az})
-        parcels.append({"num": num, "segments": segs, "area_m2": area_m2, "first_point": first_pt})
-    return parcels
+    return list(iter_parcels_from_txt(txt_bytes))
+
+# Relatório do Civil 3D: leitura incremental. O HTML é entregue em blocos a
+# um HTMLParser do lxml com um "target" (sem montar árvore); cada <table>
+# "Parcel" vira um item assim que termina. O texto da tabela passa uma vez
+# por um único regex de tokens e uma pequena máquina de estados monta os
+# segmentos na ordem do relatório (retas e curvas intercaladas).
+_CIVIL_TOKENS = re.compile(
+    r'Point\s+whose\s+Northing\s+is\s*(?P<norte>[\d\.,]+)\s+and\s+whose\s+Easting\s*is\s*(?P<leste>[\d\.,]+)'
+    r'|Bearing:\s*(?P<rumo>[NS].*?[EW])\s*Length:\s*(?P<comp>[\d\.,]+)'
+    r'|Curve Length:\s*(?P<arco>[\d\.,]+)'
+    r'|Radius Length:\s*(?P<raio>[\d\.,]+)'
+    r'|Chord Direction:\s*(?P<corda>[NS].*?[EW])'
+    r'|Square meters\s*\n\s*(?P<area>[\d\.,]+)'
+    r'|(?P<rotulo_area>Area)',
+    re.I)
+_CHARSET_META = re.compile(rb'<meta[^>]+charset', re.I)
+_BLOCO_HTML = 1 << 16
+
+def _item_civil(title, texto):
+    """Item do Civil a partir do título e do texto (nós separados por \n) de uma tabela"""
+    if not title.upper().startswith("PARCEL"):
+        return None
+    name = title.split("Parcel", 1)[1].strip() or "SEM NOME"
+
+    first_pt = area_m2 = None
+    viu_area = False
+    segs = []
+    curva = None  # [arco, raio] aguardando a direção da corda
+    for m in _CIVIL_TOKENS.finditer(texto):
+        tipo = m.lastgroup
+        if tipo == 'comp':
+            segs.append({"type": "line", "length_m": _float_br_us(m.group('comp')),
+                         "azimuth": bearing_to_azimuth(m.group('rumo').strip())})
+        elif tipo == 'arco':
+            curva = [_float_br_us(m.group('arco')), None]
+        elif tipo == 'raio':
+            if curva is not None and curva[1] is None:
+                curva[1] = _float_br_us(m.group('raio'))
+        elif tipo == 'corda':
+            if curva is not None and curva[1] is not None:
+                segs.append({"type": "curve", "curve_len_m": curva[0], "radius_m": curva[1],
+                             "azimuth": bearing_to_azimuth(m.group('corda').strip())})
+                curva = None
+        elif tipo == 'leste':
+            if first_pt is None:
+                first_pt = {'Y': _float_br_us(m.group('norte')),
+                            'X': _float_br_us(m.group('leste'))}
+        elif tipo == 'area':
+            if viu_area and area_m2 is None:
+                area_m2 = _float_br_us(m.group('area'))
+        elif tipo == 'rotulo_area':
+            viu_area = True
+    return {'name': name, 'segments': segs, 'area_m2': area_m2, 'first_point': first_pt}
+
+class _AlvoCivilReport:
+    """Target do HTMLParser: acumula o texto de cada tabela e monta os itens ao fechá-la"""
+
+    def __init__(self):
+        self.prontos = []
+        self._pilha = []
+        self._partes = None      # texto da tabela aberta mais interna ('\n' entre nós)
+        self._titulo = None      # [início, fim] do 1º <td colspan="3"> em _partes
+        self._prof_titulo = 0
+
+    def start(self, tag, attrib):
+        if tag == 'table':
+            self._pilha.append((self._partes, self._titulo))
+            self._partes, self._titulo = [], None
+            return
+        partes = self._partes
+        if partes is None:
+            return
+        partes.append('\n')
+        if tag == 'td':
+            if self._prof_titulo:
+                self._prof_titulo += 1
+            elif self._titulo is None and attrib.get('colspan') == '3':
+                self._titulo = [len(partes), None]
+                self._prof_titulo = 1
+
+    def end(self, tag):
+        partes = self._partes
+        if partes is None:
+            return
+        if tag == 'table':
+            item = None
+            if self._titulo is not None:
+                ini, fim = self._titulo
+                nos = ''.join(partes[ini:fim]).split('\n')
+                item = _item_civil(''.join(t.strip() for t in nos), ''.join(partes))
+            self._partes, self._titulo = self._pilha.pop()
+            self._prof_titulo = 0
+            if item is not None:
+                self.prontos.append(item)
+            return
+        partes.append('\n')
+        if tag == 'td' and self._prof_titulo:
+            self._prof_titulo -= 1
+            if not self._prof_titulo:
+                self._titulo[1] = len(partes)
+
+    def data(self, txt):
+        if self._partes is not None:
+            self._partes.append(txt)
+
+    def close(self):
+        return None
+
+    def coletar(self):
+        prontos, self.prontos = self.prontos, []
+        return prontos
+
+def _encoding_html(arq):
+    """Encoding do HTML: o declarado no <meta>; senão UTF-8 se válido, senão cp1252"""
+    inicio = arq.tell()
+    cabeca = arq.read(4096)
+    arq.seek(inicio)
+    if _CHARSET_META.search(cabeca):
+        return None
+    dec = codecs.getincrementaldecoder('utf-8')()
+    try:
+        while True:
+            bloco = arq.read(1 << 20)
+            if not bloco:
+                break
+            dec.decode(bloco)
+        dec.decode(b'', final=True)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+    finally:
+        arq.seek(inicio)
+
+def iter_civilreport_from_html(fonte, encoding=None):
+    """
+    Gera os itens (parcelas) do relatório do Civil 3D conforme o HTML é lido.
+    fonte: bytes, caminho ou arquivo binário (com seek). Nenhuma árvore é
+    montada: a memória usada não depende do tamanho do relatório.
+    """
+    if isinstance(fonte, (bytes, bytearray, memoryview)):
+        arq = io.BytesIO(fonte)
+    elif isinstance(fonte, (str, Path)):
+        arq = open(fonte, 'rb')
+    else:
+        arq = fonte
+        if isinstance(fonte, mmap.mmap):
+            fonte.seek(0)  # mmap do armazém de uploads: sempre lido desde o início
+    try:
+        if encoding is None:
+            encoding = _encoding_html(arq)
+        alvo = _AlvoCivilReport()
+        parser = etree.HTMLParser(target=alvo, encoding=encoding)
+        resto = b''
+        while True:
+            bloco = arq.read(_BLOCO_HTML)
+            if not bloco:
+                break
+            # cada bloco termina antes de um '<': o parser incremental do
+            # libxml2 trava se um feed acaba no meio de uma tag
+            bloco = resto + bloco
+            corte = bloco.rfind(b'<')
+            if corte <= 0:
+                resto = bloco
+                continue
+            resto = bloco[corte:]
+            parser.feed(bloco[:corte])
+            yield from alvo.coletar()
+        if resto:
+            parser.feed(resto)
+        parser.close()
+        yield from alvo.coletar()
+    finally:
+        if arq is not fonte:
+            arq.close()
 
 def parse_civilreport_from_html(html_bytes):
-    soup = BeautifulSoup(html_bytes, "lxml")
-    items = []
-    for table in soup.find_all("table"):
-        head = table.find("td", colspan="3")
-        if not head: continue
-        title = head.get_text(strip=True)
-        if not title.upper().startswith("PARCEL"): continue
-        name = title.split("Parcel",1)[1].strip() or "SEM NOME"
-        ttxt = table.get_text("\n")
-        m0 = re.search(r'Point\s+whose\s+Northing\s+is\s*([\d\.,]+)\s+and\s+whose\s+Easting\s*is\s*([\d\.,]+)', ttxt, re.I)
-        first_pt = {'Y': converter_para_float_qualquer(m0.group(1)), 'X': converter_para_float_qualquer(m0.group(2))} if m0 else None
-        mA = re.search(r'Area.*?\n.*?Square meters\s*\n\s*([\d\.,]+)', ttxt, re.I|re.S)
-        area_m2 = converter_para_float_qualquer(mA.group(1)) if mA else None
-        segs = []
-        for m in re.finditer(r'Bearing:\s*([NS].*?[EW])\s*Length:\s*([\d\.,]+)', ttxt, re.I):
-            bearing = m.group(1).strip(); length = converter_para_float_qualquer(m.group(2))
-            az = bearing_to_azimuth(bearing); segs.append({"type":"line","length_m":length,"azimuth":az})
-        for block in re.finditer(r'Curve.*?Curve Length:\s*([\d\.,]+).*?Radius Length:\s*([\d\.,]+).*?Chord Direction:\s*([NS].*?[EW])', ttxt, re.I|re.S):
-            curve_len = converter_para_float_qualquer(block.group(1)); radius = converter_para_float_qualquer(block.group(2)); chord_dir = block.group(3).strip()
-            az = bearing_to_azimuth(chord_dir)
-            segs.append({"type":"curve","curve_len_m":curve_len,"radius_m":radius,"azimuth":az})
-        items.append({'name': name, 'segments':segs, 'area_m2':area_m2, 'first_point':first_pt})
-    return items
+    return list(iter_civilreport_from_html(html_bytes))
 
 def parse_parcels_from_html(html_bytes):
     arr = parse_civilreport_from_html(html_bytes)
@@ -335,6 +887,326 @@ def parse_parcels_from_html(html_bytes):
         seq += 1
     return parcels
 
+# ===================== Cache de leitura dos relatórios =====================
+# Cada upload é identificado pelo SHA-256 dos bytes + tipo de leitor + versão do
+# leitor: repetir "Gerar" com outras opções (ou reenviar um arquivo) não relê o
+# relatório. A memória guarda as parcelas serializadas (pickle), limitada por um
+# orçamento de bytes; com MEMORIAL_CACHE_DIR definido, uma camada em disco
+# (pickle + zlib) sobrevive a reinícios e é compartilhada entre workers, com
+# limite em MEMORIAL_CACHE_DISCO_MB (despejo pelo mtime, atualizado a cada uso).
+# Alterou a saída de um leitor? Incremente a versão dele em _VERSOES_LEITOR;
+# os arquivos da versão anterior são apagados na próxima gravação.
+_VERSOES_LEITOR = {'txt': 3, 'html': 2, 'civil': 2}
+_LEITORES = {
+    'txt': parse_parcels_from_txt,
+    'html': parse_parcels_from_html,
+    'civil': parse_civilreport_from_html,
+}
+
+_ARQUIVO_LEITURA = re.compile(r'([a-z]+)-v(\d+)-[0-9a-f]{64}\.pkz\Z')
+_TMP_ABANDONADO = 3600  # .tmp mais velho que isso é de uma gravação que morreu
+
+class _CacheLeituras:
+    def __init__(self, limite_bytes, pasta=None, limite_disco=None):
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()  # chave -> pickle das parcelas
+        self.limite_bytes = int(limite_bytes)
+        self.pasta = Path(pasta) if pasta else None
+        self.limite_disco = int(limite_disco) if limite_disco else None
+        self.bytes = 0
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+        self.despejos = 0
+        self.despejos_disco = 0
+
+    @staticmethod
+    def chave(tipo, data):
+        return f"{tipo}-v{_VERSOES_LEITOR[tipo]}-{hashlib.sha256(data).hexdigest()}"
+
+    def consultar(self, chave):
+        """Pickle guardado para chave (memória, depois disco) ou None"""
+        with self._lock:
+            blob = self._itens.get(chave)
+            if blob is not None:
+                self._itens.move_to_end(chave)
+                self.hits_memoria += 1
+                return blob
+        blob = self._ler_disco(chave)
+        if blob is not None:
+            with self._lock:
+                self.hits_disco += 1
+            self._guarda(chave, blob)
+        return blob
+
+    def registrar(self, chave, blob):
+        """Guarda o pickle de uma leitura feita agora (aqui ou em outro processo)"""
+        with self._lock:
+            self.misses += 1
+        self._grava_disco(chave, blob)
+        self._guarda(chave, blob)
+
+    def semear(self, chave, blob):
+        """Guarda um pickle lido em outro processo (não conta como leitura nova)"""
+        self._guarda(chave, blob)
+
+    def ler(self, tipo, data):
+        """Parcelas de data pelo leitor tipo; cada chamada devolve uma cópia nova"""
+        chave = self.chave(tipo, data)
+        blob = self.consultar(chave)
+        if blob is None:
+            # erros de leitura não são guardados
+            blob = pickle.dumps(_LEITORES[tipo](data), protocol=pickle.HIGHEST_PROTOCOL)
+            self.registrar(chave, blob)
+        return pickle.loads(blob)
+
+    def _guarda(self, chave, blob):
+        if len(blob) > self.limite_bytes:
+            return
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self.bytes -= len(antigo)
+            self._itens[chave] = blob
+            self.bytes += len(blob)
+            while self.bytes > self.limite_bytes:
+                _, velho = self._itens.popitem(last=False)
+                self.bytes -= len(velho)
+                self.despejos += 1
+
+    def _ler_disco(self, chave):
+        if self.pasta is None:
+            return None
+        caminho = self.pasta / f"{chave}.pkz"
+        try:
+            blob = zlib.decompress(caminho.read_bytes())
+        except (OSError, zlib.error):
+            return None
+        try:
+            os.utime(caminho)  # usado agora: fim da fila de despejo
+        except OSError:
+            pass
+        return blob
+
+    def _grava_disco(self, chave, blob):
+        if self.pasta is None:
+            return
+        tmp = None
+        try:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.pasta, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(zlib.compress(blob, 6))
+            os.replace(tmp, self.pasta / f"{chave}.pkz")
+            tmp = None
+        except OSError:
+            pass
+        finally:
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+        self._podar_disco(manter=f"{chave}.pkz")
+
+    def _podar_disco(self, manter=None):
+        """
+        Apaga leituras de versões antigas dos leitores e .tmp abandonados; acima
+        de limite_disco, as usadas há mais tempo (mtime) até caber
+        """
+        agora = time.time()
+        entradas = []  # (mtime, bytes, caminho)
+        try:
+            varredura = list(os.scandir(self.pasta))
+        except OSError:
+            return
+        for ent in varredura:
+            try:
+                st = ent.stat()
+            except OSError:
+                continue
+            m = _ARQUIVO_LEITURA.match(ent.name)
+            if ent.name.endswith('.tmp'):
+                obsoleto = agora - st.st_mtime > _TMP_ABANDONADO
+            elif m is not None:
+                obsoleto = _VERSOES_LEITOR.get(m.group(1)) != int(m.group(2))
+            else:
+                continue
+            if obsoleto:
+                self._remover_disco(ent.path)
+            elif m is not None:
+                entradas.append((st.st_mtime, st.st_size, ent.path))
+        if self.limite_disco is None:
+            return
+        total = sum(t for _, t, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.limite_disco:
+                break
+            if os.path.basename(caminho) == manter:
+                continue
+            self._remover_disco(caminho)
+            total -= tamanho
+
+    def _remover_disco(self, caminho):
+        try:
+            os.remove(caminho)
+        except OSError:
+            return
+        with self._lock:
+            self.despejos_disco += 1
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'hits_memoria': self.hits_memoria,
+                'hits_disco': self.hits_disco,
+                'misses': self.misses,
+                'despejos': self.despejos,
+                'despejos_disco': self.despejos_disco,
+                'itens': len(self._itens),
+                'bytes': self.bytes,
+                'limite_bytes': self.limite_bytes,
+                'limite_disco': self.limite_disco,
+            }
+
+_CACHE_LEITURAS = _CacheLeituras(
+    limite_bytes=int(os.environ.get('MEMORIAL_CACHE_MEMORIA_MB', '64')) * 1024 * 1024,
+    pasta=os.environ.get('MEMORIAL_CACHE_DIR') or None,
+    limite_disco=int(os.environ.get('MEMORIAL_CACHE_DISCO_MB', '512')) * 1024 * 1024,
+)
+
+def ler_relatorio(tipo, data):
+    """Leitura de um upload ('txt' | 'html' | 'civil') através do cache de leituras"""
+    return _CACHE_LEITURAS.ler(tipo, data)
+
+def estatisticas_cache_leituras():
+    return _CACHE_LEITURAS.estatisticas()
+
+# ===================== Leitura paralela dos uploads =====================
+# Loteamentos chegam com dezenas de arquivos de quadra. As leituras que não
+# estão no cache são distribuídas num pool de processos (limitado aos núcleos
+# disponíveis); poucos bytes ou um único arquivo são lidos aqui mesmo, já que
+# abrir o pool e copiar os dados custaria mais que a leitura.
+_PARALELO_MIN_ARQUIVOS = 2
+_PARALELO_MIN_BYTES = 2 * 1024 * 1024
+
+# Os pools são abertos por threads de tarefa do worker web; um filho criado
+# com fork herdaria travas (caches, modelo, logging) seguradas por outra
+# thread naquele instante e travaria para sempre. O forkserver cria os filhos
+# a partir de um processo limpo, com este módulo já importado.
+try:
+    _CONTEXTO_POOL = multiprocessing.get_context('forkserver')
+    _CONTEXTO_POOL.set_forkserver_preload(['__main__', __name__])
+except ValueError:
+    _CONTEXTO_POOL = multiprocessing.get_context('spawn')
+
+class _PoolProcessos:
+    """ProcessPoolExecutor criado no primeiro uso e descartado se quebrar ou travar"""
+
+    def __init__(self, variavel_ambiente, maximo):
+        self.variavel_ambiente = variavel_ambiente
+        self.maximo = maximo
+        # segundos de espera por um resultado antes de refazer em série
+        self.prazo = float(os.environ.get('MEMORIAL_PRAZO_PROCESSOS', '600'))
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def processos(self):
+        if multiprocessing.parent_process() is not None:
+            return 1  # já num filho de um destes pools: não abre outro pool dentro dele
+        try:
+            n = len(os.sched_getaffinity(0))
+        except AttributeError:
+            n = os.cpu_count() or 1
+        n = int(os.environ.get(self.variavel_ambiente, n) or 1)
+        return max(1, min(n, self.maximo))
+
+    def obter(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processos(), mp_context=_CONTEXTO_POOL)
+            return self._pool
+
+    def resultado(self, futuro):
+        """
+        Resultado de um futuro deste pool. None se o pool quebrou ou o prazo
+        passou: o pool é descartado e o chamador refaz o trabalho em série.
+        Exceções do próprio trabalho sobem normalmente.
+        """
+        try:
+            return futuro.result(timeout=self.prazo)
+        except BrokenProcessPool:
+            self.descartar()
+        except PrazoEsgotado:
+            self.descartar(encerrar=True)
+        return None
+
+    def descartar(self, encerrar=False):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        # filho travado não sai com shutdown: encerrar mata os processos
+        processos = list((getattr(pool, '_processes', None) or {}).values()) if encerrar else []
+        pool.shutdown(wait=False, cancel_futures=True)
+        for processo in processos:
+            processo.terminate()
+
+_POOL_LEITURA = _PoolProcessos('MEMORIAL_PROCESSOS_LEITURA', 8)
+
+def _ler_no_processo(tipo, fname, data):
+    """Executado no processo filho: (quadra do nome, pickle das parcelas)"""
+    resultado = _LEITORES[tipo](data)
+    return infer_quadra_from_filename(fname), pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+
+def ler_relatorios(tarefas):
+    """
+    Lê vários uploads de uma vez. tarefas: [(fname, tipo, data)].
+    Retorna [(fname, quadra, resultado, erro)] na mesma ordem de tarefas.
+    """
+    saida = []
+    pendentes = []  # (posição, chave)
+    for fname, tipo, data in tarefas:
+        chave = _CACHE_LEITURAS.chave(tipo, data)
+        blob = _CACHE_LEITURAS.consultar(chave)
+        saida.append([fname, infer_quadra_from_filename(fname), blob, None])
+        if blob is None:
+            pendentes.append((len(saida) - 1, chave))
+
+    futuros = {}
+    if (len(pendentes) >= _PARALELO_MIN_ARQUIVOS and _POOL_LEITURA.processos() > 1
+            and sum(len(tarefas[i][2]) for i, _ in pendentes) >= _PARALELO_MIN_BYTES):
+        try:
+            pool = _POOL_LEITURA.obter()
+            # mmap não é serializável: o filho recebe uma cópia em bytes
+            futuros = {i: pool.submit(_ler_no_processo, tarefas[i][1], tarefas[i][0], bytes(tarefas[i][2]))
+                       for i, _ in pendentes}
+        except (OSError, RuntimeError, BrokenProcessPool):
+            _POOL_LEITURA.descartar()
+            futuros = {}
+
+    for i, chave in pendentes:
+        fname, tipo, data = tarefas[i]
+        try:
+            lido = _POOL_LEITURA.resultado(futuros[i]) if i in futuros else None
+            if lido is not None:
+                saida[i][1], blob = lido
+            else:
+                futuros = {}  # pool descartado (ou nunca usado): o resto sai em série
+                blob = pickle.dumps(_LEITORES[tipo](data), protocol=pickle.HIGHEST_PROTOCOL)
+            _CACHE_LEITURAS.registrar(chave, blob)
+            saida[i][2] = blob
+        except Exception as e:
+            saida[i][3] = e
+
+    return [(fname, quadra, pickle.loads(blob) if blob is not None else None, erro)
+            for fname, quadra, blob, erro in saida]
+
 # ===================== Classificação (regras) =====================
 def _normalize(s):
     return re.sub(r'\s+', ' ', str(s or '')).strip().upper()
@@ -401,17 +1273,22 @@ def _fmt_matriculas_plural(txt_raw: str):
         return ("matrícula", partes[0] if partes else "XXXX")
     return ("matrículas", ", ".join(partes[:-1]) + " e " + partes[-1])
 
+@lru_cache(maxsize=256)
+def _fmt_campos_basicos(nome, endereco, cidade, bairro):
+    return _title_case_name(nome), _title_keep_preps(endereco), _fmt_cidade_slash_uf(cidade), _fmt_bairro(bairro)
+
 def _get_fmt_campos_basicos(form_data):
-    """Adaptado para receber form_data ao invés de widgets"""
-    nome_fmt = _title_case_name(form_data.get('nome_emp', ''))
-    end_fmt = _title_keep_preps(form_data.get('endereco_emp', ''))
-    cid_fmt = _fmt_cidade_slash_uf(form_data.get('cidade_emp', ''))
-    bai_fmt = _fmt_bairro(form_data.get('bairro_emp', ''))
-    return nome_fmt, end_fmt, cid_fmt, bai_fmt
+    """Adaptado para receber form_data ao invés de widgets (memorizado pelos valores)"""
+    return _fmt_campos_basicos(form_data.get('nome_emp', ''), form_data.get('endereco_emp', ''),
+                               form_data.get('cidade_emp', ''), form_data.get('bairro_emp', ''))
 
 # ===================== Logos / doc base =====================
+def _imagem_disponivel(imagem):
+    """Caminho existente ou fluxo (BytesIO) já em memória"""
+    return not isinstance(imagem, str) or os.path.exists(imagem)
+
 def add_header_logo(doc, image_path, width_inches=1.4):
-    if os.path.exists(image_path):
+    if _imagem_disponivel(image_path):
         try:
             for section in doc.sections:
                 section.header_distance = Inches(0.8)
@@ -422,7 +1299,7 @@ def add_header_logo(doc, image_path, width_inches=1.4):
             pass  # Ignora se imagem não existir
 
 def add_footer_logo(doc, image_path, width_inches=1.6):
-    if os.path.exists(image_path):
+    if _imagem_disponivel(image_path):
         try:
             for section in doc.sections:
                 section.footer_distance = Inches(0.3)
@@ -461,7 +1338,7 @@ def add_page_numbers(document):
     p._p.append(fld)
 
 def add_corner_image_watermark_cm(doc, image_path, width_cm=6.46, height_cm=1.91):
-    if os.path.exists(image_path):
+    if _imagem_disponivel(image_path):
         try:
             sec = doc.sections[0]
             para = sec.header.add_paragraph()
@@ -477,14 +1354,79 @@ def _apply_moderate_margins(doc):
         section.left_margin = Inches(0.75)
         section.right_margin = Inches(0.75)
 
-def preparar_doc():
+_RODAPE_PADRAO = [
+    "WWW.SOLIDO.ARQ.BR",
+    "Avenida Ipiranga, 6681 – Prédio 99, Sala 906",
+    "Porto Alegre – RS Brasil",
+    "+ 55 51 99690-7857",
+]
+
+def _montar_doc_base(imagens):
+    """Esqueleto com a marca: estilos, margens, logos, rodapé padrão e numeração"""
     doc = Document()
+    _criar_estilos(doc)
     _apply_moderate_margins(doc)
-    add_header_logo(doc, CAMINHO_LOGO_CABECALHO)
-    add_corner_image_watermark_cm(doc, CAMINHO_MARCA_DAGUA)
-    add_footer_logo(doc, CAMINHO_LOGO_RODAPE)
+    if 'logo_cabecalho' in imagens:
+        add_header_logo(doc, io.BytesIO(imagens['logo_cabecalho']))
+    if 'marca_dagua' in imagens:
+        add_corner_image_watermark_cm(doc, io.BytesIO(imagens['marca_dagua']))
+    if 'logo_rodape' in imagens:
+        add_footer_logo(doc, io.BytesIO(imagens['logo_rodape']))
+    add_footer_left_text(doc, _RODAPE_PADRAO, size_pt=10)
+    add_page_numbers(doc)
     return doc
 
+def preparar_doc():
+    """Documento novo, copiado do modelo base em cache"""
+    return _MODELO_BASE.documento()
+
+# ===================== Modelo base (cache) =====================
+# Montar o esqueleto (carregar o template padrão, embutir as três imagens,
+# rodapé) é igual em toda geração. O modelo é montado uma vez por versão das
+# imagens da marca (ids do ARMAZEM_MARCA) e guardado serializado; cada pedido
+# abre uma cópia. Publicar uma imagem nova (/api/upload-image) troca o
+# manifesto e invalida o modelo em todos os processos.
+class _ModeloBase:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assinatura = None
+        self._dados = None
+        self.montagens = 0
+        self.copias = 0
+
+    def documento(self):
+        sig, imagens = ARMAZEM_MARCA.ativos()
+        with self._lock:
+            if self._dados is None or self._assinatura != sig:
+                buf = io.BytesIO()
+                _montar_doc_base(imagens).save(buf)
+                self._dados, self._assinatura = buf.getvalue(), sig
+                self.montagens += 1
+            dados = self._dados
+            self.copias += 1
+        return Document(io.BytesIO(dados))
+
+    def invalidar(self):
+        with self._lock:
+            self._dados = self._assinatura = None
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'montagens': self.montagens,
+                'copias': self.copias,
+                'bytes': len(self._dados or b''),
+            }
+
+_MODELO_BASE = _ModeloBase()
+
+def invalidar_modelo_base():
+    """Descarta o modelo base deste processo (ex.: depois de trocar uma imagem da marca)"""
+    _MODELO_BASE.invalidar()
+
+def estatisticas_modelo_base():
+    return _MODELO_BASE.estatisticas()
+
 def _enable_update_fields_on_open(doc):
     settings_el = doc.settings._element
     for el in settings_el.iterchildren():
@@ -495,106 +1437,270 @@ def _enable_update_fields_on_open(doc):
     upd.set(qn('w:val'), 'true')
     settings_el.append(upd)
 
+# ===================== Estilos nomeados =====================
+# Calibri 12pt preto fica definido uma vez, em estilos de caractere; os runs só
+# referenciam o estilo (w:rStyle) em vez de repetir fonte/tamanho/cor.
+# O realce amarelo continua direto no run: o Word ignora w:highlight em estilo.
+_ESTILO_TEXTO = 'Texto'
+_ESTILO_NEGRITO = 'Negrito'
+_ESTILO_DESTAQUE = 'Destaque'
+_ESTILO_COORDENADA = 'Coordenada'
+_ESTILO_TITULO = 'Titulo'
+
+# (id/nome, baseado em, negrito)
+_ESTILOS_CARACTERE = (
+    (_ESTILO_TEXTO, None, False),
+    (_ESTILO_NEGRITO, _ESTILO_TEXTO, True),
+    (_ESTILO_DESTAQUE, _ESTILO_TEXTO, None),
+    (_ESTILO_COORDENADA, _ESTILO_TEXTO, None),
+    (_ESTILO_TITULO, _ESTILO_TEXTO, True),
+)
+
+def _criar_estilos(doc):
+    """Cria os estilos de caractere do memorial (uma vez por documento)"""
+    estilos = doc.styles
+    for nome, base, negrito in _ESTILOS_CARACTERE:
+        if nome in estilos:
+            continue
+        st = estilos.add_style(nome, WD_STYLE_TYPE.CHARACTER)
+        if base is None:
+            st.font.name = 'Calibri'
+            st.font.size = Pt(12)
+            st.font.color.rgb = RGBColor(0, 0, 0)
+        else:
+            st.base_style = estilos[base]
+        if negrito is not None:
+            st.font.bold = negrito
+
+def _estilo_run(run, estilo):
+    run._r.get_or_add_rPr().style = estilo
+    return run
+
 # ===================== Headings / helpers =====================
 def heading(doc, text):
     h = doc.add_heading('', level=1)
-    run = h.add_run(text)
-    run.bold = True
-    run.font.name = 'Calibri'
-    run.font.size = Pt(12)
-    run.font.color.rgb = RGBColor(0, 0, 0)
+    _estilo_run(h.add_run(text), _ESTILO_TITULO)
     blank = doc.add_paragraph()
     blank.paragraph_format.space_after = Pt(0)
     return h
 
 def _set_run_defaults(run, bold=False):
-    run.font.name = 'Calibri'
-    run.font.size = Pt(12)
-    run.font.color.rgb = RGBColor(0, 0, 0)
-    run.bold = bool(bold)
+    _estilo_run(run, _ESTILO_NEGRITO if bold else _ESTILO_TEXTO)
 
 def _add_hl(paragraph, txt="XXXX", bold=False):
-    run = paragraph.add_run(txt)
-    _set_run_defaults(run, bold=bold)
+    run = _estilo_run(paragraph.add_run(txt), _ESTILO_DESTAQUE)
+    if bold:
+        run.bold = True
     run.font.highlight_color = WD_COLOR_INDEX.YELLOW
     return run
 
 def _run_xxxx(par):
-    r = par.add_run("XXXX")
-    _set_run_defaults(r)
-    r.font.highlight_color = WD_COLOR_INDEX.YELLOW
-    return r
+    return _add_hl(par)
+
+# ===================== Texto com formatação (spans) =====================
+# Os builders de texto devolvem a formatação junto com o texto: uma lista de
+# spans (trecho, estilo, destaque). Trechos vizinhos com o mesmo estilo são
+# fundidos num só run.
+_XXXX_SPLIT = re.compile(r'(XXXX)')
+
+class Spans(list):
+    """Lista de (trecho, estilo, destaque) montada em sequência"""
+
+    def _add(self, trecho, estilo, destaque=False):
+        if not trecho:
+            return self
+        if self and not destaque:
+            ult, est, dest = self[-1]
+            if est == estilo and not dest:
+                self[-1] = (ult + trecho, estilo, False)
+                return self
+        self.append((trecho, estilo, destaque))
+        return self
+
+    def texto(self, trecho):
+        """Texto comum; placeholders XXXX saem com realce"""
+        if 'XXXX' not in trecho:
+            return self._add(trecho, _ESTILO_TEXTO)
+        for parte in _XXXX_SPLIT.split(trecho):
+            if parte == 'XXXX':
+                self.destaque()
+            else:
+                self._add(parte, _ESTILO_TEXTO)
+        return self
 
-def adicionar_texto_formatado(doc, texto):
+    def negrito(self, trecho):
+        return self._add(trecho, _ESTILO_NEGRITO)
+
+    def coordenada(self, trecho):
+        return self._add(trecho, _ESTILO_COORDENADA)
+
+    def destaque(self, trecho="XXXX"):
+        return self._add(trecho, _ESTILO_DESTAQUE, True)
+
+    def juntar(self, spans):
+        for trecho, estilo, destaque in spans:
+            self._add(trecho, estilo, destaque)
+        return self
+
+    def trocar_final(self, antigo, novo):
+        """Troca o sufixo antigo do último trecho por novo (se houver)"""
+        if self and self[-1][0].endswith(antigo):
+            trecho, estilo, destaque = self[-1]
+            self[-1] = (trecho[:-len(antigo)] + novo, estilo, destaque)
+        return self
+
+    def __str__(self):
+        return ''.join(s[0] for s in self)
+
+def adicionar_texto_formatado(doc, spans):
     p = doc.add_paragraph()
     p.alignment = WD_PARAGRAPH_ALIGNMENT.JUSTIFY
     p.paragraph_format.line_spacing_rule = WD_LINE_SPACING.SINGLE
 
-    bold_pat = (
-        r'(?:LOTE\s+\d+\s*–\s*QUADRA\s+[A-Z0-9]+:)'
-        r'|(?:LOTE\s+\d+\s+da\s+QUADRA\s+[A-Z0-9]+)'
-        r'|(?:(?<!Y=\s)(?<!X=\s)\d{1,3}(?:\.\d{3})*,\d+m²)'
-        r'|(?:(?<!Y=\s)(?<!X=\s)\d{1,3}(?:\.\d{3})*,\d+m)'
-    )
-    coord_pat = (
-        r'(?:Y=\s*\d{1,3}(?:\.\d{3})*,\d+m|X=\s*\d{1,3}(?:\.\d{3})*,\d+m)'
-        r'|(?:Lat\.\s*-?\d+\.\d+°\s*,\s*Long\.\s*-?\d+\.\d+°)'
-        r'|(?:Lat\.\s*-?\d+°\d{2}\'\d{2}(?:,\d+)?\"\s*,\s*Long\.\s*-?\d+°\d{2}\'\d{2}(?:,\d+)?\")'
-    )
-    dms_pat = r'\d{1,3}°\d{2}\'\d{2}(?:,\d{1,3})?"'
-    bold_marker_pat = r'\[\[B\]\](.*?)\[\[/B\]\]'
-
-    tok = re.compile(f'({bold_pat})|(XXXX)|({coord_pat})|({dms_pat})|({bold_marker_pat})',
-                     flags=re.IGNORECASE|re.DOTALL)
-
-    i = 0
-    while i < len(texto):
-        m = tok.search(texto, i)
-        if not m:
-            resto = texto[i:]
-            parts = re.split(r'(XXXX)', resto)
-            for part in parts:
-                if part == '': continue
-                if part == 'XXXX':
-                    run = p.add_run(part)
-                    run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-                else:
-                    run = p.add_run(part)
-                    run.font.name='Calibri'
-                    run.font.size=Pt(12)
-                    run.font.color.rgb=RGBColor(0,0,0)
-            break
-
-        pref = texto[i:m.start()]
-        if pref:
-            parts = re.split(r'(XXXX)', pref)
-            for part in parts:
-                if part == '': continue
-                run = p.add_run(part)
-                run.font.name='Calibri'
-                run.font.size=Pt(12)
-                run.font.color.rgb=RGBColor(0,0,0)
-                if part == 'XXXX':
-                    run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-
-        if m.group(1):
-            run = p.add_run(m.group(1))
-            run.bold = True
-        elif m.group(2):
-            run = p.add_run("XXXX")
+    for trecho, estilo, destaque in spans:
+        run = p.add_run(trecho)
+        if estilo:
+            _estilo_run(run, estilo)
+        if destaque:
             run.font.highlight_color = WD_COLOR_INDEX.YELLOW
-        elif m.group(3) or m.group(4):
-            run = p.add_run(m.group(0))
-            run.bold = False
+
+# ===================== Corpo do documento em XML direto =====================
+# Os parágrafos das seções longas (áreas e lotes) não passam pela árvore do
+# python-docx: viram XML w:p (mesmas propriedades de heading() e de
+# adicionar_texto_formatado) gravado num buffer, que é encaixado no
+# word/document.xml depois do save, no lugar de um parágrafo marcador.
+_ESCAPE_XML = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+_CONTROLE_RUN = re.compile(r'([\t\r\n])')
+_XML_PPR_FORMATADO = '<w:pPr><w:spacing w:line="240" w:lineRule="auto"/><w:jc w:val="both"/></w:pPr>'
+_XML_PARAGRAFO_VAZIO = '<w:p><w:pPr><w:spacing w:after="0"/></w:pPr></w:p>'
+_XML_BORDAS_TABELA = '<w:tblBorders>' + ''.join(
+    f'<w:{lado} w:val="single" w:sz="4" w:space="0" w:color="000000"/>'
+    for lado in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+) + '</w:tblBorders>'
+_XML_TBL_LOOK = ('<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+                 'w:noHBand="0" w:noVBand="1" w:val="04A0"/>')
+_LINHAS_POR_ESCRITA = 512
+
+def _xml_texto_run(trecho):
+    """Conteúdo do w:r como o python-docx gera (tab -> w:tab, quebra -> w:br)"""
+    partes = []
+    for pedaco in _CONTROLE_RUN.split(trecho):
+        if not pedaco:
+            continue
+        if pedaco == '\t':
+            partes.append('<w:tab/>')
+        elif pedaco in '\r\n':
+            partes.append('<w:br/>')
+        elif len(pedaco.strip()) < len(pedaco):
+            partes.append(f'<w:t xml:space="preserve">{pedaco.translate(_ESCAPE_XML)}</w:t>')
         else:
-            inner = re.sub(r'^\[\[B\]\]|\[\[/B\]\]$', '', m.group(5))
-            run = p.add_run(inner)
-            run.bold = True
+            partes.append(f'<w:t>{pedaco.translate(_ESCAPE_XML)}</w:t>')
+    return ''.join(partes)
 
-        run.font.name='Calibri'
-        run.font.size=Pt(12)
-        run.font.color.rgb=RGBColor(0,0,0)
-        i = m.end()
+def _xml_run(trecho, estilo=_ESTILO_TEXTO, destaque=False):
+    rpr = ''.join((
+        f'<w:rStyle w:val="{estilo}"/>' if estilo else '',
+        '<w:highlight w:val="yellow"/>' if destaque else '',
+    ))
+    return f'<w:r>{f"<w:rPr>{rpr}</w:rPr>" if rpr else ""}{_xml_texto_run(trecho)}</w:r>'
+
+def xml_paragrafo_formatado(spans):
+    """w:p equivalente a adicionar_texto_formatado(doc, spans)"""
+    runs = ''.join(_xml_run(*seg) for seg in spans)
+    return f'<w:p>{_XML_PPR_FORMATADO}{runs}</w:p>'
+
+def xml_titulo(texto, estilo='Heading1'):
+    """w:p equivalentes a heading(doc, texto): título + parágrafo em branco"""
+    return (f'<w:p><w:pPr><w:pStyle w:val="{estilo}"/></w:pPr>{_xml_run(texto, _ESTILO_TITULO)}</w:p>'
+            + _XML_PARAGRAFO_VAZIO)
+
+def _largura_util_twips(doc):
+    sec = doc.sections[-1]
+    return Emu(sec.page_width - sec.left_margin - sec.right_margin).twips
+
+def xml_linha_tabela(valores, larguras, estilo=_ESTILO_TEXTO, cabecalho=False):
+    """w:tr com um parágrafo centralizado por célula (cabecalho: repete em cada página)"""
+    celulas = ''.join(
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{larg}"/></w:tcPr>'
+        f'<w:p><w:pPr><w:jc w:val="center"/></w:pPr>{_xml_run(str(valor), estilo)}</w:p></w:tc>'
+        for valor, larg in zip(valores, larguras))
+    tr_pr = '<w:trPr><w:tblHeader/></w:trPr>' if cabecalho else ''
+    return f'<w:tr>{tr_pr}{celulas}</w:tr>'
+
+class _CorpoOOXML:
+    """Parágrafos gravados como XML num buffer (memória até _SPOOL_MAX, depois disco)"""
+
+    def __init__(self, doc):
+        self.marca = f"@@corpo-{os.urandom(8).hex()}@@"
+        doc.add_paragraph(self.marca)
+        self.estilo_titulo = doc.styles['Heading 1'].style_id
+        self.largura_util = _largura_util_twips(doc)
+        self.buffer = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+        self.paragrafos = 0
+
+    def escrever(self, xml, paragrafos=1):
+        self.buffer.write(xml.encode('utf-8'))
+        self.paragrafos += paragrafos
+
+    def titulo(self, texto):
+        self.escrever(xml_titulo(texto, self.estilo_titulo), 2)
+
+    def paragrafo(self, spans):
+        self.escrever(xml_paragrafo_formatado(spans))
+
+    def paragrafo_runs(self, segmentos):
+        """Parágrafo sem formatação de parágrafo; segmentos: [(trecho, estilo, destaque)]"""
+        self.escrever(f"<w:p>{''.join(_xml_run(*seg) for seg in segmentos)}</w:p>")
+
+    def tabela(self, cabecalho, linhas):
+        """
+        Tabela Table Grid de largura total, colunas iguais, bordas definidas na
+        tabela (não por célula) e cabeçalho em negrito repetido a cada página.
+        linhas: sequências de valores já formatados; escritas em lotes.
+        """
+        n = len(cabecalho)
+        larguras = [self.largura_util // n] * n
+        grade = ''.join(f'<w:gridCol w:w="{larg}"/>' for larg in larguras)
+        self.escrever(
+            f'<w:tbl><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:type="auto" w:w="0"/>'
+            f'{_XML_BORDAS_TABELA}{_XML_TBL_LOOK}</w:tblPr><w:tblGrid>{grade}</w:tblGrid>'
+            + xml_linha_tabela(cabecalho, larguras, _ESTILO_NEGRITO, cabecalho=True), 0)
+        lote = []
+        for valores in linhas:
+            lote.append(xml_linha_tabela(valores, larguras))
+            if len(lote) >= _LINHAS_POR_ESCRITA:
+                self.escrever(''.join(lote), 0)
+                lote = []
+        self.escrever(''.join(lote) + '</w:tbl>', 0)
+
+    def fechar(self):
+        self.buffer.close()
+
+def _inserir_corpo(buffer, corpo):
+    """Novo pacote com o parágrafo marcador do document.xml trocado pelo XML de corpo"""
+    marcador = f'<w:p><w:r><w:t>{corpo.marca}</w:t></w:r></w:p>'.encode('utf-8')
+    saida = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as zin, zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for info in zin.infolist():
+            if info.filename != 'word/document.xml':
+                zout.writestr(info, zin.read(info.filename))
+                continue
+            xml = zin.read(info.filename)
+            antes, achou, depois = xml.partition(marcador)
+            if not achou:
+                raise ValueError("document.xml sem o parágrafo marcador do corpo")
+            corpo.buffer.seek(0, os.SEEK_END)
+            total = len(antes) + corpo.buffer.tell() + len(depois)
+            corpo.buffer.seek(0)
+            novo = zipfile.ZipInfo(info.filename, info.date_time)
+            novo.compress_type = zipfile.ZIP_DEFLATED
+            with zout.open(novo, 'w', force_zip64=total >= zipfile.ZIP64_LIMIT) as destino:
+                destino.write(antes)
+                shutil.copyfileobj(corpo.buffer, destino, 1 << 20)
+                destino.write(depois)
+    buffer.close()
+    return saida
 
 # ===================== Funções auxiliares para coordenadas =====================
 def _fmt_coord_dec(val):
@@ -612,267 +1718,787 @@ def _fmt_coord_dms(val):
     s_txt = f"{s:.3f}".replace(".", ",")
     return f"{sign}{d}°{m:02d}'{s_txt}\""
 
+def _fmt_coord_dec_lote(vals):
+    """Versão em lote de _fmt_coord_dec"""
+    v = np.asarray(vals, dtype=np.float64)
+    if not _representaveis(v):
+        return [_fmt_coord_dec(x) for x in v.tolist()]
+    return _txt_lote(v.size, *_col_fixo(v, 6, sep=','), "°")
+
+def _fmt_coord_dms_lote(vals):
+    """Versão em lote de _fmt_coord_dms"""
+    v = np.asarray(vals, dtype=np.float64)
+    if not _representaveis(v):
+        return [_fmt_coord_dms(x) for x in v.tolist()]
+    return _txt_lote(v.size, *_cols_dms(v, 'vertice'))
+
+def _coords_formatadas_lote(X, Y, coord_fmt, zone_num=22, hemi='S'):
+    """
+    Devolve (COORD_1, COORD_2) já formatados para todos os pontos:
+    UTM (X, Y) ou geográficas (Long., Lat.) em graus decimais / GMS
+    """
+    if coord_fmt == 'utm':
+        return _fmt_br_lote(X, 2), _fmt_br_lote(Y, 2)
+    lat, lon = utm_para_geo_lote(X, Y, zone_num, hemi)
+    if coord_fmt == 'dec':
+        return _fmt_coord_dec_lote(lon), _fmt_coord_dec_lote(lat)
+    return _fmt_coord_dms_lote(lon), _fmt_coord_dms_lote(lat)
+
 def _dms_str(az):
     return azimuth_to_dms_int(az) if az is not None else ""
 
+# ===================== Propagação de vértices (NumPy) =====================
+def _arredonda_lote(v, casas):
+    """round(v, casas) do Python, elemento a elemento (mesmo float resultante)"""
+    v = np.asarray(v, dtype=np.float64)
+    if not _representaveis(v):
+        return np.array([round(x, casas) for x in v.tolist()], dtype=np.float64)
+    n = _inteiros_arredondados(np.abs(v), casas)
+    return np.copysign(n / (10 ** casas), v)
+
+class TabelaVertices:
+    """
+    Tabela colunar com os vértices de uma ou mais parcelas: uma linha por
+    segmento (vértice de destino), parcelas delimitadas por `inicio`.
+    """
+    __slots__ = ('inicio', 'x', 'y', 'azimute', 'distancia', 'raio', 'tem_raio',
+                 'curva', 'coord_1', 'coord_2', 'azimute_dms', 'pontos_iniciais')
+
+    def __init__(self, inicio, x, y, azimute, distancia, raio, tem_raio, curva,
+                 coord_1, coord_2, azimute_dms, pontos_iniciais):
+        self.inicio = inicio
+        self.x = x
+        self.y = y
+        self.azimute = azimute
+        self.distancia = distancia
+        self.raio = raio
+        self.tem_raio = tem_raio
+        self.curva = curva
+        self.coord_1 = coord_1
+        self.coord_2 = coord_2
+        self.azimute_dms = azimute_dms
+        self.pontos_iniciais = pontos_iniciais
+
+    def __len__(self):
+        return len(self.inicio) - 1
+
+    def faixa(self, i):
+        return slice(int(self.inicio[i]), int(self.inicio[i + 1]))
+
+    def ponto_inicial(self, i=0):
+        """Spans do ponto inicial da parcela ("ponto de coordenadas ..."), ou None"""
+        return self.pontos_iniciais[i]
+
+    def destinos(self, i=0):
+        """Coordenadas formatadas (COORD_1, COORD_2) do vértice de destino de cada segmento"""
+        f = self.faixa(i)
+        return list(zip(self.coord_1[f], self.coord_2[f]))
+
+    def linhas(self, i=0):
+        """Linhas no formato antigo de _propaga_vertices (lista de dicts)"""
+        f = self.faixa(i)
+        dist = self.distancia[f].tolist()
+        raio = self.raio[f].tolist()
+        tem_raio = self.tem_raio[f].tolist()
+        rows = []
+        for k, (c1, c2, azs) in enumerate(zip(self.coord_1[f], self.coord_2[f], self.azimute_dms[f])):
+            rows.append({
+                "DE": f"P{k + 1}",
+                "PARA": f"P{k + 2}",
+                "COORD_1": c1,
+                "COORD_2": c2,
+                "AZIMUTE": azs,
+                "DISTANCIA (m)": dist[k],
+                "RAIO (m)": raio[k] if tem_raio[k] else None,
+                "CONFRONTANTE": ""
+            })
+        return rows
+
+def propagar_vertices_lote(parcelas, coord_fmt_str: str = 'utm', zone_num: int = 22, hemi: str = 'S'):
+    """
+    Propaga os vértices de várias parcelas numa chamada só.
+    parcelas: iterável de (first_point, segments); parcelas sem ponto inicial
+    ou sem segmentos ficam vazias na tabela.
+    """
+    x0s, y0s, contagens, com_ponto = [], [], [], []
+    az, comp, raios, curva = [], [], [], []
+    for first_point, segments in parcelas:
+        if not first_point:
+            x0s.append(0.0); y0s.append(0.0); contagens.append(0); com_ponto.append(False)
+            continue
+        x0s.append(float(first_point["X"]))
+        y0s.append(float(first_point["Y"]))
+        com_ponto.append(True)
+        if not segments:
+            contagens.append(0)
+            continue
+        contagens.append(len(segments))
+        for seg in segments:
+            az.append(float(seg.get("azimuth") or 0.0))
+            if seg.get("type") == "line":
+                curva.append(False)
+                comp.append(float(seg.get("length_m") or 0.0))
+                raios.append(0.0)
+            else:
+                curva.append(True)
+                comp.append(float(seg.get("curve_len_m") or 0.0))
+                raios.append(float(seg.get("radius_m") or 0.0))
+
+    cont = np.array(contagens, dtype=np.int64)
+    inicio = np.zeros(len(cont) + 1, dtype=np.int64)
+    np.cumsum(cont, out=inicio[1:])
+    az = np.array(az, dtype=np.float64)
+    comp = np.array(comp, dtype=np.float64)
+    R = np.array(raios, dtype=np.float64)
+    curva = np.array(curva, dtype=bool)
+
+    # corda = 2R·sin(θ/2) nas curvas (θ = arco/R), comprimento nas retas
+    with np.errstate(invalid='ignore'):
+        theta = np.divide(comp, R, out=np.zeros_like(comp), where=R > 0)
+        corda = np.where(curva, 2.0 * R * np.sin(theta / 2.0), comp)
+        rad = np.radians(az)
+        dx = np.sin(rad) * corda
+        dy = np.cos(rad) * corda
+
+    # Soma acumulada por parcela, com o ponto inicial na frente (mesma ordem de
+    # soma do laço original). Parcelas com o mesmo nº de segmentos vão juntas
+    # numa matriz e acumulam ao longo das linhas.
+    x = np.empty_like(dx)
+    y = np.empty_like(dy)
+    x0s = np.array(x0s, dtype=np.float64)
+    y0s = np.array(y0s, dtype=np.float64)
+    for k in np.unique(cont[cont > 0]).tolist():
+        ps = np.flatnonzero(cont == k)
+        idx = inicio[ps][:, None] + np.arange(k)
+        for origem, delta, destino in ((x0s, dx, x), (y0s, dy, y)):
+            acc = np.empty((len(ps), k + 1))
+            acc[:, 0] = origem[ps]
+            acc[:, 1:] = delta[idx]
+            destino[idx] = np.cumsum(acc, axis=1)[:, 1:]
+
+    tem_raio = curva & (R != 0)
+    raio = np.where(tem_raio, _arredonda_lote(R, 2), np.nan)
+    c1s, c2s = _coords_formatadas_lote(x, y, coord_fmt_str, zone_num, hemi)
+    com_ponto = np.array(com_ponto, dtype=bool)
+    pontos = [None] * len(cont)
+    for i, spans in zip(np.flatnonzero(com_ponto).tolist(),
+                        _spans_ponto_inicial(x0s[com_ponto], y0s[com_ponto], coord_fmt_str, zone_num, hemi)):
+        pontos[i] = spans
+    return TabelaVertices(inicio, x, y, az, _arredonda_lote(comp, 2), raio, tem_raio, curva,
+                          c1s, c2s, azimute_dms_lote(az), pontos)
+
+def _spans_ponto_inicial(X, Y, coord_fmt, zone_num, hemi):
+    """Spans "ponto de coordenadas ..." de vários pontos iniciais (coordenadas arredondadas ao cm)"""
+    x = _arredonda_lote(X, 2)
+    y = _arredonda_lote(Y, 2)
+    if coord_fmt == 'utm':
+        return [Spans().texto("ponto de coordenadas ").coordenada(f"Y= {cy}m")
+                .texto(" e ").coordenada(f"X= {cx}m")
+                for cy, cx in zip(_fmt_br_lote(y, 2), _fmt_br_lote(x, 2))]
+    lat, lon = utm_para_geo_lote(x, y, zone_num, hemi)
+    fmt = fmt_latlon_decimal_lote if coord_fmt == 'dec' else fmt_latlon_dms_lote
+    return [Spans().texto("ponto de coordenadas geográficas ").coordenada(t) for t in fmt(lat, lon)]
+
 def _propaga_vertices(first_point: dict, segments: list,
                       coord_fmt_str: str = 'utm',
                       zone_num: int = 22,
                       hemi: str = 'S'):
-    if not first_point or not segments:
-        return []
-
-    x = float(first_point["X"])
-    y = float(first_point["Y"])
-    p_idx = 1
-    rows = []
-
-    for seg in segments:
-        az = float(seg.get("azimuth") or 0.0)
-        rad = math.radians(az)
-
-        if seg.get("type") == "line":
-            L = float(seg.get("length_m") or 0.0)
-            dx = math.sin(rad) * L
-            dy = math.cos(rad) * L
-            x2, y2 = x + dx, y + dy
-            dist = round(L, 2)
-            raio = None
-        else:
-            arc = float(seg.get("curve_len_m") or 0.0)
-            R_ = float(seg.get("radius_m") or 0.0)
-            theta = (arc / R_) if R_ > 0 else 0.0
-            chord = 2.0 * R_ * math.sin(theta / 2.0)
-            dx = math.sin(rad) * chord
-            dy = math.cos(rad) * chord
-            x2, y2 = x + dx, y + dy
-            dist = round(arc, 2)
-            raio = round(R_, 2) if R_ else None
-
-        if coord_fmt_str == 'utm':
-            c1 = _fmt_br(x2, 2)
-            c2 = _fmt_br(y2, 2)
-        else:
-            lat, lon = utm_to_latlon(x2, y2, zone_num, hemi)
-            if coord_fmt_str == 'dec':
-                c1 = _fmt_coord_dec(lon)
-                c2 = _fmt_coord_dec(lat)
+    return propagar_vertices_lote([(first_point, segments)], coord_fmt_str, zone_num, hemi).linhas(0)
+
+# ===================== Modelo geométrico do projeto =====================
+# Um conjunto de uploads é lido uma vez e os vértices de todas as parcelas são
+# propagados uma vez por formato de coordenada. DOCX e Excel (e chamadas
+# seguidas a /api/generate e /api/generate-excel) leem do mesmo modelo.
+def _eh_civilreport(fname):
+    return fname.lower().endswith(('.html', '.htm')) and 'CIVILREPORT' in fname.upper()
+
+def _chave_uploads(uploaded_files):
+    h = hashlib.sha1()
+    for fname in sorted(uploaded_files):
+        h.update(fname.encode('utf-8') + b'\0')
+        h.update(hashlib.sha1(uploaded_files[fname]).digest())
+    return h.hexdigest()
+
+def _tarefas_leitura(uploaded_files):
+    """[(fname, tipo de leitor, data)] dos uploads que são relatórios"""
+    tarefas = []
+    for fname, data in uploaded_files.items():
+        low = fname.lower()
+        if _eh_civilreport(fname):
+            tarefas.append((fname, 'civil', data))
+        elif low.endswith(('.html', '.htm', '.txt')) and 'CIVILREPORT' not in fname.upper():
+            tarefas.append((fname, 'html' if low.endswith(('.html', '.htm')) else 'txt', data))
+    return tarefas
+
+class ModeloProjeto:
+    """Geometria de um conjunto de uploads (lotes, itens do Civil e glebas)"""
+
+    def __init__(self, uploaded_files):
+        self._lock = threading.Lock()
+        self._tabelas = {}
+        self._indice = {}       # id(parcela/item) -> posição em _geometrias
+        self._geometrias = []   # (first_point, segments)
+        self._erro_civil = None
+
+        # Arquivos de lotes (HTML/TXT): (fname, parcels, erro)
+        self.arquivos_lotes = []
+        self.quadras = {}       # fname -> "QUADRA X" inferida do nome do arquivo
+        self._itens_civil = []
+        tarefas = _tarefas_leitura(uploaded_files)
+        for (fname, tipo, _), (_, quadra, resultado, erro) in zip(tarefas, ler_relatorios(tarefas)):
+            if tipo == 'civil':
+                if erro is not None:
+                    self._erro_civil = self._erro_civil or erro
+                else:
+                    self._itens_civil.extend(resultado)
             else:
-                c1 = _fmt_coord_dms(lon)
-                c2 = _fmt_coord_dms(lat)
-
-        rows.append({
-            "DE": f"P{p_idx}",
-            "PARA": f"P{p_idx + 1}",
-            "COORD_1": c1,
-            "COORD_2": c2,
-            "AZIMUTE": _dms_str(az),
-            "DISTANCIA (m)": dist,
-            "RAIO (m)": raio,
-            "CONFRONTANTE": ""
-        })
-
-        x, y = x2, y2
-        p_idx += 1
-
-    return rows
+                self.arquivos_lotes.append((fname, resultado, erro))
+                self.quadras[fname] = quadra
+
+        # Unificação: primeiro item do Civil com nome de unificação
+        self.unif_item = next((it for it in self._itens_civil
+                               if is_unificacao_item_name(it.get('name') or '')), None)
+
+        # Desmembramento: parcelas dos HTML de lotes viram glebas
+        self.itens_desm = []
+        for fname, parcels, erro in self.arquivos_lotes:
+            if erro is not None or not fname.lower().endswith(('.html', '.htm')):
+                continue
+            for p in parcels:
+                item = {'segments': p.get('segments', []), 'area_m2': p.get('area_m2', 0.0),
+                        'first_point': p.get('first_point')}
+                self.itens_desm.append((f"GLEBA {p.get('num', 1)}", item))
+                self._registra(item, origem=p)
+
+        for _, parcels, erro in self.arquivos_lotes:
+            for p in parcels or []:
+                self._registra(p)
+        for it in self._itens_civil:
+            self._registra(it)
+
+    def _registra(self, item, origem=None):
+        """Registra a geometria de item; glebas reaproveitam a da parcela de origem"""
+        base = origem if origem is not None else item
+        pos = self._indice.get(id(base))
+        if pos is None:
+            pos = len(self._geometrias)
+            self._geometrias.append((base.get('first_point'), base.get('segments', [])))
+            self._indice[id(base)] = pos
+        self._indice[id(item)] = pos
+
+    def itens_civil(self):
+        if self._erro_civil is not None:
+            raise self._erro_civil
+        return self._itens_civil
+
+    def parcelas_por_arquivo(self):
+        """[(fname, parcels)] dos arquivos de lotes; repassa o erro de leitura, se houver"""
+        out = []
+        for fname, parcels, erro in self.arquivos_lotes:
+            if erro is not None:
+                raise erro
+            out.append((fname, parcels))
+        return out
+
+    def lotes_por_quadra(self):
+        """[(quadra, parcels)] ordenado por quadra e número do lote"""
+        out = [(self.quadras[fname], sorted(parcels, key=lambda p: int(p.get('num', 0))))
+               for fname, parcels in self.parcelas_por_arquivo()]
+        out.sort(key=lambda qp: quadra_label_sort_key(qp[0]))
+        return out
+
+    def tabela(self, coord_fmt='utm', zone_num=22, hemi='S'):
+        """Vértices de todas as geometrias do projeto no formato pedido (calculados uma vez)"""
+        chave = ('utm',) if coord_fmt == 'utm' else (coord_fmt, int(zone_num), hemi)
+        with self._lock:
+            tab = self._tabelas.get(chave)
+            if tab is None:
+                tab = propagar_vertices_lote(self._geometrias, coord_fmt, zone_num, hemi)
+                self._tabelas[chave] = tab
+            return tab
+
+    def geometria(self, item, coord_fmt='utm', zone_num=22, hemi='S'):
+        """(texto do ponto inicial, destinos) de uma parcela/item do modelo"""
+        tab = self.tabela(coord_fmt, zone_num, hemi)
+        pos = self._indice[id(item)]
+        return tab.ponto_inicial(pos), tab.destinos(pos)
+
+    def linhas(self, item, coord_fmt='utm', zone_num=22, hemi='S'):
+        """Linhas de vértices (formato de _propaga_vertices) de uma parcela/item do modelo"""
+        return self.tabela(coord_fmt, zone_num, hemi).linhas(self._indice[id(item)])
+
+_MODELOS_MAX = 8
+_modelos = OrderedDict()
+_modelos_lock = threading.Lock()
+
+def obter_modelo_projeto(uploaded_files):
+    """ModeloProjeto do conjunto de uploads (memorizado pelo conteúdo dos arquivos)"""
+    chave = _chave_uploads(uploaded_files)
+    with _modelos_lock:
+        modelo = _modelos.get(chave)
+        if modelo is not None:
+            _modelos.move_to_end(chave)
+            return modelo
+    modelo = ModeloProjeto(uploaded_files)
+    with _modelos_lock:
+        modelo = _modelos.setdefault(chave, modelo)
+        _modelos.move_to_end(chave)
+        while len(_modelos) > _MODELOS_MAX:
+            _modelos.popitem(last=False)
+    return modelo
 
 # ===================== Builders (lotes e áreas) =====================
+# Devolvem Spans: negrito (identificação, medidas), coordenadas/azimutes e
+# placeholders XXXX já marcados, sem reinterpretar o texto depois.
+_TIPOS_LOTE_COND = (
+    "condomínio fechado de lotes residenciais",
+    "condomínio fechado de lotes",
+    "loteamento de acesso controlado"
+)
+
 def _texto_ane(largura_m):
-    num_sem_negrito = f"{_fmt_br(largura_m, 2)}\u200Bm"
-    ext = extenso_metros(largura_m)
-    return (
-        f" Existe uma faixa não edificante com largura de {num_sem_negrito} ({ext}), "
+    return Spans().texto(
+        f" Existe uma faixa não edificante com largura de {_fmt_br(largura_m, 2)}m ({extenso_metros(largura_m)}), "
         f"conforme definido no projeto urbanístico e nas restrições de uso do terreno."
     )
 
 def _format_first_point(fp, coord_fmt, zone_num, hemi):
     if not fp: return None
-    y = round(float(fp["Y"]), 2); x = round(float(fp["X"]), 2)
-    if coord_fmt == 'utm':
-        return f"ponto de coordenadas Y= {_fmt_br(y, 2)}m e X= {_fmt_br(x, 2)}m"
-    lat, lon = utm_to_latlon(x, y, zone_num, hemi)
-    if coord_fmt == 'dec':
-        return f"ponto de coordenadas geográficas {fmt_latlon_decimal(lat, lon)}"
-    return f"ponto de coordenadas geográficas {fmt_latlon_dms(lat, lon)}"
+    return str(_spans_ponto_inicial([float(fp["X"])], [float(fp["Y"])], coord_fmt, zone_num, hemi)[0])
+
+# Trechos de divisa se repetem (lotes vizinhos, áreas e lotes sobre a mesma
+# divisa, o mesmo projeto gerado em vários documentos): o texto de cada
+# segmento é montado uma vez e reaproveitado. A chave é o que aparece no texto
+# (medidas arredondadas, sentido, azimute em DMS), nunca o float bruto: dois
+# azimutes com a mesma chave sempre produzem o mesmo texto.
+
+class _CacheFragmentos:
+    def __init__(self, limite_itens):
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()  # chave -> tupla de spans
+        self.limite_itens = int(limite_itens)
+        self.hits = 0
+        self.misses = 0
+        self.despejos = 0
+
+    def obter(self, chave, montar):
+        with self._lock:
+            frag = self._itens.get(chave)
+            if frag is not None:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return frag
+            self.misses += 1
+        frag = tuple(montar())
+        with self._lock:
+            self._itens[chave] = frag
+            while len(self._itens) > self.limite_itens:
+                self._itens.popitem(last=False)
+                self.despejos += 1
+        return frag
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'taxa_acerto': round(self.hits / consultas, 4) if consultas else None,
+                'despejos': self.despejos,
+                'itens': len(self._itens),
+                'limite_itens': self.limite_itens,
+            }
+
+_CACHE_FRAGMENTOS = _CacheFragmentos(int(os.environ.get('MEMORIAL_CACHE_FRAGMENTOS', '50000')))
+
+def estatisticas_fragmentos():
+    return _CACHE_FRAGMENTOS.estatisticas()
 
 def _seg_texto_com_card(seg, dest_coord=None, tipo='line', coord_fmt='utm'):
     az = seg.get("azimuth")
+    if tipo == 'line':
+        medidas = (round(float(seg["length_m"]), 2), None)
+    else:
+        medidas = (round(float(seg["curve_len_m"]), 2), round(float(seg["radius_m"]), 2))
     card = azimuth_to_card8(az)
     az_dms = azimuth_to_dms_int(az)
+    chave = (tipo, medidas, card, az_dms, tuple(dest_coord) if dest_coord else None, coord_fmt)
+    return Spans(_CACHE_FRAGMENTOS.obter(
+        chave, lambda: _montar_seg_texto(card, az_dms, medidas, dest_coord, tipo, coord_fmt)))
+
+def _montar_seg_texto(card, az_dms, medidas, dest_coord, tipo, coord_fmt):
+    s = Spans()
+
+    if tipo == 'line':
+        lv = medidas[0]
+        s.texto(f"daí segue, por reta, sentido {card}, medindo ").negrito(_fmt_br(lv, 2) + "m")
+        s.texto(f" ({extenso_metros(lv)}), ")
+    else:
+        clv, rv = medidas
+        s.texto(f"daí segue, por curva, sentido {card}, medindo ").negrito(_fmt_br(clv, 2) + "m")
+        s.texto(f" ({extenso_metros(clv)}) e raio de ").negrito(_fmt_br(rv, 2) + "m")
+        s.texto(f" ({extenso_metros(rv)}), ")
+    s.texto("confrontando ao XXXX com XXXX")
 
-    dest_txt = ""
     if dest_coord:
         c1, c2 = dest_coord
+        s.texto(" até o ponto de coordenadas ")
         if coord_fmt == 'utm':
-            dest_txt = f" até o ponto de coordenadas Y= {c2}m e X= {c1}m"
+            s.coordenada(f"Y= {c2}m").texto(" e ").coordenada(f"X= {c1}m")
         else:
-            dest_txt = f" até o ponto de coordenadas {c2} / {c1}"
+            s.coordenada(c2).texto(" / ").coordenada(c1)
 
-    if tipo == 'line':
-        lv = round(float(seg["length_m"]), 2)
-        length = _fmt_br(lv, 2) + "m"
-        return (
-            f"daí segue, por reta, sentido {card}, medindo {length} ({extenso_metros(lv)}), "
-            f"confrontando ao XXXX com XXXX{dest_txt}, seguindo por um azimute de {az_dms}; "
-        )
+    return s.texto(", seguindo por um azimute de ").coordenada(az_dms).texto("; ")
+
+def _spans_perimetro(s, item, fp_spans, destinos, coord_fmt):
+    """Ponto inicial + segmentos + fecho da descrição (comum a lotes e áreas)"""
+    if item.get("first_point") and fp_spans:
+        s.texto("inicia-se a descrição no ").juntar(fp_spans).texto("; ")
 
-    clv = round(float(seg["curve_len_m"]), 2)
-    rv = round(float(seg["radius_m"]), 2)
-    cl = _fmt_br(clv, 2) + "m"
-    r = _fmt_br(rv, 2) + "m"
-    return (
-        f"daí segue, por curva, sentido {card}, medindo {cl} ({extenso_metros(clv)}) e raio de {r} ({extenso_metros(rv)}), "
-        f"confrontando ao XXXX com XXXX{dest_txt}, seguindo por um azimute de {az_dms}; "
+    segs = item.get("segments", []) or []
+    if segs:
+        for i, seg in enumerate(segs):
+            dest = destinos[i] if i < len(destinos) else None
+            tipo = 'line' if seg["type"] == "line" else 'curve'
+            s.juntar(_seg_texto_com_card(seg, dest_coord=dest, tipo=tipo, coord_fmt=coord_fmt))
+        s.trocar_final("; ", ", ")
+
+    return s.texto("chegando ao final da descrição do perímetro. Dista XXXXm da esquina da Rua XXXX.")
+
+def _geometria_item(item, coord_fmt, zone_num, hemi, modelo):
+    if modelo is not None:
+        return modelo.geometria(item, coord_fmt, zone_num, hemi)
+    tab = propagar_vertices_lote(
+        [(item.get("first_point"), item.get("segments", []))],
+        coord_fmt_str=coord_fmt,
+        zone_num=zone_num,
+        hemi=hemi
     )
+    return tab.ponto_inicial(0), tab.destinos(0)
 
 def build_area_text(item_name, item, tipo_full, empreendimento, endereco, bairro, cidade,
                     ane_enable=False, ane_largura_m=None, coord_fmt='utm', zone_num=22, hemi='S',
-                    ident_prefix=None, ident_label_only=False, ident_label_text="Descrição do Imóvel:"):
+                    ident_prefix=None, ident_label_only=False, ident_label_text="Descrição do Imóvel:",
+                    modelo=None):
     nome_norm = _normalize(item_name)
-    area = item.get("area_m2") or 0
-    area_fmt = _fmt_br(area, 2) + "m²"
-    area_ext = area_por_extenso(area)
-
-    tipo_is_lote_cond = (tipo_full or "").lower() in (
-        "condomínio fechado de lotes residenciais",
-        "condomínio fechado de lotes",
-        "loteamento de acesso controlado"
-    )
+    tipo_is_lote_cond = (tipo_full or "").lower() in _TIPOS_LOTE_COND
 
+    s = Spans()
     if ident_label_only:
-        cabeca = f"[[B]]{ident_label_text}[[/B]] Um terreno urbano, irregular, sem benfeitorias, "
+        s.negrito(ident_label_text)
     else:
         if ident_prefix:
-            cabeca = f"{ident_prefix} [[B]]{nome_norm}[[/B]]: Um terreno urbano, irregular, sem benfeitorias, "
-        else:
-            cabeca = f"[[B]]{nome_norm}[[/B]]: Um terreno urbano, irregular, sem benfeitorias, "
-
-    if tipo_is_lote_cond:
-        cabeca += (
-            f"localizado na {endereco}, no bairro {bairro}, na cidade de {cidade}, "
-            f"constituído como [[B]]{_normalize(item_name)}[[/B]], "
-        )
-    else:
-        cabeca += (
-            f"situado entre terras que são ou foram de XXXX, "
-            f"localizado na {endereco}, no bairro {bairro}, na cidade de {cidade}, "
-            f"constituído como [[B]]{_normalize(item_name)}[[/B]], "
-        )
-
-    if item.get("first_point"):
-        fp_txt = _format_first_point(item["first_point"], coord_fmt, zone_num, hemi)
-        if fp_txt:
-            cabeca += f"inicia-se a descrição no {fp_txt}; "
-
-    rows = _propaga_vertices(
-        item.get("first_point"),
-        item.get("segments", []),
-        coord_fmt_str=coord_fmt,
-        zone_num=zone_num,
-        hemi=hemi
-    )
-
-    partes = []
-    segs = item.get("segments", []) or []
-    for i, seg in enumerate(segs):
-        dest = None
-        if i < len(rows):
-            dest = (rows[i]["COORD_1"], rows[i]["COORD_2"])
-        if seg["type"] == "line":
-            partes.append(_seg_texto_com_card(seg, dest_coord=dest, tipo='line', coord_fmt=coord_fmt))
-        else:
-            partes.append(_seg_texto_com_card(seg, dest_coord=dest, tipo='curve', coord_fmt=coord_fmt))
+            s.texto(f"{ident_prefix} ")
+        s.negrito(nome_norm).texto(":")
+    s.texto(" Um terreno urbano, irregular, sem benfeitorias, ")
 
-    corpo = "".join(partes)
-    if corpo.endswith("; "):
-        corpo = corpo[:-2] + ", "
+    if not tipo_is_lote_cond:
+        s.texto("situado entre terras que são ou foram de XXXX, ")
+    s.texto(f"localizado na {endereco}, no bairro {bairro}, na cidade de {cidade}, constituído como ")
+    s.negrito(nome_norm).texto(", ")
 
-    texto = cabeca + corpo + "chegando ao final da descrição do perímetro."
-    texto += " Dista XXXXm da esquina da Rua XXXX."
+    fp_spans, destinos = _geometria_item(item, coord_fmt, zone_num, hemi, modelo)
+    _spans_perimetro(s, item, fp_spans, destinos, coord_fmt)
 
     if ane_enable and (ane_largura_m is not None):
-        texto += _texto_ane(ane_largura_m)
+        s.juntar(_texto_ane(ane_largura_m))
 
-    return texto
+    return s
 
 def build_memorial_text(parcel, quadra, tipo_full, empreendimento, endereco, bairro, cidade,
                         ane_enable=False, ane_largura_m=None, eh_condominio=False,
-                        area_tot_priv=0.0, area_tot_cond=0.0, coord_fmt='utm', zone_num=22, hemi='S'):
+                        area_tot_priv=0.0, area_tot_cond=0.0, coord_fmt='utm', zone_num=22, hemi='S',
+                        modelo=None):
     num = parcel["num"]
     area = parcel.get("area_m2") or 0
-    area_fmt = _fmt_br(area, 2) + "m²"
-    area_ext = area_por_extenso(area)
+    tipo_is_lote_cond = (tipo_full or "").lower() in _TIPOS_LOTE_COND
 
-    tipo_is_lote_cond = (tipo_full or "").lower() in (
-        "condomínio fechado de lotes residenciais",
-        "condomínio fechado de lotes",
-        "loteamento de acesso controlado"
-    )
+    s = Spans().negrito(f"LOTE {num} – {quadra}:").texto(" Um terreno urbano, irregular, sem benfeitorias, ")
+    if not tipo_is_lote_cond:
+        s.texto("situado entre terras que são ou foram de XXXX, ")
+    s.texto(f"localizado na {endereco}, no bairro {bairro}, na cidade de {cidade}, constituído como ")
+    s.negrito(f"LOTE {num} da {quadra}").texto(", ")
 
-    cabeca = f"LOTE {num} – {quadra}: Um terreno urbano, irregular, sem benfeitorias, "
-
-    if tipo_is_lote_cond:
-        cabeca += (
-            f"localizado na {endereco}, no bairro {bairro}, na cidade de {cidade}, "
-            f"constituído como LOTE {num} da {quadra}, "
-        )
-    else:
-        cabeca += (
-            f"situado entre terras que são ou foram de XXXX, "
-            f"localizado na {endereco}, no bairro {bairro}, na cidade de {cidade}, "
-            f"constituído como LOTE {num} da {quadra}, "
-        )
-
-    if parcel.get("first_point"):
-        fp_txt = _format_first_point(parcel["first_point"], coord_fmt, zone_num, hemi)
-        if fp_txt:
-            cabeca += f"inicia-se a descrição no {fp_txt}; "
-
-    rows = _propaga_vertices(
-        parcel.get("first_point"),
-        parcel.get("segments", []),
-        coord_fmt_str=coord_fmt,
-        zone_num=zone_num,
-        hemi=hemi
-    )
-
-    partes = []
-    segs = parcel.get("segments", []) or []
-    for i, seg in enumerate(segs):
-        dest = None
-        if i < len(rows):
-            dest = (rows[i]["COORD_1"], rows[i]["COORD_2"])
-        if seg["type"] == "line":
-            partes.append(_seg_texto_com_card(seg, dest_coord=dest, tipo='line', coord_fmt=coord_fmt))
-        else:
-            partes.append(_seg_texto_com_card(seg, dest_coord=dest, tipo='curve', coord_fmt=coord_fmt))
-
-    corpo = "".join(partes)
-    if corpo.endswith("; "):
-        corpo = corpo[:-2] + ", "
-
-    texto = cabeca + corpo + "chegando ao final da descrição do perímetro."
-    texto += " Dista XXXXm da esquina da Rua XXXX."
+    fp_spans, destinos = _geometria_item(parcel, coord_fmt, zone_num, hemi, modelo)
+    _spans_perimetro(s, parcel, fp_spans, destinos, coord_fmt)
 
     if ane_enable and (ane_largura_m is not None):
-        texto += _texto_ane(ane_largura_m)
+        s.juntar(_texto_ane(ane_largura_m))
 
     if eh_condominio and area and (area_tot_priv or 0) > 0:
         fr = area / (area_tot_priv or 1.0)
         area_comum = fr * (area_tot_cond or 0.0)
         area_total = area + area_comum
-        priv_fmt = _fmt_br(area, 2)
-        uso_fmt = _fmt_br(area_comum, 2)
-        total_fmt = _fmt_br(area_total, 2)
-        frac_fmt = f"{fr:.7f}"
-        m2 = "\u200Bm²"
-        texto += (
-            f" Possui área real privativa de {priv_fmt}{m2}, área de uso comum de {uso_fmt}{m2}, "
-            f"área real total de {total_fmt}{m2}, correspondendo-lhe a fração ideal de {frac_fmt}."
+        s.texto(
+            f" Possui área real privativa de {_fmt_br(area, 2)}m², área de uso comum de {_fmt_br(area_comum, 2)}m², "
+            f"área real total de {_fmt_br(area_total, 2)}m², correspondendo-lhe a fração ideal de {fr:.7f}."
         )
 
-    return texto
+    return s
+
+# ===================== Renderização paralela dos lotes =====================
+# Em loteamentos grandes o texto dos lotes domina a geração. A geometria é
+# calculada aqui (uma vez, em lote); os lotes seguem em trechos para o pool de
+# processos, cada filho devolve o XML dos parágrafos do seu trecho e o pai
+# escreve os trechos no corpo na ordem original: mesmo XML do caminho serial.
+_PARALELO_MIN_LOTES = 400
+_LOTES_POR_TAREFA = 250
+
+_POOL_RENDER = _PoolProcessos('MEMORIAL_PROCESSOS_RENDER', 8)
+
+class _GeometriasProntas:
+    """Faz o papel do ModeloProjeto no processo filho: geometria já calculada por lote"""
+
+    def __init__(self, lotes):
+        self._geometrias = {id(parcel): (fp, destinos) for _, parcel, fp, destinos in lotes}
+
+    def geometria(self, item, coord_fmt='utm', zone_num=22, hemi='S'):
+        return self._geometrias[id(item)]
+
+def _xml_lotes(lotes, params):
+    """XML do parágrafo de cada lote de um trecho; lotes: [(quadra, parcela, ponto inicial, destinos)]"""
+    modelo = _GeometriasProntas(lotes)
+    return [xml_paragrafo_formatado(build_memorial_text(parcel, quadra, modelo=modelo, **params))
+            for quadra, parcel, _, _ in lotes]
+
+# Parágrafos prontos por lote: regerar depois de mudar um campo do projeto ou
+# um arquivo de quadra só refaz os lotes cujo texto muda. A chave junta os
+# dados do lote (número, área, geometria) e só os campos que entram no texto.
+# A memória vale para todas as tarefas do worker (a fila roda em threads);
+# com MEMORIAL_CACHE_DIR definido, uma camada SQLite em disco é compartilhada
+# entre workers do gunicorn e sobrevive a reinícios (despejo pelo último uso).
+_LOTE_SQL = 500  # chaves por consulta (limite de parâmetros do SQLite)
+
+class _CacheParagrafos:
+    def __init__(self, limite_bytes, pasta=None, limite_disco=None):
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()  # chave -> XML do parágrafo (zlib; o XML comprime ~10x)
+        self.limite_bytes = int(limite_bytes)
+        self.caminho_db = os.path.join(pasta, 'paragrafos.sqlite3') if pasta else None
+        self.limite_disco = int(limite_disco) if limite_disco else None
+        self._db_pronto = False
+        self.bytes = 0
+        self.hits = 0
+        self.hits_disco = 0
+        self.misses = 0
+        self.despejos = 0
+        self.despejos_disco = 0
+
+    def consultar_varios(self, chaves):
+        """XML de cada chave (memória, depois disco) ou None, na ordem de chaves"""
+        blobs = [None] * len(chaves)
+        faltam = []
+        with self._lock:
+            for i, chave in enumerate(chaves):
+                blob = self._itens.get(chave)
+                if blob is None:
+                    faltam.append(i)
+                else:
+                    self._itens.move_to_end(chave)
+                    blobs[i] = blob
+            self.hits += len(chaves) - len(faltam)
+        if faltam:
+            do_disco = self._ler_disco([chaves[i] for i in faltam])
+            for i in faltam:
+                blob = do_disco.get(chaves[i])
+                if blob is not None:
+                    blobs[i] = blob
+                    self._guarda(chaves[i], blob)
+            with self._lock:
+                self.hits_disco += len(do_disco)
+                self.misses += len(faltam) - len(do_disco)
+        return [None if b is None else zlib.decompress(b).decode('utf-8') for b in blobs]
+
+    def guardar_varios(self, pares):
+        """pares: [(chave, xml)] recém-renderizados"""
+        blobs = [(chave, zlib.compress(xml.encode('utf-8'), 1)) for chave, xml in pares]
+        for chave, blob in blobs:
+            self._guarda(chave, blob)
+        self._grava_disco(blobs)
+
+    def _guarda(self, chave, blob):
+        if len(blob) > self.limite_bytes:
+            return
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self.bytes -= len(antigo)
+            self._itens[chave] = blob
+            self.bytes += len(blob)
+            while self.bytes > self.limite_bytes:
+                _, velho = self._itens.popitem(last=False)
+                self.bytes -= len(velho)
+                self.despejos += 1
+
+    def _conectar(self):
+        if not self._db_pronto:
+            os.makedirs(os.path.dirname(self.caminho_db), exist_ok=True)
+        con = sqlite3.connect(self.caminho_db, timeout=30, isolation_level=None)
+        if not self._db_pronto:
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute("CREATE TABLE IF NOT EXISTS paragrafos ("
+                        "chave BLOB PRIMARY KEY, dados BLOB NOT NULL, bytes INTEGER NOT NULL, usado REAL NOT NULL)")
+            con.execute("CREATE INDEX IF NOT EXISTS paragrafos_usado ON paragrafos (usado)")
+            self._db_pronto = True
+        con.execute('PRAGMA synchronous=NORMAL')
+        return con
+
+    def _ler_disco(self, chaves):
+        """{chave: blob} das chaves presentes no disco; erros do SQLite valem como ausência"""
+        if self.caminho_db is None:
+            return {}
+        achados = {}
+        try:
+            con = self._conectar()
+            try:
+                for k in range(0, len(chaves), _LOTE_SQL):
+                    bloco = chaves[k:k + _LOTE_SQL]
+                    marcas = ','.join('?' * len(bloco))
+                    achados.update(con.execute(
+                        f"SELECT chave, dados FROM paragrafos WHERE chave IN ({marcas})", bloco).fetchall())
+                if achados:
+                    agora = time.time()
+                    con.executemany("UPDATE paragrafos SET usado = ? WHERE chave = ?",
+                                    [(agora, c) for c in achados])
+            finally:
+                con.close()
+        except sqlite3.Error:
+            pass
+        return achados
+
+    def _grava_disco(self, blobs):
+        if self.caminho_db is None or not blobs:
+            return
+        agora = time.time()
+        try:
+            con = self._conectar()
+            try:
+                con.executemany("INSERT OR REPLACE INTO paragrafos (chave, dados, bytes, usado) VALUES (?, ?, ?, ?)",
+                                [(c, b, len(b), agora) for c, b in blobs])
+                self._podar_disco(con)
+            finally:
+                con.close()
+        except sqlite3.Error:
+            pass
+
+    def _podar_disco(self, con):
+        """Acima de limite_disco, remove os parágrafos usados há mais tempo"""
+        if self.limite_disco is None:
+            return
+        excesso = (con.execute("SELECT COALESCE(SUM(bytes), 0) FROM paragrafos").fetchone()[0]
+                   - self.limite_disco)
+        if excesso <= 0:
+            return
+        velhos = []
+        for chave, tamanho in con.execute("SELECT chave, bytes FROM paragrafos ORDER BY usado"):
+            velhos.append((chave,))
+            excesso -= tamanho
+            if excesso <= 0:
+                break
+        con.executemany("DELETE FROM paragrafos WHERE chave = ?", velhos)
+        with self._lock:
+            self.despejos_disco += len(velhos)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.hits + self.hits_disco + self.misses
+            return {
+                'hits': self.hits,
+                'hits_disco': self.hits_disco,
+                'misses': self.misses,
+                'taxa_acerto': round((self.hits + self.hits_disco) / consultas, 4) if consultas else None,
+                'despejos': self.despejos,
+                'despejos_disco': self.despejos_disco,
+                'itens': len(self._itens),
+                'bytes': self.bytes,
+                'limite_bytes': self.limite_bytes,
+                'limite_disco': self.limite_disco if self.caminho_db else None,
+                'pid': os.getpid(),
+            }
+
+_CACHE_PARAGRAFOS = _CacheParagrafos(
+    int(os.environ.get('MEMORIAL_CACHE_PARAGRAFOS_MB', '64')) * 1024 * 1024,
+    pasta=os.environ.get('MEMORIAL_CACHE_DIR') or None,
+    limite_disco=int(os.environ.get('MEMORIAL_CACHE_PARAGRAFOS_DISCO_MB', '256')) * 1024 * 1024,
+)
+
+def estatisticas_paragrafos():
+    return _CACHE_PARAGRAFOS.estatisticas()
+
+def _chave_params_lote(params):
+    """Campos do formulário que mudam o texto de um lote (os demais não entram na chave)"""
+    coord_fmt = params.get('coord_fmt', 'utm')
+    eh_condominio = bool(params.get('eh_condominio'))
+    ane = params.get('ane_largura_m') if params.get('ane_enable') else None
+    return repr((
+        VERSAO_BUILDERS,
+        (params.get('tipo_full') or "").lower() in _TIPOS_LOTE_COND,
+        params.get('endereco'), params.get('bairro'), params.get('cidade'),
+        ane,
+        eh_condominio,
+        (params.get('area_tot_priv'), params.get('area_tot_cond')) if eh_condominio else None,
+        coord_fmt,
+        None if coord_fmt == 'utm' else (int(params.get('zone_num', 22)), params.get('hemi', 'S')),
+    )).encode('utf-8')
+
+def _chave_lote(quadra, parcel, chave_params):
+    dados = (quadra, parcel.get('num'), parcel.get('area_m2'),
+             parcel.get('first_point'), parcel.get('segments'))
+    h = hashlib.blake2b(chave_params, digest_size=20)
+    h.update(pickle.dumps(dados, protocol=pickle.HIGHEST_PROTOCOL))
+    return h.digest()
+
+def renderizar_lotes(corpo, lotes, params, modelo=None):
+    """
+    Escreve no corpo um parágrafo por lote, na ordem de lotes ([(quadra, parcela)]).
+    params: argumentos nomeados de build_memorial_text (exceto parcel/quadra/modelo).
+    Lotes já renderizados com os mesmos dados vêm do cache de parágrafos.
+    """
+    chave_params = _chave_params_lote(params)
+    chaves = [_chave_lote(quadra, parcel, chave_params) for quadra, parcel in lotes]
+    xmls = _CACHE_PARAGRAFOS.consultar_varios(chaves)
+    pendentes = [i for i, xml in enumerate(xmls) if xml is None]
+
+    coord = (params.get('coord_fmt', 'utm'), params.get('zone_num', 22), params.get('hemi', 'S'))
+    trechos = []
+    for k in range(0, len(pendentes), _LOTES_POR_TAREFA):
+        posicoes = pendentes[k:k + _LOTES_POR_TAREFA]
+        trechos.append((posicoes, [(lotes[i][0], lotes[i][1], *_geometria_item(lotes[i][1], *coord, modelo))
+                                   for i in posicoes]))
+
+    futuros = []
+    if len(pendentes) >= _PARALELO_MIN_LOTES and _POOL_RENDER.processos() > 1:
+        try:
+            pool = _POOL_RENDER.obter()
+            futuros = [pool.submit(_xml_lotes, itens, params) for _, itens in trechos]
+        except (OSError, RuntimeError, BrokenProcessPool):
+            _POOL_RENDER.descartar()
+            futuros = []
+
+    escritos = 0
+    for t, (posicoes, itens) in enumerate(trechos):
+        novos = _POOL_RENDER.resultado(futuros[t]) if futuros else None
+        if novos is None:
+            futuros = []
+            novos = _xml_lotes(itens, params)
+        for i, xml in zip(posicoes, novos):
+            xmls[i] = xml
+        _CACHE_PARAGRAFOS.guardar_varios([(chaves[i], xmls[i]) for i in posicoes])
+        # tudo antes do próximo lote pendente já está pronto: vai para o corpo
+        limite = trechos[t + 1][0][0] if t + 1 < len(trechos) else len(xmls)
+        corpo.escrever(''.join(xmls[escritos:limite]), limite - escritos)
+        escritos = limite
+    if escritos < len(xmls):
+        corpo.escrever(''.join(xmls[escritos:]), len(xmls) - escritos)
 
 # ===================== Funções auxiliares para Memorial Resumo =====================
 def _join_com_e(itens):
@@ -974,7 +2600,107 @@ def _sec_assinaturas_resumo(doc):
     _set_run_defaults(r)
 
 # ===================== Funções de geração web (adaptadas) =====================
-def _build_memorial_resumo_doc_web(form_data, output_dir):
+# Versão da saída dos builders: entra na chave do cache de artefatos do app.
+# Mudou o texto/formatação de algum documento? Incremente.
+VERSAO_BUILDERS = 5
+
+def versao_artefatos():
+    """Tudo que versiona o conteúdo gerado: builders, leitores de relatório e imagens da marca"""
+    return {'builders': VERSAO_BUILDERS, 'leitores': dict(_VERSOES_LEITOR), 'marca': ARMAZEM_MARCA.versao()}
+
+# Saída dos builders: o documento é salvo num buffer (SpooledTemporaryFile, que só
+# vai para o disco acima de _SPOOL_MAX) e conferido pela estrutura do pacote —
+# diretório central do ZIP e corpo do document.xml — sem reabrir com python-docx.
+# Sem output_dir o builder devolve o ArtefatoGerado; com output_dir, grava o
+# arquivo uma vez e devolve o caminho.
+_SPOOL_MAX = 32 * 1024 * 1024
+_MIMETYPES_ARTEFATO = {
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.zip': 'application/zip',
+}
+_PARTE_PRINCIPAL = {'.docx': 'word/document.xml', '.xlsx': 'xl/workbook.xml'}
+_CONTEUDO_CORPO = re.compile(rb'<w:(?:p|tbl)[ >/]')
+
+class ArtefatoGerado:
+    """Arquivo gerado em memória: nome + buffer posicionado no início"""
+
+    def __init__(self, nome, buffer):
+        self.nome = nome
+        self.buffer = buffer
+        buffer.seek(0, os.SEEK_END)
+        self.tamanho = buffer.tell()
+        buffer.seek(0)
+
+    @property
+    def mimetype(self):
+        return _MIMETYPES_ARTEFATO.get(os.path.splitext(self.nome)[1].lower(), 'application/octet-stream')
+
+    def abrir(self):
+        self.buffer.seek(0)
+        return self.buffer
+
+    def gravar(self, caminho):
+        with open(caminho, 'wb') as f:
+            shutil.copyfileobj(self.abrir(), f, 1 << 20)
+        return caminho
+
+    def fechar(self):
+        self.buffer.close()
+
+def verificar_ooxml(buffer, nome):
+    """Conferência estrutural de um DOCX/XLSX; ValueError se estiver inválido"""
+    ext = os.path.splitext(nome)[1].lower()
+    buffer.seek(0)
+    try:
+        with zipfile.ZipFile(buffer) as zf:
+            parte = _PARTE_PRINCIPAL.get(ext)
+            if parte is None:
+                return
+            try:
+                info = zf.getinfo(parte)
+            except KeyError:
+                raise ValueError(f"{nome}: pacote sem {parte}")
+            if ext != '.docx':
+                return
+            # corpo não vazio: procura o primeiro parágrafo/tabela lendo em blocos
+            with zf.open(info) as xml:
+                anterior = b''
+                while True:
+                    bloco = xml.read(1 << 16)
+                    if not bloco:
+                        raise ValueError(f"{nome}: documento sem parágrafos")
+                    if _CONTEUDO_CORPO.search(anterior + bloco):
+                        return
+                    anterior = bloco[-16:]
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"{nome}: arquivo ZIP inválido ({e})")
+    finally:
+        buffer.seek(0)
+
+def _saida_builder(documento, nome, output_dir=None, corpo=None):
+    """Salva documento (python-docx/openpyxl) no buffer, confere e entrega"""
+    buffer = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+    documento.save(buffer)
+    if corpo is not None:
+        try:
+            buffer = _inserir_corpo(buffer, corpo)
+        finally:
+            corpo.fechar()
+    return _saida_builder_pronto(buffer, nome, output_dir)
+
+def _saida_builder_pronto(buffer, nome, output_dir=None):
+    """Confere o arquivo já gravado em buffer e entrega (ArtefatoGerado ou caminho)"""
+    verificar_ooxml(buffer, nome)
+    artefato = ArtefatoGerado(nome, buffer)
+    if output_dir is None:
+        return artefato
+    try:
+        return artefato.gravar(os.path.join(output_dir, nome))
+    finally:
+        artefato.fechar()
+
+def _build_memorial_resumo_doc_web(form_data, output_dir=None):
     """
     Gera o 'Memorial Descritivo/Resumo' com:
     - Capa: título + subtítulo + Sumário
@@ -1641,53 +3367,17 @@ def _build_memorial_resumo_doc_web(form_data, output_dir):
     ano = str(hoje.year)
     _set_run_defaults(p.add_run(f"Porto Alegre, {dia} de {mes} de {ano}."))
 
-    # Assinaturas / rodapé / paginação
+    # Assinaturas (rodapé e paginação vêm do modelo base)
     _sec_assinaturas_resumo(doc)
-    add_footer_left_text(doc, [
-        "WWW.SOLIDO.ARQ.BR",
-        "Avenida Ipiranga, 6681 – Prédio 99, Sala 906",
-        "Porto Alegre – RS Brasil",
-        "+ 55 51 99690-7857",
-    ], size_pt=10)
-    add_page_numbers(doc)
 
-    out_path = os.path.join(output_dir, "memorial_resumo.docx")
-    
     # Verificar se o documento tem conteúdo antes de salvar
     para_count = len(doc.paragraphs)
     if para_count == 0:
         raise Exception("Documento está vazio antes de salvar! Nenhum parágrafo foi adicionado.")
     
-    try:
-        doc.save(out_path)
-        print(f"✅ Documento salvo: {out_path}, Parágrafos: {para_count}")
-    except Exception as e:
-        import traceback
-        print(f"❌ ERRO ao salvar documento: {e}")
-        traceback.print_exc()
-        raise
-    
-    # Verificar se o arquivo foi salvo corretamente
-    if not os.path.exists(out_path):
-        raise Exception(f"Arquivo não foi criado: {out_path}")
-    
-    file_size = os.path.getsize(out_path)
-    if file_size == 0:
-        raise Exception(f"Arquivo foi salvo vazio: {out_path}")
-    
-    # Verificar se o conteúdo foi preservado
-    try:
-        from docx import Document
-        doc_check = Document(out_path)
-        if len(doc_check.paragraphs) == 0:
-            raise Exception(f"Arquivo salvo mas está vazio ao ler: {out_path}")
-        print(f"✅ Arquivo verificado: {len(doc_check.paragraphs)} parágrafos")
-    except Exception as e:
-        print(f"⚠️ Aviso ao verificar arquivo salvo: {e}")
-    
-    return out_path
+    return _saida_builder(doc, "memorial_resumo.docx", output_dir)
 
-def _build_solicitacao_analise_doc_web(form_data, output_dir):
+def _build_solicitacao_analise_doc_web(form_data, output_dir=None):
     """
     Gera o DOCX do tipo 'Solicitação de Análise'
     Adaptada do código original do Xuxu.py
@@ -1814,39 +3504,21 @@ def _build_solicitacao_analise_doc_web(form_data, output_dir):
     _set_run_defaults(p.add_run("Grupo Solido e "))
     _add_hl(p, "XXXX")
     
-    # Rodapé padrão + numeração
-    add_footer_left_text(doc, [
-        "WWW.SOLIDO.ARQ.BR",
-        "Avenida Ipiranga, 6681 – Prédio 99, Sala 906",
-        "Porto Alegre – RS Brasil",
-        "+ 55 51 99690-7857",
-    ], size_pt=10)
-    add_page_numbers(doc)
-    
     # Verificar se o documento tem conteúdo antes de salvar
     para_count = len(doc.paragraphs)
     if para_count == 0:
         raise Exception("Documento está vazio antes de salvar! Nenhum parágrafo foi adicionado.")
     
-    out_path = os.path.join(output_dir, "solicitacao_analise.docx")
-    try:
-        doc.save(out_path)
-        print(f"✅ Documento salvo: {out_path}, Parágrafos: {para_count}")
-    except Exception as e:
-        import traceback
-        print(f"❌ ERRO ao salvar documento: {e}")
-        traceback.print_exc()
-        raise
-    
-    return out_path
+    return _saida_builder(doc, "solicitacao_analise.docx", output_dir)
 
-def build_unif_desm_doc_web(form_data, uploaded_files, modo, output_dir):
+def build_unif_desm_doc_web(form_data, uploaded_files, modo, output_dir=None):
     """
     Gera memorial descritivo de unificação/desmembramento
     Adaptada do código original do Xuxu.py
     """
     # Coletar itens de unificação e desmembramento
-    unif_item, desm_items = _collect_items_unif_desm_web(uploaded_files, modo)
+    modelo = obter_modelo_projeto(uploaded_files)
+    unif_item, desm_items = _collect_items_unif_desm_web(uploaded_files, modo, modelo)
     
     doc = preparar_doc()
     pres_unif = bool(unif_item)
@@ -1858,66 +3530,72 @@ def build_unif_desm_doc_web(form_data, uploaded_files, modo, output_dir):
     
     zone_num, hemi = _auto_zone_from_city(form_data.get('cidade_emp', '') or '')
     if pres_unif:
-        _sec_unificacao(doc, form_data, unif_item)
+        _sec_unificacao(doc, form_data, unif_item, modelo)
     if pres_desm:
-        _sec_desmembramento(doc, form_data, desm_items, zone_num, hemi)
+        _sec_desmembramento(doc, form_data, desm_items, zone_num, hemi, modelo)
     
     _sec_assinaturas_simples(doc)
-    add_footer_left_text(doc, [
-        "WWW.SOLIDO.ARQ.BR",
-        "Avenida Ipiranga, 6681 – Prédio 99, Sala 906",
-        "Porto Alegre – RS Brasil",
-        "+ 55 51 99690-7857",
-    ], size_pt=10)
-    add_page_numbers(doc)
     
     # Verificar se o documento tem conteúdo antes de salvar
     para_count = len(doc.paragraphs)
     if para_count == 0:
         raise Exception("Documento está vazio antes de salvar! Nenhum parágrafo foi adicionado.")
     
-    out_path = os.path.join(output_dir, "unif_desm.docx")
-    try:
-        doc.save(out_path)
-        print(f"✅ Documento salvo: {out_path}, Parágrafos: {para_count}")
-    except Exception as e:
-        import traceback
-        print(f"❌ ERRO ao salvar documento: {e}")
-        traceback.print_exc()
-        raise
-    
-    return out_path
+    return _saida_builder(doc, "unif_desm.docx", output_dir)
+
+# ===================== Fração ideal (condomínio) =====================
+# Mesmas linhas na tabela do memorial e na planilha: calculadas a partir dos
+# lotes do ModeloProjeto e das áreas totais do formulário.
+def _areas_totais_condominio(form_data):
+    """(área privativa total, área de uso comum total) do formulário; 0.0 se vazia/inválida"""
+    totais = []
+    for campo in ('area_tot_priv_emp', 'area_tot_cond_emp'):
+        txt = form_data.get(campo, '') or ''
+        try:
+            totais.append(_to_float_br(txt) if txt.strip() else 0.0)
+        except ValueError:
+            totais.append(0.0)
+    return tuple(totais)
 
-def build_condominio_loteamento_doc_web(form_data, uploaded_files, modo, output_dir):
+def _linhas_fracao_ideal(file_parcels, area_tot_priv, area_tot_cond):
+    """
+    [(lote, quadra, área privativa, área de uso comum, área real total, fração)]
+    já formatadas e ordenadas por quadra e número do lote
+    """
+    linhas = []
+    if area_tot_priv <= 0:
+        return linhas
+    for quadra, parcels in file_parcels:
+        for parcel in parcels:
+            area_priv = parcel.get("area_m2")
+            if area_priv:
+                fr = area_priv / area_tot_priv
+                area_comum = fr * (area_tot_cond or 0.0)
+                area_total = area_priv + area_comum
+                linhas.append((
+                    str(parcel['num']),
+                    quadra.replace("QUADRA ", "").strip(),
+                    _fmt_br(area_priv, 2),
+                    _fmt_br(area_comum, 2),
+                    _fmt_br(area_total, 2),
+                    f"{fr:.7f}",
+                ))
+    linhas.sort(key=lambda row: (quadra_label_sort_key(f"QUADRA {row[1]}"), _lote_num(row[0])))
+    return linhas
+
+def build_condominio_loteamento_doc_web(form_data, uploaded_files, modo, output_dir=None):
     """
     Gera memorial descritivo de condomínio/loteamento
     Adaptada do código original do Xuxu.py
     """
     nome_fmt, end_fmt, cid_fmt, bai_fmt = _get_fmt_campos_basicos(form_data)
+    volumes = _volumes_pedido(form_data)
     
-    # Separar arquivos de lotes dos arquivos Civil 3D
-    lot_files = [(f, d) for f, d in uploaded_files.items()
-                 if f.lower().endswith(('.html', '.htm', '.txt')) and 'CIVILREPORT' not in f.upper()]
-    civil_files = [(f, d) for f, d in uploaded_files.items()
-                   if f.lower().endswith(('.html', '.htm')) and 'CIVILREPORT' in f.upper()]
-    
-    # Processar arquivos de lotes
-    file_parcels, all_parcels = [], []
-    for fname, data in lot_files:
-        quadra = infer_quadra_from_filename(fname)
-        if fname.lower().endswith(('.html', '.htm')):
-            parcels = parse_parcels_from_html(io.BytesIO(data).read())
-        else:
-            parcels = parse_parcels_from_txt(data)
-        parcels.sort(key=lambda p: p.get('num', 0))
-        file_parcels.append((quadra, parcels))
-        all_parcels.extend(parcels)
+    # Arquivos de lotes e do Civil 3D lidos uma vez por conjunto de uploads
+    modelo = obter_modelo_projeto(uploaded_files)
     
-    # Ordenar por quadra
-    file_parcels.sort(key=lambda qp: quadra_label_sort_key(qp[0]))
-    for i, (quadra, parcels) in enumerate(file_parcels):
-        parcels.sort(key=lambda p: int(p.get('num', 0)))
-        file_parcels[i] = (quadra, parcels)
+    # Arquivos de lotes por quadra (ordenados por quadra e número do lote)
+    file_parcels = modelo.lotes_por_quadra()
     
     tipo_full = "Condomínio Fechado de Lotes Residenciais" if modo == 'condominio' else "Loteamento de Acesso Controlado"
     eh_condominio = (modo == 'condominio')
@@ -1925,18 +3603,7 @@ def build_condominio_loteamento_doc_web(form_data, uploaded_files, modo, output_
     # Calcular áreas totais
     area_tot_priv = area_tot_cond = 0.0
     if eh_condominio:
-        area_tot_priv_str = form_data.get('area_tot_priv_emp', '') or ''
-        if area_tot_priv_str.strip():
-            try:
-                area_tot_priv = _to_float_br(area_tot_priv_str)
-            except:
-                area_tot_priv = 0.0
-        area_tot_cond_str = form_data.get('area_tot_cond_emp', '') or ''
-        if area_tot_cond_str.strip():
-            try:
-                area_tot_cond = _to_float_br(area_tot_cond_str)
-            except:
-                area_tot_cond = 0.0
+        area_tot_priv, area_tot_cond = _areas_totais_condominio(form_data)
     
     # Ane (Área Não Edificável)
     ane_drop = form_data.get('ane_drop', 'Não') or 'Não'
@@ -1951,9 +3618,7 @@ def build_condominio_loteamento_doc_web(form_data, uploaded_files, modo, output_
                 ane_largura_m = None
     
     # Processar arquivos Civil 3D
-    civil_items = []
-    for fname, data in civil_files:
-        civil_items.extend(parse_civilreport_from_html(io.BytesIO(data).read()))
+    civil_items = modelo.itens_civil()
     
     # Classificar itens do Civil 3D
     grouped = {k: [] for k in [
@@ -2056,6 +3721,9 @@ def build_condominio_loteamento_doc_web(form_data, uploaded_files, modo, output_
     else:
         R(p2, "Segue abaixo a descrição completa deste empreendimento. Coordenadas georreferenciadas ao Sistema Geodésico Brasileiro, referidas ao Datum SIRGAS 2000, expressas em coordenadas geográficas (latitude e longitude) em graus, minutos e segundos.")
     
+    # Seções de áreas e lotes: XML direto no document.xml (ver _CorpoOOXML)
+    corpo = _CorpoOOXML(doc)
+    
     # Seções de áreas (remanescente, institucional, etc.)
     session_order = ['remanescente', 'institucional', 'reserva_tecnica', 'app', 'verde', 'verde_preservacao', 'viario', 'condominial']
     for cat in session_order:
@@ -2067,7 +3735,7 @@ def build_condominio_loteamento_doc_web(form_data, uploaded_files, modo, output_
             for title, it in grouped[cat]:
                 buckets.setdefault(title, []).append(it)
             for gen_title, arr in buckets.items():
-                heading(doc, gen_title)
+                corpo.titulo(gen_title)
                 for it in arr:
                     texto = build_area_text(
                         it['name'], it, tipo_full, nome_fmt or "XXXX",
@@ -2075,12 +3743,13 @@ def build_condominio_loteamento_doc_web(form_data, uploaded_files, modo, output_
                         ane_enable=False,
                         coord_fmt=coord_fmt,
                         zone_num=zone_num,
-                        hemi=hemi
+                        hemi=hemi,
+                        modelo=modelo
                     )
-                    adicionar_texto_formatado(doc, texto)
+                    corpo.paragrafo(texto)
         else:
             title_cat = grouped[cat][0][0]
-            heading(doc, title_cat)
+            corpo.titulo(title_cat)
             for _, it in grouped[cat]:
                 texto = build_area_text(
                     it['name'], it, tipo_full, nome_fmt or "XXXX",
@@ -2088,183 +3757,281 @@ def build_condominio_loteamento_doc_web(form_data, uploaded_files, modo, output_
                     ane_enable=False,
                     coord_fmt=coord_fmt,
                     zone_num=zone_num,
-                    hemi=hemi
+                    hemi=hemi,
+                    modelo=modelo
                 )
-                adicionar_texto_formatado(doc, texto)
+                corpo.paragrafo(texto)
     
     # Descrição de Quadras
-    heading(doc, "DESCRIÇÃO DE QUADRAS")
-    pqd = doc.add_paragraph()
-    runxx = pqd.add_run("XXXX")
-    _set_run_defaults(runxx)
-    runxx.font.highlight_color = WD_COLOR_INDEX.YELLOW
-    
-    # Descrição de Lotes
-    heading(doc, "DESCRIÇÃO DE LOTES")
-    dados_quadro = []
-    for quadra, parcels in file_parcels:
-        for parcel in parcels:
-            texto_lote = build_memorial_text(
-                parcel, quadra, tipo_full, nome_fmt or "XXXX",
-                end_fmt or "XXXX", bai_fmt or "XXXX", cid_fmt or "XXXX",
-                ane_enable=ane_enable,
-                ane_largura_m=ane_largura_m,
-                eh_condominio=eh_condominio,
-                area_tot_priv=area_tot_priv,
-                area_tot_cond=area_tot_cond,
-                coord_fmt=coord_fmt,
-                zone_num=zone_num,
-                hemi=hemi
+    corpo.titulo("DESCRIÇÃO DE QUADRAS")
+    corpo.paragrafo_runs(Spans().destaque())
+    
+    # Descrição de Lotes (no próprio documento ou em volumes separados)
+    corpo.titulo("DESCRIÇÃO DE LOTES")
+    params_lotes = dict(
+        tipo_full=tipo_full,
+        empreendimento=nome_fmt or "XXXX",
+        endereco=end_fmt or "XXXX",
+        bairro=bai_fmt or "XXXX",
+        cidade=cid_fmt or "XXXX",
+        ane_enable=ane_enable,
+        ane_largura_m=ane_largura_m,
+        eh_condominio=eh_condominio,
+        area_tot_priv=area_tot_priv,
+        area_tot_cond=area_tot_cond,
+        coord_fmt=coord_fmt,
+        zone_num=zone_num,
+        hemi=hemi,
+    )
+    if volumes is None:
+        renderizar_lotes(
+            corpo,
+            [(quadra, parcel) for quadra, parcels in file_parcels for parcel in parcels],
+            params_lotes,
+            modelo=modelo,
+        )
+    else:
+        planos = _planejar_volumes(file_parcels, volumes)
+        for nome_vol, titulo, lotes in planos:
+            corpo.paragrafo(
+                Spans().negrito(f"{titulo}:")
+                .texto(f" lotes {lotes[0][1]['num']} a {lotes[-1][1]['num']}, descritos no arquivo {nome_vol}.")
             )
-            adicionar_texto_formatado(doc, texto_lote)
-            
-            if eh_condominio:
-                area_priv = parcel.get("area_m2")
-                if area_priv and area_tot_priv > 0:
-                    fr = area_priv / area_tot_priv
-                    area_comum = fr * (area_tot_cond or 0.0)
-                    area_total = area_priv + area_comum
-                    dados_quadro.append({
-                        'Lote': str(parcel['num']),
-                        'Quadra': quadra.replace("QUADRA ", "").strip(),
-                        'Área Privativa (m²)': _fmt_br(area_priv, 2),
-                        'Área Uso Comum (m²)': _fmt_br(area_comum, 2),
-                        'Área Real Total (m²)': _fmt_br(area_total, 2),
-                        'Fração Ideal': f"{fr:.7f}"
-                    })
-    
-    # Tabela de fração ideal (se condomínio)
-    if eh_condominio and dados_quadro:
-        dados_quadro.sort(key=lambda row: (quadra_label_sort_key(f"QUADRA {row['Quadra']}"), _lote_num(row['Lote'])))
-        tabela = doc.add_table(rows=1, cols=6)
-        tabela.style = 'Table Grid'
-        
-        # Adicionar bordas
-        for row in tabela.rows:
-            for cell in row.cells:
-                tc_pr = cell._tc.get_or_add_tcPr()
-                tc_borders = OxmlElement('w:tcBorders')
-                for border_name in ('top', 'left', 'bottom', 'right'):
-                    b = OxmlElement(f'w:{border_name}')
-                    b.set(qn('w:val'), 'single')
-                    b.set(qn('w:sz'), '4')
-                    b.set(qn('w:space'), '0')
-                    b.set(qn('w:color'), '000000')
-                    tc_borders.append(b)
-                tc_pr.append(tc_borders)
-        
-        # Cabeçalho
-        hdr = tabela.rows[0].cells
-        hdr[0].text = "Lote"
-        hdr[1].text = "Quadra"
-        hdr[2].text = "Área Priv. (m²)"
-        hdr[3].text = "Área Uso Comum (m²)"
-        hdr[4].text = "Área Real Total (m²)"
-        hdr[5].text = "Fração Ideal"
-        for c in hdr:
-            p = c.paragraphs[0]
-            p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-            for run in p.runs:
-                _set_run_defaults(run, bold=True)
-        
-        # Dados
-        for row in dados_quadro:
-            cells = tabela.add_row().cells
-            cells[0].text = row.get('Lote', '')
-            cells[1].text = row.get('Quadra', '')
-            cells[2].text = row.get('Área Privativa (m²)', '')
-            cells[3].text = row.get('Área Uso Comum (m²)', '')
-            cells[4].text = row.get('Área Real Total (m²)', '')
-            cells[5].text = row.get('Fração Ideal', '')
-            for c in cells:
-                for par in c.paragraphs:
-                    par.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                    for run in par.runs:
-                        _set_run_defaults(run)
-    
-    # Assinaturas, rodapé e paginação
+
+    # Tabela de fração ideal (se condomínio), escrita de uma vez no corpo XML
+    dados_quadro = _linhas_fracao_ideal(file_parcels, area_tot_priv, area_tot_cond) if eh_condominio else []
+    if dados_quadro:
+        corpo.tabela(
+            ("Lote", "Quadra", "Área Priv. (m²)", "Área Uso Comum (m²)", "Área Real Total (m²)", "Fração Ideal"),
+            dados_quadro,
+        )
+    
+    # Assinaturas (rodapé e paginação vêm do modelo base)
     _sec_assinaturas_simples(doc)
-    add_footer_left_text(doc, [
-        "WWW.SOLIDO.ARQ.BR",
-        "Avenida Ipiranga, 6681 – Prédio 99, Sala 906",
-        "Porto Alegre – RS Brasil",
-        "+ 55 51 99690-7857",
-    ], size_pt=10)
-    add_page_numbers(doc)
     
     # Verificar se o documento tem conteúdo antes de salvar
     para_count = len(doc.paragraphs)
     if para_count == 0:
         raise Exception("Documento está vazio antes de salvar! Nenhum parágrafo foi adicionado.")
     
-    out_path = os.path.join(output_dir, "memorial_lotes.docx")
+    if volumes is None:
+        return _saida_builder(doc, "memorial_lotes.docx", output_dir, corpo=corpo)
+    geral = _saida_builder(doc, "00_memorial_geral.docx", corpo=corpo)
+    return _pacote_volumes(geral, planos, params_lotes, modelo, output_dir)
+
+# ===================== Volumes por quadra =====================
+# Em projetos com milhares de lotes o memorial único fica pesado para salvar,
+# baixar e paginar no Word. Com o campo "volumes" o builder entrega um ZIP: o
+# volume geral (abertura, áreas, quadro de frações) e um DOCX por quadra (ou
+# por até N lotes da quadra), gerados em paralelo no pool de renderização. Cada
+# processo monta e grava um volume por vez, então a memória de cada um fica
+# limitada ao maior volume.
+def _volumes_pedido(form_data):
+    """
+    None (documento único), 0 (um volume por quadra) ou N (volumes de até N lotes).
+    N <= 0 é pedido inválido (ValueError), nunca "um lote por volume".
+    """
+    valor = str(form_data.get('volumes', '') or '').strip().lower()
+    if valor == 'quadra':
+        return 0
     try:
-        doc.save(out_path)
-        print(f"✅ Documento salvo: {out_path}, Parágrafos: {para_count}")
-    except Exception as e:
-        import traceback
-        print(f"❌ ERRO ao salvar documento: {e}")
-        traceback.print_exc()
+        por = int(valor)
+    except ValueError:
+        return None
+    if por <= 0:
+        raise ValueError(f"Lotes por volume deve ser positivo (recebido: {valor})")
+    return por
+
+_NOME_VOLUME_INVALIDO = re.compile(r'\W+')
+
+def _nome_volume(i, titulo):
+    return f"{i:02d}_{_NOME_VOLUME_INVALIDO.sub('_', titulo).strip('_')}.docx"
+
+def _planejar_volumes(file_parcels, por):
+    """[(nome do arquivo, título, [(quadra, parcela)])] na ordem do memorial"""
+    planos = []
+    for quadra, parcels in file_parcels:
+        if not parcels:
+            continue
+        partes = [parcels] if not por else [parcels[i:i + por] for i in range(0, len(parcels), por)]
+        for k, parte in enumerate(partes, 1):
+            titulo = quadra if len(partes) == 1 else f"{quadra} (PARTE {k})"
+            planos.append((_nome_volume(len(planos) + 1, titulo), titulo, [(quadra, p) for p in parte]))
+    return planos
+
+def _gravar_volume(pasta, nome, titulo, lotes, params):
+    """Monta e grava o DOCX de um volume; lotes: [(quadra, parcela, ponto inicial, destinos)]"""
+    doc = preparar_doc()
+    heading(doc, "MEMORIAL DESCRITIVO")
+    corpo = _CorpoOOXML(doc)
+    corpo.titulo(f"DESCRIÇÃO DE LOTES – {titulo}")
+    renderizar_lotes(corpo, [(quadra, parcel) for quadra, parcel, _, _ in lotes], params,
+                     modelo=_GeometriasProntas(lotes))
+    _sec_assinaturas_simples(doc)
+    return _saida_builder(doc, nome, pasta, corpo=corpo)
+
+def _pacote_volumes(geral, planos, params, modelo, output_dir=None):
+    """ZIP com o volume geral e os volumes de lotes (na ordem de planos)"""
+    coord = (params.get('coord_fmt', 'utm'), params.get('zone_num', 22), params.get('hemi', 'S'))
+    tarefas = [(nome, titulo, [(quadra, parcel, *_geometria_item(parcel, *coord, modelo))
+                               for quadra, parcel in lotes])
+               for nome, titulo, lotes in planos]
+    buffer = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+    try:
+        with tempfile.TemporaryDirectory(prefix='memorial-volumes-') as pasta:
+            futuros = []
+            if len(tarefas) > 1 and _POOL_RENDER.processos() > 1:
+                try:
+                    pool = _POOL_RENDER.obter()
+                    futuros = [pool.submit(_gravar_volume, pasta, *t, params) for t in tarefas]
+                except (OSError, RuntimeError, BrokenProcessPool):
+                    _POOL_RENDER.descartar()
+                    futuros = []
+
+            # DOCX já é comprimido: os volumes entram no ZIP sem recompressão
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+                info = zipfile.ZipInfo(geral.nome, datetime.now().timetuple()[:6])
+                with zf.open(info, 'w') as destino:
+                    shutil.copyfileobj(geral.abrir(), destino, 1 << 20)
+                for i, tarefa in enumerate(tarefas):
+                    caminho = _POOL_RENDER.resultado(futuros[i]) if futuros else None
+                    if caminho is None:
+                        futuros = []
+                        caminho = _gravar_volume(pasta, *tarefa, params)
+                    zf.write(caminho, tarefa[0])
+                    os.remove(caminho)
+    except BaseException:
+        buffer.close()
         raise
-    
-    # Verificar se o arquivo foi salvo corretamente
-    if not os.path.exists(out_path):
-        raise Exception(f"Arquivo não foi criado: {out_path}")
-    
-    file_size = os.path.getsize(out_path)
-    if file_size == 0:
-        raise Exception(f"Arquivo foi salvo vazio: {out_path}")
-    
-    return out_path
+    finally:
+        geral.fechar()
+    return _saida_builder_pronto(buffer, "memorial_lotes.zip", output_dir)
 
-def build_excel_fracao_ideal_web(form_data, uploaded_files, output_dir):
+_COLUNAS_FRACAO_IDEAL = (
+    'Lote', 'Quadra', 'Área Privativa (m²)', 'Área Uso Comum (m²)',
+    'Área Real Total (m²)', 'Fração Ideal'
+)
+
+def build_excel_fracao_ideal_web(form_data, uploaded_files, output_dir=None):
     """
-    Gera Excel de Fração Ideal (somente condomínio)
-    Adaptada do código original do Xuxu.py
+    Gera Excel de Fração Ideal (somente condomínio) direto dos lotes do
+    ModeloProjeto, em uma passada (openpyxl write-only, larguras pré-calculadas)
     """
-    import pandas as pd
-    from openpyxl import load_workbook
-    from openpyxl.styles import Font, Alignment, Border, Side
-    
-    # Para gerar o Excel de fração ideal, precisamos dos dados_quadro
-    # que são gerados durante a criação do documento de condomínio
-    # Como não temos acesso a essas variáveis globais, vamos gerar um Excel vazio
-    # com a estrutura correta, ou retornar erro informando que é necessário gerar o DOCX primeiro
-    
-    # Por enquanto, vamos criar um Excel vazio com a estrutura correta
-    df = pd.DataFrame(columns=[
-        'Lote', 'Quadra', 'Área Privativa (m²)', 'Área Uso Comum (m²)', 
-        'Área Real Total (m²)', 'Fração Ideal'
-    ])
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, Border, Side, NamedStyle
+    from openpyxl.utils import get_column_letter
     
-    out_path = os.path.join(output_dir, "fracao_ideal.xlsx")
-    df.to_excel(out_path, index=False)
+    modelo = obter_modelo_projeto(uploaded_files)
+    area_tot_priv, area_tot_cond = _areas_totais_condominio(form_data)
+    linhas = _linhas_fracao_ideal(modelo.lotes_por_quadra(), area_tot_priv, area_tot_cond)
     
-    # Formatar o Excel
-    wb = load_workbook(out_path)
-    ws = wb.active
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title="FRAÇÃO IDEAL")
     
-    font_header = Font(name='Calibri', size=12, bold=True)
-    font_cell = Font(name='Calibri', size=12)
+    # Estilos registrados uma vez; cada célula só referencia o nome
     center = Alignment(horizontal='center', vertical='center', wrap_text=True)
     thin = Side(border_style='thin', color='000000')
     border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    for nome, negrito in (('fracao_cabecalho', True), ('fracao_celula', False)):
+        wb.add_named_style(NamedStyle(name=nome, font=Font(name='Calibri', size=12, bold=negrito),
+                                      alignment=center, border=border))
     
-    for r in ws.iter_rows():
-        for c in r:
-            c.alignment = center
-            c.border = border
-            c.font = font_header if c.row == 1 else font_cell
-    
-    for col in ws.columns:
-        maxlen = max(len(str(c.value)) if c.value is not None else 0 for c in col)
-        ws.column_dimensions[col[0].column_letter].width = max(12, maxlen + 2)
+    # Larguras antes das linhas (write-only não volta nas células): maior texto + 2, mínimo 12
+    for idx, cabecalho in enumerate(_COLUNAS_FRACAO_IDEAL):
+        maxlen = max([len(cabecalho)] + [len(row[idx]) for row in linhas])
+        ws.column_dimensions[get_column_letter(idx + 1)].width = max(12, maxlen + 2)
     ws.column_dimensions['D'].width = 22
     
-    wb.save(out_path)
-    return out_path
+    def _linha(valores, estilo):
+        cells = []
+        for valor in valores:
+            cell = WriteOnlyCell(ws, value=valor)
+            cell.style = estilo
+            cells.append(cell)
+        return cells
+    
+    ws.append(_linha(_COLUNAS_FRACAO_IDEAL, 'fracao_cabecalho'))
+    for row in linhas:
+        ws.append(_linha(row, 'fracao_celula'))
+    
+    return _saida_builder(wb, "fracao_ideal.xlsx", output_dir)
+
+# ===================== Excel de vértices (openpyxl) =====================
+def _limpa_prefixo_area(nome):
+    return re.sub(r'^ÁREA\s*\d+\s*:\s*', '', str(nome or ''), flags=re.IGNORECASE)
 
-def build_excel_vertices_web(form_data, uploaded_files, modo, output_dir):
+def _excel_estilos_base():
+    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    font_header = Font(name='Calibri', size=12, bold=True)
+    font_cell = Font(name='Calibri', size=12)
+    center = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    thin = Side(border_style='thin', color='000000')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    yellow = PatternFill('solid', fgColor='FFF59D')
+    return font_header, font_cell, center, border, yellow
+
+def _excel_larguras(ws):
+    from openpyxl.utils import get_column_letter
+    for idx in range(1, 9):
+        ws.column_dimensions[get_column_letter(idx)].width = 14
+    ws.column_dimensions['C'].width = 17  # LATITUDE / COORD X
+    ws.column_dimensions['D'].width = 17  # LONGITUDE / COORD Y
+    ws.column_dimensions['F'].width = 17  # DISTANCIA (m)
+    ws.column_dimensions['H'].width = 17  # CONFRONTANTE
+
+def _excel_cabecalho(ws, row_idx, coord_fmt, estilos):
+    if coord_fmt == 'utm':
+        hC, hD = "COORD. X", "COORD. Y"
+    else:
+        hC, hD = "LATITUDE", "LONGITUDE"
+    headers = ["DE", "PARA", hC, hD, "AZIMUTE", "DISTANCIA (m)", "RAIO (m)", "CONFRONTANTE"]
+    font_header, _, center, border, _ = estilos
+    for c, h in enumerate(headers, start=1):
+        cell = ws.cell(row=row_idx, column=c, value=h)
+        cell.font = font_header
+        cell.alignment = center
+        cell.border = border
+
+def _excel_bloco_area(ws, titulo_area, rows, start_row, coord_fmt, estilos):
+    """Escreve título + cabeçalho + linhas de uma área; retorna a próxima linha livre"""
+    from openpyxl.styles import Font
+    font_header, font_cell, center, border, yellow = estilos
+    max_col = 8
+    ws.merge_cells(start_row=start_row, start_column=1, end_row=start_row, end_column=max_col)
+    tcell = ws.cell(row=start_row, column=1, value=titulo_area)
+    tcell.font = Font(name='Calibri', size=12, bold=True)
+    tcell.alignment = center
+    for c in range(1, max_col + 1):
+        ws.cell(row=start_row, column=c).border = border
+
+    _excel_cabecalho(ws, start_row + 1, coord_fmt, estilos)
+    r = start_row + 2
+    for row in rows:
+        vals = [
+            row.get("DE", ""), row.get("PARA", ""),
+            row.get("COORD_1", ""), row.get("COORD_2", ""),
+            row.get("AZIMUTE", ""), row.get("DISTANCIA (m)", ""),
+            row.get("RAIO (m)", ""), row.get("CONFRONTANTE", "")
+        ]
+        for c, v in enumerate(vals, start=1):
+            cell = ws.cell(row=r, column=c, value=v)
+            cell.font = font_cell
+            cell.alignment = center
+            cell.border = border
+            if c in (6, 7) and isinstance(v, (int, float)):
+                cell.number_format = '#,##0.00'
+        if re.match(r'^P\d+$', str(vals[0])): ws.cell(row=r, column=1).fill = yellow
+        if re.match(r'^P\d+$', str(vals[1])): ws.cell(row=r, column=2).fill = yellow
+        r += 1
+    return r + 1
+
+def _excel_titulo_item(bloco_nome, bloco_item):
+    area_m2 = float(bloco_item.get("area_m2") or 0.0)
+    base = _limpa_prefixo_area(bloco_nome)
+    return f"{_normalize(base)} (ÁREA: {_fmt_br(area_m2, 2)}m²)"
+
+def build_excel_vertices_web(form_data, uploaded_files, modo, output_dir=None):
     """
     Gera Excel de Vértices para unificação/desmembramento
     Adaptada do código original do Xuxu.py
@@ -2272,59 +4039,176 @@ def build_excel_vertices_web(form_data, uploaded_files, modo, output_dir):
     from openpyxl import Workbook
     
     # Coletar itens
-    unif_item, desm_items = _collect_items_unif_desm_web(uploaded_files, modo)
+    modelo = obter_modelo_projeto(uploaded_files)
+    unif_item, desm_items = _collect_items_unif_desm_web(uploaded_files, modo, modelo)
+    coord_fmt = form_data.get('coord_fmt', 'utm') or 'utm'
+    zone_num, hemi = _auto_zone_from_city(form_data.get('cidade_emp', '') or '')
+    estilos = _excel_estilos_base()
     
     wb = Workbook()
     wb.remove(wb.active)
     
     def _nova_aba(nome):
         ws = wb.create_sheet(title=nome)
-        # Aplicar larguras de coluna básicas
-        for col in range(1, 10):
-            ws.column_dimensions[chr(64 + col)].width = 15
+        _excel_larguras(ws)
         return ws
     
     def _num_after_name(nm: str) -> int:
         m = re.search(r'(\d+)', _normalize(nm))
         return int(m.group(1)) if m else 10**9
     
-    # Gerar vértices baseado no modo
-    if modo == 'desmembramento':
+    def _aba_unificacao():
+        ws = _nova_aba("UNIFICAÇÃO")
+        if unif_item:
+            titulo = _excel_titulo_item(unif_item.get("name") or "UNIFICAÇÃO", unif_item)
+            rows = modelo.linhas(unif_item, coord_fmt, zone_num, hemi)
+            _excel_bloco_area(ws, f"ÁREA 1: {titulo}", rows, 1, coord_fmt, estilos)
+    
+    def _aba_desmembramento():
         desm_sorted = sorted(desm_items, key=lambda x: (_num_after_name(x[0]), _normalize(x[0])))
         ws = _nova_aba("DESMEMBRAMENTO")
-        # Adicionar cabeçalho básico
-        ws['A1'] = "Área"
-        ws['B1'] = "Vértice"
-        ws['C1'] = "Coordenada X"
-        ws['D1'] = "Coordenada Y"
-        # TODO: Implementar preenchimento completo dos vértices
-        
+        r = 1
+        for nm, it in desm_sorted:
+            rows = modelo.linhas(it, coord_fmt, zone_num, hemi)
+            r = _excel_bloco_area(ws, _excel_titulo_item(nm, it), rows, r, coord_fmt, estilos)
+    
+    # Gerar vértices baseado no modo
+    if modo == 'desmembramento':
+        _aba_desmembramento()
     elif modo == 'unificacao':
-        ws = _nova_aba("UNIFICAÇÃO")
-        ws['A1'] = "Área"
-        ws['B1'] = "Vértice"
-        ws['C1'] = "Coordenada X"
-        ws['D1'] = "Coordenada Y"
-        # TODO: Implementar preenchimento completo dos vértices
-        
+        _aba_unificacao()
     else:  # 'unif_desm'
-        ws_u = _nova_aba("UNIFICAÇÃO")
-        ws_u['A1'] = "Área"
-        ws_u['B1'] = "Vértice"
-        ws_u['C1'] = "Coordenada X"
-        ws_u['D1'] = "Coordenada Y"
-        
-        desm_sorted = sorted(desm_items, key=lambda x: (_num_after_name(x[0]), _normalize(x[0])))
-        ws_d = _nova_aba("DESMEMBRAMENTO")
-        ws_d['A1'] = "Área"
-        ws_d['B1'] = "Vértice"
-        ws_d['C1'] = "Coordenada X"
-        ws_d['D1'] = "Coordenada Y"
-        # TODO: Implementar preenchimento completo dos vértices
+        _aba_unificacao()
+        _aba_desmembramento()
     
-    out_path = os.path.join(output_dir, "vertices.xlsx")
-    wb.save(out_path)
-    return out_path
+    return _saida_builder(wb, "vertices.xlsx", output_dir)
+
+# ===================== Pacote de artefatos =====================
+# Um pedido, todos os artefatos do tipo de empreendimento num ZIP. Os uploads
+# são lidos uma vez aqui (ModeloProjeto). Onde fica o paralelismo:
+# - o artefato principal (memorial) roda nesta thread; o trabalho pesado dele,
+#   os parágrafos de lotes, já vai para o pool de renderização;
+# - os demais artefatos vão para processos do mesmo pool, com os uploads e as
+#   leituras já prontas (pickle do cache de leituras): o filho não relê nada.
+# Com um núcleo só (ou dentro de um filho dos pools) tudo roda aqui, em série.
+_ARTEFATOS_PACOTE = {
+    'condominio': (('docx', 'condominio'), ('excel', 'condominio'),
+                   ('docx', 'memorial_resumo'), ('docx', 'solicitacao_analise')),
+    'loteamento': (('docx', 'loteamento'), ('docx', 'memorial_resumo'), ('docx', 'solicitacao_analise')),
+    'unificacao': (('docx', 'unificacao'), ('excel', 'unificacao')),
+    'desmembramento': (('docx', 'desmembramento'), ('excel', 'desmembramento')),
+    'unif_desm': (('docx', 'unif_desm'), ('excel', 'unif_desm')),
+    'memorial_resumo': (('docx', 'memorial_resumo'), ('docx', 'solicitacao_analise')),
+    'solicitacao_analise': (('docx', 'memorial_resumo'), ('docx', 'solicitacao_analise')),
+}
+_SEM_UPLOADS = ('memorial_resumo', 'solicitacao_analise')
+
+def artefatos_pacote(modo):
+    """[(artefato, modo)] que entram no pacote do tipo de empreendimento"""
+    return list(_ARTEFATOS_PACOTE.get(modo, ()))
+
+def _gerar_artefato_pacote(artefato, modo, form_data, uploaded_files):
+    if artefato == 'excel':
+        if modo == 'condominio':
+            return build_excel_fracao_ideal_web(form_data, uploaded_files)
+        return build_excel_vertices_web(form_data, uploaded_files, modo)
+    if modo == 'memorial_resumo':
+        return _build_memorial_resumo_doc_web(form_data)
+    if modo == 'solicitacao_analise':
+        return _build_solicitacao_analise_doc_web(form_data)
+    if modo in ('unificacao', 'desmembramento', 'unif_desm'):
+        return build_unif_desm_doc_web(form_data, uploaded_files, modo)
+    return build_condominio_loteamento_doc_web(form_data, uploaded_files, modo)
+
+def _leituras_prontas(uploaded_files):
+    """[(chave, pickle)] das leituras dos uploads já no cache deste processo"""
+    leituras = []
+    for _, tipo, data in _tarefas_leitura(uploaded_files):
+        chave = _CACHE_LEITURAS.chave(tipo, data)
+        blob = _CACHE_LEITURAS.consultar(chave)
+        if blob is not None:
+            leituras.append((chave, blob))
+    return leituras
+
+def _artefato_no_processo(artefato, modo, dados, uploaded_files, leituras):
+    """Executado no processo filho: (nome, bytes) do artefato"""
+    for chave, blob in leituras:
+        _CACHE_LEITURAS.semear(chave, blob)
+    gerado = _gerar_artefato_pacote(artefato, modo, dados, uploaded_files)
+    try:
+        return gerado.nome, gerado.abrir().read()
+    finally:
+        gerado.fechar()
+
+def build_pacote_web(form_data, uploaded_files, modo, output_dir=None):
+    """
+    ZIP com todos os artefatos que se aplicam ao modo (ver _ARTEFATOS_PACOTE),
+    gerados em paralelo a partir de uma única leitura dos uploads.
+    form_data: dict do formulário (vai para os processos filhos)
+    """
+    itens = artefatos_pacote(modo)
+    if not itens:
+        raise ValueError(f"Tipo de empreendimento sem pacote: {modo}")
+    dados = dict(form_data)
+    if modo in ('condominio', 'loteamento'):
+        # resumo e solicitação descrevem o próprio empreendimento
+        dados['tipo_proj_resumo'] = modo
+    if any(m not in _SEM_UPLOADS for _, m in itens):
+        obter_modelo_projeto(uploaded_files)  # leitura única, antes de distribuir
+
+    remotos = {}  # posição em itens -> futuro
+    if len(itens) > 1 and _POOL_RENDER.processos() > 1:
+        copia = None
+        try:
+            pool = _POOL_RENDER.obter()
+            for k, (artefato, m) in enumerate(itens[1:], 1):
+                if m in _SEM_UPLOADS:
+                    arquivos, leituras = {}, []
+                else:
+                    if copia is None:
+                        # mmap não é serializável: o filho recebe cópias em bytes
+                        copia = ({n: bytes(d) for n, d in uploaded_files.items()},
+                                 _leituras_prontas(uploaded_files))
+                    arquivos, leituras = copia
+                remotos[k] = pool.submit(_artefato_no_processo, artefato, m, dados, arquivos, leituras)
+        except (OSError, RuntimeError, BrokenProcessPool):
+            _POOL_RENDER.descartar()
+            remotos = {}
+
+    gerados = [None] * len(itens)
+    falha = None
+    for k, (artefato, m) in enumerate(itens):
+        try:
+            if k in remotos:
+                pronto = _POOL_RENDER.resultado(remotos[k])
+                if pronto is not None:
+                    gerados[k] = ArtefatoGerado(pronto[0], io.BytesIO(pronto[1]))
+                    continue
+                remotos = {}  # pool descartado: o resto sai em série
+            gerados[k] = _gerar_artefato_pacote(artefato, m, dados, uploaded_files)
+        except Exception as e:
+            falha = falha or e
+    if falha is not None:
+        for gerado in gerados:
+            if gerado is not None:
+                gerado.fechar()
+        raise falha
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+    try:
+        # DOCX/XLSX já são comprimidos: entram no ZIP sem recompressão
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+            carimbo = datetime.now().timetuple()[:6]
+            for gerado in gerados:
+                with zf.open(zipfile.ZipInfo(gerado.nome, carimbo), 'w') as destino:
+                    shutil.copyfileobj(gerado.abrir(), destino, 1 << 20)
+    except BaseException:
+        buffer.close()
+        raise
+    finally:
+        for gerado in gerados:
+            gerado.fechar()
+    return _saida_builder_pronto(buffer, f"pacote_{modo}.zip", output_dir)
 
 # Funções auxiliares para UNIF/DESM
 def _cidade_sem_uf(txt):
@@ -2333,34 +4217,18 @@ def _cidade_sem_uf(txt):
         s = s.split("/", 1)[0].strip()
     return s if s else "XXXX"
 
-def _collect_items_unif_desm_web(uploaded_files, modo):
+def _collect_items_unif_desm_web(uploaded_files, modo, modelo=None):
     """Versão web de _collect_items_unif_desm"""
+    modelo = modelo or obter_modelo_projeto(uploaded_files)
     items_unif = None
     items_desm = []
 
-    civil_htmls = [(f,d) for f,d in uploaded_files.items()
-                   if f.lower().endswith(('.html','.htm')) and 'CIVILREPORT' in f.upper()]
-    other_htmls = [(f,d) for f,d in uploaded_files.items()
-                   if f.lower().endswith(('.html','.htm')) and 'CIVILREPORT' not in f.upper()]
-
     if modo in ('unificacao','unif_desm'):
-        for fname, data in civil_htmls:
-            arr = parse_civilreport_from_html(io.BytesIO(data).read())
-            for it in arr:
-                nm = it.get('name') or ''
-                if is_unificacao_item_name(nm):
-                    items_unif = items_unif or it
+        modelo.itens_civil()  # repassa erro de leitura do CIVILREPORT
+        items_unif = modelo.unif_item
 
     if modo in ('desmembramento','unif_desm'):
-        for fname, data in other_htmls:
-            try:
-                parcels = parse_parcels_from_html(io.BytesIO(data).read())
-                for p in parcels:
-                    item = {'segments': p.get('segments', []), 'area_m2': p.get('area_m2', 0.0), 'first_point': p.get('first_point')}
-                    nm = f"GLEBA {p.get('num', 1)}"
-                    items_desm.append((nm, item))
-            except:
-                pass
+        items_desm = list(modelo.itens_desm)
     return items_unif, items_desm
 
 # Funções de seções UNIF/DESM (adaptadas)
@@ -2401,7 +4269,7 @@ def _sec_situacao_atual(doc, form_data, pres_unif, pres_desm):
         _set_run_defaults(r3, bold=True)
         _add_hl(par2, "XXXX")
 
-def _sec_unificacao(doc, form_data, unif_item):
+def _sec_unificacao(doc, form_data, unif_item, modelo=None):
     """Adaptada para usar form_data"""
     nome_fmt, end_fmt, cid_fmt, bai_fmt = _get_fmt_campos_basicos(form_data)
     heading(doc, "UNIFICAÇÃO")
@@ -2454,11 +4322,12 @@ def _sec_unificacao(doc, form_data, unif_item):
         zone_num=zone_num,
         hemi=hemi,
         ident_label_only=True,
-        ident_label_text="Descrição do Imóvel:"
+        ident_label_text="Descrição do Imóvel:",
+        modelo=modelo
     )
     adicionar_texto_formatado(doc, texto_desc)
 
-def _sec_desmembramento(doc, form_data, desm_items, zone_num, hemi):
+def _sec_desmembramento(doc, form_data, desm_items, zone_num, hemi, modelo=None):
     """Adaptada para usar form_data"""
     nome_fmt, end_fmt, cid_fmt, bai_fmt = _get_fmt_campos_basicos(form_data)
     heading(doc, "DESMEMBRAMENTO")
@@ -2500,7 +4369,8 @@ def _sec_desmembramento(doc, form_data, desm_items, zone_num, hemi):
             zone_num=zone_num,
             hemi=hemi,
             ident_label_only=True,
-            ident_label_text="Descrição do Imóvel:"
+            ident_label_text="Descrição do Imóvel:",
+            modelo=modelo
         )
         adicionar_texto_formatado(doc, texto_desc)
 
@@ -9,6 +9,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const botaoExcel = document.getElementById('btn_excel');
     const aneDrop = document.getElementById('ane_drop');
     const grupoAneLargura = document.getElementById('ane_largura_group');
+    const grupoVolumes = document.getElementById('volumes_group');
 
     // Alternar área não edificante
     aneDrop.addEventListener('change', function() {
@@ -26,6 +27,7 @@ document.addEventListener('DOMContentLoaded', function() {
         camposCoord.style.display = 'none';
         secaoUpload.style.display = 'none';
         botaoExcel.style.display = 'none';
+        grupoVolumes.style.display = 'none';
 
         if (tipo === 'condominio' || tipo === 'loteamento') {
             if (tipo === 'condominio') {
@@ -33,6 +35,7 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             camposAne.style.display = 'block';
             camposCoord.style.display = 'block';
+            grupoVolumes.style.display = 'block';
             secaoUpload.style.display = 'block';
             botaoExcel.style.display = 'block';
         } else if (tipo === 'memorial_resumo') {
@@ -132,15 +135,8 @@ document.addEventListener('DOMContentLoaded', function() {
         botaoGerar.innerHTML = '<span class="loading"></span> Gerando...';
 
         try {
-            const resposta = await fetch('/api/generate', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify(dados)
-            });
-
-            const resultado = await resposta.json();
+            dados.artefato = 'docx';
+            const resultado = await executarTarefa(dados, botaoGerar);
             
             if (resultado.success) {
                 mostrarMensagem('✅ Documento gerado com sucesso!', 'success');
@@ -205,15 +201,8 @@ document.addEventListener('DOMContentLoaded', function() {
         botaoExcel.innerHTML = '<span class="loading"></span> Gerando...';
 
         try {
-            const resposta = await fetch('/api/generate-excel', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify(dados)
-            });
-
-            const resultado = await resposta.json();
+            dados.artefato = 'excel';
+            const resultado = await executarTarefa(dados, botaoExcel);
             
             if (resultado.success) {
                 mostrarMensagem('✅ Planilha gerada com sucesso!', 'success');
@@ -231,8 +220,82 @@ document.addEventListener('DOMContentLoaded', function() {
             botaoExcel.innerHTML = '📊 Baixar Excel';
         }
     });
+
+    // Pacote com todos os artefatos do empreendimento (um ZIP)
+    const botaoPacote = document.getElementById('btn_pacote');
+    botaoPacote.addEventListener('click', async function() {
+        const dadosFormulario = new FormData(formulario);
+        const dados = {};
+        
+        for (let [chave, valor] of dadosFormulario.entries()) {
+            dados[chave] = valor;
+        }
+
+        dados.has_ai = document.getElementById('has_ai').checked;
+        dados.has_restricao = document.getElementById('has_restricao').checked;
+
+        const selecaoUsos = document.getElementById('usos_multi');
+        if (selecaoUsos) {
+            dados.usos_multi = Array.from(selecaoUsos.selectedOptions).map(opt => opt.value);
+        }
+
+        botaoPacote.disabled = true;
+        botaoPacote.innerHTML = '<span class="loading"></span> Gerando...';
+
+        try {
+            dados.artefato = 'pacote';
+            const resultado = await executarTarefa(dados, botaoPacote);
+            
+            if (resultado.success) {
+                mostrarMensagem('✅ Pacote gerado com sucesso!', 'success');
+                const linkDownload = document.createElement('a');
+                linkDownload.href = resultado.download_url;
+                linkDownload.download = resultado.filename;
+                linkDownload.click();
+            } else {
+                mostrarMensagem('❌ Erro ao gerar pacote: ' + (resultado.error || 'Erro desconhecido'), 'error');
+            }
+        } catch (erro) {
+            mostrarMensagem('❌ Erro ao gerar pacote: ' + erro.message, 'error');
+        } finally {
+            botaoPacote.disabled = false;
+            botaoPacote.innerHTML = '📦 Gerar Pacote (ZIP)';
+        }
+    });
 });
 
+// Envia a geração para a fila e consulta o estado até concluir
+async function executarTarefa(dados, botao) {
+    const resposta = await fetch('/api/jobs', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(dados)
+    });
+    const tarefa = await resposta.json();
+    if (!tarefa.success) {
+        return tarefa;
+    }
+
+    while (true) {
+        await new Promise(resolver => setTimeout(resolver, 1000));
+        const respostaEstado = await fetch(tarefa.status_url);
+        const estado = await respostaEstado.json();
+        if (!respostaEstado.ok) {
+            return { success: false, error: estado.error };
+        }
+        if (estado.status === 'concluida') {
+            return estado;
+        }
+        if (estado.status === 'erro') {
+            return { success: false, error: estado.error, traceback: estado.traceback };
+        }
+        const percentual = Math.round((estado.progress || 0) * 100);
+        botao.innerHTML = `<span class="loading"></span> ${estado.message || 'Gerando'}... ${percentual}%`;
+    }
+}
+
 function mostrarMensagem(mensagem, tipo) {
     const divMensagens = document.getElementById('messages');
     const divMensagem = document.createElement('div');
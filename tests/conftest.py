@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# os módulos do app ficam na raiz do repositório, fora de um pacote
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
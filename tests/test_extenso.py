@@ -0,0 +1,16 @@
+"""
+extenso.por_extenso tem de ser idêntico a num2words(n, lang='pt_BR'): todos
+os inteiros de 0 a 999.999 e os grupos de milhar típicos até 10^12.
+"""
+from num2words import num2words
+
+import extenso
+
+
+def test_equivalente_ao_num2words():
+    assert extenso.verificar() == []
+
+
+def test_fora_da_faixa_usa_num2words():
+    for n in (-1, -1234, 10 ** 12, 10 ** 12 + 101):
+        assert extenso.por_extenso(n) == num2words(n, lang='pt_BR')
@@ -0,0 +1,64 @@
+"""
+Leitor de relatório TXT (iter_parcels_from_txt): os layouts que o regex antigo
+aceitava (campo no meio da linha, campos de um item em linhas seguidas)
+precisam dar as mesmas parcelas do layout de um campo por linha, e o que não
+se completa precisa virar erro em vez de sumir.
+"""
+import io
+import re
+from pathlib import Path
+
+import pytest
+
+from memorial_processor import iter_parcels_from_txt, parse_parcels_from_txt
+
+FIXTURES = Path(__file__).parent / "fixtures" / "txt"
+
+
+def _ler(nome):
+    return (FIXTURES / nome).read_bytes()
+
+
+@pytest.fixture(scope="module")
+def padrao():
+    return parse_parcels_from_txt(_ler("padrao.txt"))
+
+
+def test_layout_padrao(padrao):
+    assert [p["num"] for p in padrao] == [2, 3]
+    assert [p["area_m2"] for p in padrao] == [555.97, 1170.69]
+    assert padrao[0]["first_point"] == {'Y': 6672185.581, 'X': 489114.025}
+    assert [s["type"] for s in padrao[0]["segments"]] == ["line", "line", "curve", "line", "curve"]
+    assert len(padrao[1]["segments"]) == 6
+    assert padrao[0]["segments"][2]["radius_m"] == 38.424
+
+
+@pytest.mark.parametrize("nome", [
+    "area_na_linha_do_perimetro.txt",
+    "inicio_em_duas_linhas.txt",
+    "reta_em_duas_linhas.txt",
+    "curva_em_duas_linhas.txt",
+])
+def test_layouts_equivalentes(padrao, nome):
+    assert parse_parcels_from_txt(_ler(nome)) == padrao
+
+
+def test_crlf(padrao):
+    assert parse_parcels_from_txt(_ler("padrao.txt").replace(b"\n", b"\r\n")) == padrao
+
+
+def test_arquivo_em_blocos_pequenos(padrao):
+    class LeituraCurta(io.BytesIO):
+        def read(self, n=-1):
+            return super().read(7)
+
+    assert list(iter_parcels_from_txt(LeituraCurta(_ler("padrao.txt")))) == padrao
+
+
+@pytest.mark.parametrize("nome, trecho", [
+    ("curva_sem_raio.txt", "lote 2, segmento #5 incompleto (sem Radius)"),
+    ("inicio_sem_coordenadas.txt", "lote 3, Point of Beginning sem North/East"),
+])
+def test_item_incompleto_levanta_erro(nome, trecho):
+    with pytest.raises(ValueError, match=re.escape(trecho)):
+        parse_parcels_from_txt(_ler(nome))